@@ -0,0 +1,54 @@
+"""Add pgvector embedding columns with an HNSW inner-product index.
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-01-01 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision = "006"
+down_revision = "005"
+branch_labels = None
+depends_on = None
+
+EMBEDDING_DIM = 384
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+
+    for table in ("property_features", "student_profiles"):
+        op.add_column(
+            table, sa.Column("embedding", Vector(EMBEDDING_DIM), nullable=True)
+        )
+        # Backfill from the JSON lists; skip rows with the wrong dimension
+        op.execute(
+            f"""
+            UPDATE {table}
+            SET embedding = embedding_vector::text::vector
+            WHERE embedding_vector IS NOT NULL
+              AND json_typeof(embedding_vector) = 'array'
+              AND json_array_length(embedding_vector) = {EMBEDDING_DIM}
+            """
+        )
+
+    # Search orders by `embedding <#> :q`, which this index serves
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS ix_property_features_embedding_hnsw
+        ON property_features USING hnsw (embedding vector_ip_ops)
+        WITH (m = 16, ef_construction = 64)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_property_features_embedding_hnsw")
+    op.drop_column("student_profiles", "embedding")
+    op.drop_column("property_features", "embedding")
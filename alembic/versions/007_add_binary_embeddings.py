@@ -0,0 +1,34 @@
+"""Add float32 binary embedding columns.
+
+Existing rows are filled by the `app.tasks.embeddings.backfill_embeddings`
+Celery task, which also L2-normalises the pgvector column.
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-01-01 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "007"
+down_revision = "006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "property_features", sa.Column("embedding_f32", sa.LargeBinary(), nullable=True)
+    )
+    op.add_column(
+        "student_profiles", sa.Column("embedding_f32", sa.LargeBinary(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("student_profiles", "embedding_f32")
+    op.drop_column("property_features", "embedding_f32")
@@ -0,0 +1,31 @@
+"""Index precomputed recommendations by student and rank.
+
+The trainer rewrites the `recommendations` table after every run and
+`/for-student` reads one student's rows in rank order.
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-01-01 00:00:00.000000
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "008"
+down_revision = "007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_recommendations_user_rank",
+        "recommendations",
+        ["user_id", "rank_position"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_recommendations_user_rank", table_name="recommendations")
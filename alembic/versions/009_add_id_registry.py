@@ -0,0 +1,36 @@
+"""Add the append-only recommender id registry.
+
+Maps student user ids and property ids to stable model indices, so new
+rows no longer reshuffle the matrices of an already trained model.
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-01-01 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "009"
+down_revision = "008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "id_registry",
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("entity_id", sa.Uuid(), nullable=False),
+        sa.Column("idx", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("kind", "entity_id"),
+        sa.UniqueConstraint("kind", "idx", name="uq_id_registry_kind_idx"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("id_registry")
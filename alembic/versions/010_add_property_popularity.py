@@ -0,0 +1,43 @@
+"""Add the property popularity aggregate table.
+
+Filled by the `app.tasks.popularity.refresh_popularity` Celery task and
+read by the recommender's popularity fallback.
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-01-01 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "010"
+down_revision = "009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "property_popularity",
+        sa.Column("time_window", sa.String(), nullable=False),
+        sa.Column("segment", sa.String(), nullable=False, server_default=""),
+        sa.Column("property_id", sa.Uuid(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["property_id"], ["properties.id"]),
+        sa.PrimaryKeyConstraint("time_window", "segment", "property_id"),
+    )
+    op.create_index(
+        "ix_property_popularity_rank",
+        "property_popularity",
+        ["time_window", "segment", "score"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_property_popularity_rank", table_name="property_popularity")
+    op.drop_table("property_popularity")
@@ -0,0 +1,127 @@
+"""Range-partition interaction_events by month and index it for the recommender.
+
+The table is rebuilt as `PARTITION BY RANGE (created_at)` with one
+partition per month (from the oldest event to a few months ahead) plus a
+default partition, and the existing rows are copied over. Postgres
+requires the partition key in the primary key, so it becomes
+(id, created_at). Later months are created by the
+`app.tasks.interactions.maintain_partitions` Celery task.
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-01-01 00:00:00.000000
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "011"
+down_revision = "010"
+branch_labels = None
+depends_on = None
+
+# Months created after the current one (see INTERACTION_PARTITIONS_AHEAD)
+PARTITIONS_AHEAD = 3
+
+INDEXES = {
+    "ix_interaction_events_user_created": ["user_id", "created_at"],
+    "ix_interaction_events_property_created": ["property_id", "created_at"],
+    "ix_interaction_events_created": ["created_at", "property_id", "user_id"],
+}
+
+
+def _add_constraints():
+    op.execute(
+        "ALTER TABLE interaction_events"
+        " ADD CONSTRAINT interaction_events_user_id_fkey"
+        " FOREIGN KEY (user_id) REFERENCES users (id)"
+    )
+    op.execute(
+        "ALTER TABLE interaction_events"
+        " ADD CONSTRAINT interaction_events_property_id_fkey"
+        " FOREIGN KEY (property_id) REFERENCES properties (id)"
+    )
+
+
+def _copy_from(old: str):
+    op.execute(
+        "INSERT INTO interaction_events"
+        " (id, user_id, property_id, event_type, created_at)"
+        " SELECT id, user_id, property_id, event_type, COALESCE(created_at, now())"
+        f" FROM {old}"
+    )
+    op.execute(f"DROP TABLE {old}")
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE interaction_events RENAME TO interaction_events_old")
+    op.execute(
+        "ALTER TABLE interaction_events_old"
+        " RENAME CONSTRAINT interaction_events_pkey TO interaction_events_old_pkey"
+    )
+    # LIKE keeps the existing column types and defaults
+    op.execute(
+        "CREATE TABLE interaction_events"
+        " (LIKE interaction_events_old INCLUDING DEFAULTS)"
+        " PARTITION BY RANGE (created_at)"
+    )
+    op.execute("ALTER TABLE interaction_events ALTER COLUMN created_at SET NOT NULL")
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            part_start date;
+            part_stop date := (date_trunc('month', now())
+                          + interval '{PARTITIONS_AHEAD} months')::date;
+        BEGIN
+            SELECT date_trunc('month', COALESCE(min(created_at), now()))::date
+              INTO part_start FROM interaction_events_old;
+            WHILE part_start <= part_stop LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF interaction_events'
+                    ' FOR VALUES FROM (%L) TO (%L)',
+                    'interaction_events_' || to_char(part_start, 'YYYYMM'),
+                    part_start,
+                    (part_start + interval '1 month')::date
+                );
+                part_start := (part_start + interval '1 month')::date;
+            END LOOP;
+        END $$;
+        """
+    )
+    op.execute(
+        "CREATE TABLE interaction_events_default"
+        " PARTITION OF interaction_events DEFAULT"
+    )
+    _copy_from("interaction_events_old")
+
+    # built after the copy; created on the parent, so every partition gets them
+    op.execute(
+        "ALTER TABLE interaction_events"
+        " ADD CONSTRAINT interaction_events_pkey PRIMARY KEY (id, created_at)"
+    )
+    _add_constraints()
+    for name, columns in INDEXES.items():
+        op.create_index(name, "interaction_events", columns)
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE interaction_events RENAME TO interaction_events_old")
+    op.execute(
+        "ALTER TABLE interaction_events_old"
+        " RENAME CONSTRAINT interaction_events_pkey TO interaction_events_old_pkey"
+    )
+    for name in INDEXES:
+        op.execute(f"ALTER INDEX {name} RENAME TO {name}_old")
+    op.execute(
+        "CREATE TABLE interaction_events"
+        " (LIKE interaction_events_old INCLUDING DEFAULTS)"
+    )
+    _copy_from("interaction_events_old")
+    op.execute(
+        "ALTER TABLE interaction_events"
+        " ADD CONSTRAINT interaction_events_pkey PRIMARY KEY (id)"
+    )
+    _add_constraints()
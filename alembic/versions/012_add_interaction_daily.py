@@ -0,0 +1,45 @@
+"""Add the daily interaction rollup table.
+
+One row per (day, student, listing, event type) with the number of raw
+events. Filled by `app.tasks.interactions.roll_up_interactions`, and by
+`prune_interactions` for each raw partition before it is dropped.
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-01-01 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "012"
+down_revision = "011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "interaction_daily",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column("property_id", sa.Uuid(), nullable=False),
+        sa.Column("event_type", sa.String(), nullable=False, server_default=""),
+        sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["property_id"], ["properties.id"]),
+        sa.PrimaryKeyConstraint("day", "user_id", "property_id", "event_type"),
+    )
+    op.create_index(
+        "ix_interaction_daily_property_day",
+        "interaction_daily",
+        ["property_id", "day"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_interaction_daily_property_day", table_name="interaction_daily")
+    op.drop_table("interaction_daily")
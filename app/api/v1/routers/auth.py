@@ -6,20 +6,21 @@ from passlib.context import CryptContext
 from app.models.models import User, StudentProfile, LandlordProfile, AdminProfile
 from app.schemas.schemas import UserCreate, Token, Login
 from app.auth import (
+    ahash_password,
+    averify_password,
     create_access_token,
     create_refresh_token,
-    hash_password,
-    verify_password,
+    revoke_tokens,
 )
 from app.db.session import get_db
-from starlette.concurrency import run_in_threadpool
-from app.services.embeddings import EmbeddingService
+from app.deps.dependencies import Principal, get_current_principal
+from app.services.embeddings import embedding_service
+from app.services.embedding_store import embedding_columns
 
 # from app.crud.user import create_user
 
 pwd = CryptContext(schemes=["bcrypt"], deprecated="auto")
 router = APIRouter(tags=["auth"])
-embedding_service = EmbeddingService()
 
 
 @router.post("/signup")
@@ -43,7 +44,7 @@ async def signup(payload: UserCreate, db: AsyncSession = Depends(get_db)):
     # create new user
     user = User(
         email=payload.email,
-        password_hash=hash_password(payload.password),
+        password_hash=await ahash_password(payload.password),
         role=payload.role,
         phone=payload.phone,
         firstname=payload.firstname,
@@ -57,7 +58,7 @@ async def signup(payload: UserCreate, db: AsyncSession = Depends(get_db)):
 
         # Generate embedding for student profile
         text_to_embed = f"{payload.firstname} {payload.lastname} {payload.email}"
-        embedding = await run_in_threadpool(embedding_service.embed, text_to_embed)
+        embedding = await embedding_service.aembed(text_to_embed)
 
         sp = StudentProfile(
             user_id=user.id,
@@ -69,7 +70,7 @@ async def signup(payload: UserCreate, db: AsyncSession = Depends(get_db)):
             preferred_location=payload.preferred_location or "",
             preferred_room_type=payload.preferred_room_type or "",
             preferred_amenities=payload.preferred_amenities or "",
-            embedding_vector=embedding,
+            **embedding_columns(embedding),
         )
         db.add(sp)
     elif payload.role == "landlord":
@@ -81,7 +82,7 @@ async def signup(payload: UserCreate, db: AsyncSession = Depends(get_db)):
 
     await db.commit()
 
-    access = create_access_token(user.id)
+    access = create_access_token(user.id, user.role, user.is_verified)
     refresh = await create_refresh_token(user.id)
 
     return {
@@ -103,9 +104,24 @@ async def login(payload: Login, db: AsyncSession = Depends(get_db)) -> Token:
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    if not user or not verify_password(payload.password, user.password_hash):
+    valid, new_hash = await averify_password(payload.password, user.password_hash)
+    if not valid:
         raise HTTPException(status_code=400, detail="Invalid credentials")
+    if new_hash:
+        # stored with an older bcrypt cost: upgrade it while we have the password
+        user.password_hash = new_hash
+        await db.commit()
 
-    access = create_access_token(user.id)
+    access = create_access_token(user.id, user.role, user.is_verified)
     refresh = await create_refresh_token(user.id)
     return {"access_token": access, "refresh_token": refresh, "token_type": "bearer"}
+
+
+@router.post("/logout")
+async def logout(
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    """Revoke the caller's refresh tokens and outstanding access tokens."""
+    await revoke_tokens(db, current_user.id)
+    return {"message": "logged out"}
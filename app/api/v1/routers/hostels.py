@@ -1,25 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from uuid import uuid4
+from uuid import UUID, uuid4
 from app.db.session import get_db
-from app.models.models import Property, User, LandlordProfile, PropertyFeature
+from app.models.models import Property, LandlordProfile, PropertyFeature
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
-from app.schemas.schemas import PropertyCreate
-from app.services.embeddings import EmbeddingService
 from starlette.concurrency import run_in_threadpool
-from app.deps.dependencies import get_current_user
+from app.schemas.schemas import PropertyCreate, BulkImportResponse
+from app.services.bulk_import import (
+    BULK_IMPORT_MAX_ROWS,
+    import_listings,
+    parse_listings,
+)
+from app.services.embeddings import embedding_service
+from app.services.embedding_store import embedding_columns
+from app.services.vector_index import vector_index
+from app.services.candidate_filter import candidate_filter
+from app.deps.dependencies import Principal, get_current_principal
 
 
 router = APIRouter()
-embedding_service = EmbeddingService()
+
+
+async def _own_landlord_id(session: AsyncSession, current_user: Principal) -> UUID:
+    """Landlord profile id for a landlord user; 400 if it is missing."""
+    stmt = select(LandlordProfile).where(LandlordProfile.user_id == current_user.id)
+    res = await session.execute(stmt)
+    lp = res.scalars().first()
+    if not lp:
+        raise HTTPException(
+            status_code=400, detail="Landlord profile not found for current user"
+        )
+    return lp.id
 
 
 @router.post("/add")
 async def add_property(
     payload: PropertyCreate,
     session: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Add a new property listing."""
     # print(f"CURRENT USER ID: {current_user.id}")
@@ -32,14 +52,7 @@ async def add_property(
 
     # Determine landlord_id: landlords use their own profile, admins must provide one
     if current_user.role == "landlord":
-        stmt = select(LandlordProfile).where(LandlordProfile.user_id == current_user.id)
-        res = await session.execute(stmt)
-        lp = res.scalars().first()
-        if not lp:
-            raise HTTPException(
-                status_code=400, detail="Landlord profile not found for current user"
-            )
-        landlord_id = lp.id
+        landlord_id = await _own_landlord_id(session, current_user)
     else:
         # admin
         landlord_id = payload.landlord_id
@@ -52,8 +65,8 @@ async def add_property(
             status_code=400, detail="Property with this name already exists"
         )
 
-    # Generate embedding for the property description (offload blocking call)
-    emb = await run_in_threadpool(embedding_service.embed, payload.description)
+    # Generate embedding for the property description (batched, off the loop)
+    emb = await embedding_service.aembed(payload.description)
 
     property_obj = Property(
         id=uuid4(),
@@ -67,7 +80,8 @@ async def add_property(
 
     session.add(property_obj)
     # create a PropertyFeature record for this property (embedding stored here)
-    feature = PropertyFeature(property_id=property_obj.id, embedding_vector=emb)
+    columns = embedding_columns(emb)
+    feature = PropertyFeature(property_id=property_obj.id, **columns)
     session.add(feature)
     try:
         await session.commit()
@@ -78,4 +92,68 @@ async def add_property(
         ) from err
     await session.refresh(property_obj)
 
+    # make the new listing searchable in this worker straight away
+    if vector_index.ready:
+        vector_index.add(property_obj.id, columns["embedding"])
+    # and recommendable without waiting for the candidate filter's refresh
+    if candidate_filter.ready:
+        candidate_filter.update(
+            property_obj.id,
+            property_obj.is_available,
+            property_obj.gender_restriction,
+            property_obj.price,
+        )
+
     return {"message": "Property added", "id": str(property_obj.id)}
+
+
+@router.post("/bulk", response_model=BulkImportResponse)
+async def bulk_add_properties(
+    request: Request,
+    landlord_id: Optional[UUID] = None,
+    session: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    """Import many listings from a JSONL (default) or CSV (`text/csv`) body.
+
+    Landlords always import into their own profile; admins may set
+    `landlord_id` per row or as a default via the query parameter.
+    Rows that fail validation or insertion are reported, not fatal.
+    """
+    if current_user.role not in ("landlord", "admin"):
+        raise HTTPException(
+            status_code=403, detail="Only landlords or admins may add properties"
+        )
+    force_landlord = current_user.role == "landlord"
+    if force_landlord:
+        landlord_id = await _own_landlord_id(session, current_user)
+
+    content_type = request.headers.get("content-type", "")
+    fmt = "csv" if "csv" in content_type else "jsonl"
+    body = (await request.body()).decode("utf-8-sig")
+    records = list(parse_listings(body, fmt))
+    if len(records) > BULK_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {BULK_IMPORT_MAX_ROWS} listings per import",
+        )
+
+    async def embed_many(texts):
+        # one large encode per chunk instead of the per-request micro-batcher
+        return await run_in_threadpool(embedding_service.embed_many, texts)
+
+    report = await import_listings(
+        session,
+        records,
+        embed_many,
+        landlord_id=landlord_id,
+        force_landlord=force_landlord,
+    )
+
+    if vector_index.ready:
+        for pid, emb in report["embeddings"]:
+            vector_index.add(pid, emb)
+    if report["created"]:
+        candidate_filter.invalidate()
+
+    return report
@@ -1,10 +1,25 @@
 # Interaction Logging Service → Track what students do (click, save, apply).
-from fastapi import APIRouter, Depends
+import os
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
-from app.models.models import InteractionEvent, User
-from app.schemas.schemas import InteractionRequest, InteractionResponse
-from app.deps.dependencies import get_current_user
+from app.models.models import Property
+from app.schemas.schemas import (
+    InteractionBatchResponse,
+    InteractionRequest,
+    InteractionResponse,
+)
+from app.deps.dependencies import Principal, get_current_principal
+from app.services.interaction_buffer import (
+    interaction_buffer,
+    interaction_insert,
+    interaction_row,
+)
+
+# Events accepted per POST /batch
+INTERACTION_BATCH_MAX = int(os.getenv("INTERACTION_BATCH_MAX", "500"))
 
 router = APIRouter()
 
@@ -13,25 +28,77 @@ router = APIRouter()
 async def log_interaction(
     payload: InteractionRequest,
     session: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    """Log a user interaction event (view, click, save, skip, etc.)."""
+    """Log a user interaction event (view, click, save, skip, etc.).
 
-    interaction = InteractionEvent(
-        user_id=current_user.id,
-        property_id=payload.property_id,
-        event_type=payload.event_type,
-    )
+    The event is buffered and written with others in one batch insert.
+    """
 
-    session.add(interaction)
-    await session.commit()
-    await session.refresh(interaction)
+    interaction = await interaction_buffer.log(
+        current_user.id, payload.property_id, payload.event_type
+    )
 
     return {
         "message": "✅ Interaction logged successfully",
         "interaction": {
-            "user_id": interaction.user_id,
-            "property_id": interaction.property_id,
-            "event_type": interaction.event_type,
+            "user_id": interaction["user_id"],
+            "property_id": interaction["property_id"],
+            "event_type": interaction["event_type"],
         },
     }
+
+
+@router.post("/batch", response_model=InteractionBatchResponse)
+async def log_interactions_batch(
+    payload: List[InteractionRequest],
+    session: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    """Log a burst of interaction events in one request.
+
+    Property ids are checked with one query and the valid events are
+    written with one INSERT. Unknown properties are reported per item.
+    """
+    if len(payload) > INTERACTION_BATCH_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {INTERACTION_BATCH_MAX} interactions per batch",
+        )
+    if not payload:
+        return {"logged": 0, "rejected": 0, "results": []}
+
+    property_ids = {item.property_id for item in payload}
+    res = await session.execute(
+        select(Property.id).where(Property.id.in_(property_ids))
+    )
+    known = set(res.scalars().all())
+
+    rows, results = [], []
+    for index, item in enumerate(payload):
+        if item.property_id in known:
+            rows.append(
+                interaction_row(current_user.id, item.property_id, item.event_type)
+            )
+            results.append(
+                {"index": index, "property_id": item.property_id, "status": "logged"}
+            )
+        else:
+            results.append(
+                {
+                    "index": index,
+                    "property_id": item.property_id,
+                    "status": "rejected",
+                    "error": "Property not found",
+                }
+            )
+
+    if rows:
+        await session.execute(interaction_insert(), rows)
+        await session.commit()
+
+    return {
+        "logged": len(rows),
+        "rejected": len(results) - len(rows),
+        "results": results,
+    }
@@ -3,8 +3,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.db.session import get_db
 from app.services.recommender import RecommenderService
-from app.models.models import Property, User
-from app.deps.dependencies import get_current_user
+from app.models.models import Property
+from app.deps.dependencies import Principal, get_current_principal
 from app.tasks.recommender import train_recommender
 from app.schemas.schemas import RecommendationRequest, RecommendationResponse
 
@@ -23,7 +23,7 @@ async def trigger_training():
 async def recommend_for_student(
     payload: RecommendationRequest,
     session: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Get property recommendations for a specific student."""
 
@@ -34,6 +34,12 @@ async def recommend_for_student(
             detail=f"Sorry you are a {current_user.role}. Only students may access recommendations",
         )
 
+    # Precomputed by the trainer: one indexed lookup
+    stored = await recommender.stored_recommendations(payload.student_id, session)
+    if stored:
+        return {"recommendations": stored}
+
+    # Cold student (not in the last training run): score live
     property_ids = await recommender.recommend(str(payload.student_id), session)
 
     if not property_ids:
@@ -42,6 +48,8 @@ async def recommend_for_student(
     stmt = select(Property).where(Property.id.in_(property_ids))
     result = await session.execute(stmt)
     properties = result.scalars().all()
-    filtered = [p for p in properties if p.id in property_ids]
+    # keep the recommender's ranking (ids come back as strings)
+    by_id = {str(p.id): p for p in properties}
+    ordered = [by_id[pid] for pid in property_ids if pid in by_id]
 
-    return {"recommendations": filtered}
+    return {"recommendations": ordered}
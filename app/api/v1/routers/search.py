@@ -1,66 +1,142 @@
+from uuid import UUID
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
 from sqlmodel import select
 from app.db.session import get_db
-from app.models.models import Property, InteractionEvent, User
-from app.deps.dependencies import get_current_user
-
-from app.services.embeddings import EmbeddingService
+from app.models.models import Property, PropertyFeature
+from app.deps.dependencies import Principal, get_current_principal
+
+from app.services.embeddings import embedding_service
+from app.services.embedding_store import normalize
+from app.services.interaction_buffer import interaction_buffer
+from app.services.scoring import CandidateMatrix
+from app.services.vector_index import (
+    PGVECTOR_EF_SEARCH,
+    VECTOR_BACKEND,
+    vector_index,
+)
 from typing import Optional
 from app.schemas.schemas import SearchRequest, SearchResponse
-from sqlalchemy.orm import selectinload
-from starlette.concurrency import run_in_threadpool
 
 router = APIRouter()
-embedding_service = EmbeddingService()
 
 
-# Search endpoint (unchanged)
+def _to_result(h, score: float) -> dict:
+    return {
+        "id": str(h.id),
+        "title": h.title,
+        "description": h.description,
+        "price": h.price,
+        "score": score,
+    }
+
+
+async def _search_pgvector(
+    session: AsyncSession,
+    query_emb,
+    max_price: Optional[float],
+    limit: int,
+    offset: int,
+):
+    """One page of results ranked by inner product inside Postgres."""
+    # <#> is the negative inner product, so ascending order is best first
+    distance = PropertyFeature.embedding.max_inner_product(query_emb)
+    stmt = (
+        select(Property, distance.label("distance"))
+        .join(PropertyFeature, PropertyFeature.property_id == Property.id)
+        .where(Property.is_available == True, PropertyFeature.embedding.is_not(None))
+    )
+    if max_price is not None:
+        stmt = stmt.where(Property.price <= max_price)
+    stmt = stmt.order_by(distance).offset(offset).limit(limit)
+
+    await session.execute(text(f"SET LOCAL hnsw.ef_search = {PGVECTOR_EF_SEARCH}"))
+    result = await session.execute(stmt)
+    return [_to_result(h, -float(d)) for h, d in result.all()]
+
+
+async def _search_index(
+    session: AsyncSession,
+    query_emb,
+    max_price: Optional[float],
+    limit: int,
+    offset: int,
+):
+    """One page from the in-memory index, with listing filters applied in SQL.
+
+    Filtered-out hits are replaced by widening the ANN fetch until the page
+    is full or the index is exhausted.
+    """
+    k = offset + limit
+    fetch = k
+    while True:
+        hits = vector_index.search(query_emb, fetch)
+        if not hits:
+            return []
+        scores = dict(hits)
+
+        h_stmt = select(Property).where(
+            Property.id.in_([UUID(pid) for pid in scores]),
+            Property.is_available == True,
+        )
+        if max_price is not None:
+            h_stmt = h_stmt.where(Property.price <= max_price)
+        result = await session.execute(h_stmt)
+        hostels = result.scalars().all()
+
+        if len(hostels) >= k or len(hits) < fetch:
+            break
+        fetch *= 4
+
+    hostels = sorted(hostels, key=lambda h: scores[str(h.id)], reverse=True)
+    return [_to_result(h, scores[str(h.id)]) for h in hostels[offset:k]]
+
+
+async def _search_scan(
+    session: AsyncSession,
+    query_emb,
+    max_price: Optional[float],
+    limit: int,
+    offset: int,
+):
+    """One page from scoring every available listing in a single mat-vec."""
+    stmt = (
+        select(Property, PropertyFeature.embedding_f32)
+        .join(PropertyFeature, PropertyFeature.property_id == Property.id)
+        .where(
+            Property.is_available == True,
+            PropertyFeature.embedding_f32.is_not(None),
+        )
+    )
+    if max_price is not None:
+        stmt = stmt.where(Property.price <= max_price)
+
+    result = await session.execute(stmt)
+    candidates = CandidateMatrix.from_blobs(result.all())
+    return [
+        _to_result(h, score) for h, score in candidates.top_k(query_emb, limit, offset)
+    ]
+
+
 @router.post("/", response_model=SearchResponse)
 async def search_hostels(
     payload: SearchRequest,
     session: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
+    # stored listing embeddings are unit length, so this ranks by cosine
+    query_emb = normalize(await embedding_service.aembed_query(payload.query))
+    args = (session, query_emb, payload.max_price, payload.limit, payload.offset)
 
-    # Get properties with features that have embedding vectors
-    from app.models.models import PropertyFeature
-
-    h_stmt = select(Property).where(Property.is_available == True)
-    if payload.max_price is not None:
-        h_stmt = h_stmt.where(Property.price <= payload.max_price)
-    h_stmt = h_stmt.options(selectinload(Property.features))
-
-    result = await session.execute(h_stmt)
-    hostels = result.scalars().all()
-    query_emb = await run_in_threadpool(embedding_service.embed, payload.query)
-
-    # use inner product (matches pgvector inner product semantics)
-    def inner_product(v1, v2):
-        import numpy as np
-
-        v1, v2 = np.array(v1), np.array(v2)
-        return float(np.dot(v1, v2))
-
-    results = []
-    for h in hostels:
-        # Get embedding from PropertyFeature if available
-        embedding = h.features.embedding_vector if h.features else None
-        if not embedding:
-            continue
-        sim = inner_product(query_emb, embedding)
-        results.append(
-            {
-                "id": str(h.id),
-                "title": h.title,
-                "description": h.description,
-                "price": h.price,
-                "score": sim,
-            }
-        )
-
-    sorted_results = sorted(results, key=lambda x: x["score"], reverse=True)
-    return {"results": sorted_results}
+    if VECTOR_BACKEND == "pgvector":
+        results = await _search_pgvector(*args)
+    elif vector_index.ready and len(vector_index):
+        results = await _search_index(*args)
+    else:
+        # Index not built yet: score every available listing
+        results = await _search_scan(*args)
+    return {"results": results}
 
 
 # 👇 NEW: listing detail with auto logging
@@ -77,12 +153,8 @@ async def get_hostel_detail(
     if not hostel:
         return {"error": "Property not found"}
 
-    # ✅ Auto-log viewed interaction
-    interaction = InteractionEvent(
-        user_id=user_id, property_id=hostel_id, event_type="viewed"
-    )
-    session.add(interaction)
-    await session.commit()
+    # ✅ Auto-log viewed interaction (buffered, written in the background)
+    await interaction_buffer.log(user_id, hostel.id, "viewed")
 
     return {
         "message": "✅ Property fetched + view logged",
@@ -4,11 +4,12 @@ from datetime import datetime, timedelta
 import jwt
 from app.db.session import async_session_maker
 from app.models.models import RefreshToken
-from sqlalchemy import select
+from app.services.password_hasher import password_hasher
+from app.services.user_cache import user_cache
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from uuid import UUID
-from passlib.context import CryptContext
 
 # from jose import jwt
 
@@ -16,14 +17,23 @@ SECRET_KEY = os.getenv("SECRET_KEY", "devsecret")
 ALGORITHM = "HS256"
 ACCESS_EXPIRE_MINUTES = int(os.getenv("ACCESS_EXPIRE_MINUTES", "15"))
 REFRESH_EXPIRE_DAYS = int(os.getenv("REFRESH_EXPIRE_DAYS", "30"))
+# Put role/verification claims in access tokens, so most endpoints resolve
+# the caller without loading the user (see get_current_principal)
+ACCESS_TOKEN_CLAIMS = os.getenv("ACCESS_TOKEN_CLAIMS", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
 
 
-pwd_context = CryptContext(schemes=["bcrypt"])
+pwd_context = password_hasher.context
 SECRET_KEY = "CHANGE_ME"
 ALGORITHM = "HS256"
 
 
-def create_access_token(sub: UUID | str):
+def create_access_token(
+    sub: UUID | str, role: str | None = None, is_verified: bool | None = None
+):
     now = datetime.utcnow()
     exp = now + timedelta(minutes=ACCESS_EXPIRE_MINUTES)
     payload = {
@@ -32,6 +42,9 @@ def create_access_token(sub: UUID | str):
         "exp": exp.timestamp(),
         "type": "access",
     }
+    if ACCESS_TOKEN_CLAIMS and role:
+        payload["role"] = role
+        payload["verified"] = bool(is_verified)
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
 
@@ -62,6 +75,22 @@ async def create_refresh_token(sub: UUID | str) -> str:
     return token
 
 
+async def revoke_tokens(db: AsyncSession, user_id: UUID):
+    """Revoke the user's refresh tokens and reject their current access tokens.
+
+    Access tokens issued before now are rejected by every worker (the
+    revocation time is shared through Redis); other workers drop cached
+    users within USER_CACHE_TTL.
+    """
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked == False)
+        .values(revoked=True)
+    )
+    await db.commit()
+    await user_cache.revoke(user_id, datetime.utcnow().timestamp())
+
+
 def decode_token(token: str):
     """Decode and validate JWT token."""
     try:
@@ -83,3 +112,16 @@ def hash_password(password: str):
 
 def verify_password(password, hash):
     return pwd_context.verify(password, hash)
+
+
+# Async variants for request handlers: bcrypt runs on the hasher's pool and
+# they raise 503 when too many calls are already waiting
+
+
+async def ahash_password(password: str) -> str:
+    return await password_hasher.hash(password)
+
+
+async def averify_password(password: str, hash: str) -> tuple[bool, str | None]:
+    """(valid, new hash) — the new hash is set when BCRYPT_ROUNDS changed."""
+    return await password_hasher.verify_and_update(password, hash)
@@ -2,6 +2,11 @@ from os import getenv
 from celery import Celery
 
 REDIS = getenv("REDIS_URL", "redis://localhost:6379/0")
+# Warm-start training on new interactions between the daily full retrains
+RECOMMENDER_INCREMENTAL_SECONDS = float(
+    getenv("RECOMMENDER_INCREMENTAL_SECONDS", "300")
+)
+POPULARITY_REFRESH_SECONDS = float(getenv("POPULARITY_REFRESH_SECONDS", "600"))
 
 # Try Redis; fall back to in-memory broker for local dev/testing
 try:
@@ -14,14 +19,53 @@ except Exception:
     broker_url = "memory://"
     backend_url = "cache+memory://"
 
-celery_app = Celery("xenyou", broker=broker_url, backend=backend_url)
-celery_app.conf.task_routes = {"app.tasks.*": {"queue": "default"}}
+celery_app = Celery(
+    "xenyou",
+    broker=broker_url,
+    backend=backend_url,
+    include=[
+        "app.tasks.recommender",
+        "app.tasks.embeddings",
+        "app.tasks.popularity",
+        "app.tasks.interactions",
+    ],
+)
+# Recommender training/scoring is CPU-bound and long-running: keep it off the
+# default queue so it never delays short tasks, and run a dedicated worker:
+#   celery -A app.celery_app worker -Q training --concurrency 1 --prefetch-multiplier 1
+# Each task runs in a prefork child, so the parent keeps heartbeating while
+# LightFM uses RECOMMENDER_THREADS cores.
+celery_app.conf.task_routes = {
+    "app.tasks.recommender.*": {"queue": "training"},
+    "app.tasks.*": {"queue": "default"},
+}
 
 celery_app.conf.beat_schedule = {
     "train-recommender-daily": {
         "task": "app.tasks.recommender.train_recommender",
         "schedule": 86400.0,  # every 24h
     },
+    "train-recommender-incremental": {
+        "task": "app.tasks.recommender.train_recommender_incremental",
+        "schedule": RECOMMENDER_INCREMENTAL_SECONDS,
+    },
+    "refresh-popularity": {
+        "task": "app.tasks.popularity.refresh_popularity",
+        "schedule": POPULARITY_REFRESH_SECONDS,
+    },
+    "maintain-interaction-partitions": {
+        "task": "app.tasks.interactions.maintain_partitions",
+        "schedule": 86400.0,
+    },
+    "roll-up-interactions": {
+        "task": "app.tasks.interactions.roll_up_interactions",
+        "schedule": 86400.0,
+    },
+    # rolls up each expired partition itself before dropping it
+    "prune-interactions": {
+        "task": "app.tasks.interactions.prune_interactions",
+        "schedule": 86400.0,
+    },
 }
 
 
@@ -6,7 +6,7 @@ from sqlmodel import select, Session
 
 from app.models.models import User
 from app.schemas.schemas import UserCreate
-from app.auth import hash_password
+from app.auth import ahash_password
 
 
 # def _hash_password(password: str) -> str:
@@ -18,7 +18,7 @@ async def create_user(db: Session, user: UserCreate = None) -> Optional[User]:
     # create new user
     user = User(
         email=user.email,
-        password_hash=hash_password(user.password),
+        password_hash=await ahash_password(user.password),
         role=user.role,
         phone=user.phone,
         firstname=user.firstname,
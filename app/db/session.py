@@ -1,6 +1,8 @@
 # app/db/session.py
+import asyncio
 import os
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Awaitable, Callable, TypeVar
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel
@@ -30,6 +32,8 @@ async_session_maker = sessionmaker(
 async def init_db():
     """Initialize database tables."""
     async with async_engine.begin() as conn:
+        # embedding columns use the pgvector `vector` type
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
         await conn.run_sync(SQLModel.metadata.create_all)
 
 
@@ -53,3 +57,23 @@ async def create_db_and_tables():
     except Exception as e:
         print(f"Error creating tables: {e}")
         raise
+
+
+T = TypeVar("T")
+
+
+def run_async(fn: Callable[[AsyncSession], Awaitable[T]]) -> T:
+    """Run `fn(session)` to completion from sync code (e.g. a Celery task).
+
+    Each call gets its own event loop, so pooled connections are disposed
+    afterwards rather than reused across loops.
+    """
+
+    async def runner():
+        try:
+            async with async_session_maker() as session:
+                return await fn(session)
+        finally:
+            await async_engine.dispose()
+
+    return asyncio.run(runner())
@@ -1,3 +1,5 @@
+from dataclasses import dataclass
+from typing import Optional
 from uuid import UUID as UUID_TYPE
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
@@ -6,18 +8,25 @@ from sqlalchemy import select
 from app.db.session import get_db
 from app.auth import decode_token
 from app.models.models import User
+from app.services.user_cache import user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
-) -> User:
+@dataclass(frozen=True)
+class Principal:
+    """The caller as described by their access token."""
+
+    id: UUID_TYPE
+    role: Optional[str]
+    is_verified: bool = False
+
+
+async def _token_user_id(payload: dict) -> UUID_TYPE:
     """
-    Decode token and return User instance.
+    Validate the decoded token and return its subject.
     Expects `sub` in token payload to be a UUID string.
     """
-    payload = decode_token(token)
     sub = payload.get("sub")
     if not sub:
         raise HTTPException(status_code=401, detail="Invalid token (missing sub)")
@@ -29,17 +38,55 @@ async def get_current_user(
             status_code=401, detail="Invalid token subject; expected UUID"
         )
 
+    if await user_cache.is_revoked(user_id, payload.get("iat")):
+        raise HTTPException(status_code=401, detail="Token revoked")
+    return user_id
+
+
+async def _load_user(user_id: UUID_TYPE, db: AsyncSession) -> User:
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+
     stmt = select(User).where(User.id == user_id)
     result = await db.execute(stmt)
     user = result.scalars().first()
 
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
+    user_cache.put(user)
     return user
 
 
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+) -> User:
+    """
+    Decode token and return User instance.
+    Users are cached for USER_CACHE_TTL seconds; treat them as read-only.
+    """
+    payload = decode_token(token)
+    return await _load_user(await _token_user_id(payload), db)
+
+
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+) -> Principal:
+    """
+    Resolve the caller from the token's claims without a database query.
+    Tokens issued without claims fall back to loading the user.
+    """
+    payload = decode_token(token)
+    user_id = await _token_user_id(payload)
+    if "role" in payload:
+        return Principal(user_id, payload["role"], bool(payload.get("verified")))
+
+    user = await _load_user(user_id, db)
+    return Principal(user.id, user.role, bool(user.is_verified))
+
+
 def require_role(role: str):
-    async def inner(user: User = Depends(get_current_user)):
+    async def inner(user: Principal = Depends(get_current_principal)):
         if not getattr(user, "role", None):
             raise HTTPException(status_code=403, detail="User role not assigned")
         if user.role != role:
@@ -1,29 +1,118 @@
-from fastapi import FastAPI
+import asyncio
+import os
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 from app.api.v1.routers import auth
 from app.api.v1.routers import search
-from app.db.session import create_db_and_tables
+from app.db.session import create_db_and_tables, async_session_maker
 from app.api.v1.routers import hostels
 from app.api.v1.routers.interactions import router as interactions_router
 from app.api.v1.routers import recommend
+from app.services.embeddings import (
+    EMBEDDING_PRELOAD,
+    EmbeddingBusy,
+    embedding_service,
+    query_cache,
+)
+from app.services.interaction_buffer import interaction_buffer
+from app.services.password_hasher import PasswordHasherBusy, password_hasher
+from app.services.user_cache import user_cache
+from app.services.vector_index import (
+    VECTOR_BACKEND,
+    vector_index,
+    load_vector_index,
+    refresh_vector_index,
+)
+
+# How often each worker picks up listings added through other workers
+VECTOR_INDEX_REFRESH_SECONDS = int(os.getenv("VECTOR_INDEX_REFRESH_SECONDS", "60"))
 
 
 app = FastAPI()
 
 
+def _preload_embedding_model():
+    try:
+        embedding_service.load()
+        print("Embedding model loaded")
+    except Exception as e:
+        print(f"Embedding model failed to load: {e}")
+
+
+async def _refresh_vector_index_periodically(interval: int):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with async_session_maker() as session:
+                await refresh_vector_index(session)
+        except Exception as e:
+            print(f"Vector index refresh failed: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # startup code
     print("Xenyou Server is starting up...")
     await create_db_and_tables()
+
+    if EMBEDDING_PRELOAD:
+        # Warm the model off the event loop so auth traffic is served meanwhile;
+        # embedding calls made before it is resident wait on the load.
+        asyncio.get_running_loop().run_in_executor(None, _preload_embedding_model)
+
+    use_memory_index = VECTOR_BACKEND == "memory"
+    if use_memory_index:
+        try:
+            async with async_session_maker() as session:
+                size = await load_vector_index(session)
+            print(f"Vector index loaded with {size} properties")
+        except Exception as e:
+            # search falls back to a table scan until the index is ready
+            print(f"Vector index not loaded: {e}")
+
+    # Pick up the newest trained recommender model, if one was published
+    recommend.recommender.maybe_reload(force=True)
+
+    # Interaction events are acknowledged at once and written in batches
+    interaction_buffer.start()
+
+    refresher = None
+    if use_memory_index and VECTOR_INDEX_REFRESH_SECONDS > 0:
+        refresher = asyncio.create_task(
+            _refresh_vector_index_periodically(VECTOR_INDEX_REFRESH_SECONDS)
+        )
     yield
     # shutdown code
+    if refresher:
+        refresher.cancel()
+    # write out buffered interactions before the process exits
+    await interaction_buffer.stop()
+    await embedding_service.batcher.stop()
+    embedding_service.shutdown()
+    password_hasher.shutdown()
     print("Xenyou Server is shutting down...")
 
 
 app = FastAPI(lifespan=lifespan)
 
 
+@app.exception_handler(EmbeddingBusy)
+async def embedding_busy(request: Request, exc: EmbeddingBusy):
+    # back-pressure from the embedding service: ask the client to retry
+    return JSONResponse(
+        status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"}
+    )
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy(request: Request, exc: PasswordHasherBusy):
+    # too many logins queued on the bcrypt pool: ask the client to retry
+    return JSONResponse(
+        status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"}
+    )
+
+
 # create tables at startup (dev convenience)
 # @app.on_event("startup")
 # def on_startup():
@@ -41,3 +130,27 @@ app.include_router(recommend.router, prefix="/api/v1/recommend", tags=["recommen
 @app.get("/")
 def root():
     return {"message": "Welcome To XenYou! 🚀"}
+
+
+@app.get("/health")
+def health():
+    """Liveness plus readiness of the lazily-loaded components."""
+    return {
+        "status": "ok",
+        "embedding_model": embedding_service.state,
+        "vector_index": "ready" if vector_index.ready else "not_loaded",
+    }
+
+
+@app.get("/metrics")
+def metrics():
+    """In-process counters for monitoring this worker."""
+    return {
+        "query_embedding_cache": query_cache.stats(),
+        "embedding_service": embedding_service.stats(),
+        "embedding_batcher": embedding_service.batcher.stats(),
+        "interaction_buffer": interaction_buffer.stats(),
+        "user_cache": user_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "vector_index": vector_index.stats(),
+    }
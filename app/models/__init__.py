@@ -15,7 +15,10 @@ from .models import (
     PropertyFeature,
     PropertyImage,
     InteractionEvent,
+    InteractionDaily,
     Recommendation,
+    IdRegistry,
+    PropertyPopularity,
     SavedProperty,
     Match,
 )
@@ -33,7 +36,10 @@ __all__ = [
     "PropertyFeature",
     "PropertyImage",
     "InteractionEvent",
+    "InteractionDaily",
     "Recommendation",
+    "IdRegistry",
+    "PropertyPopularity",
     "SavedProperty",
     "Match",
     "Hostel",
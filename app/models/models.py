@@ -1,13 +1,17 @@
 # app/models.py
 
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import JSON
+from sqlalchemy import JSON, Index, LargeBinary, UniqueConstraint
+from pgvector.sqlalchemy import Vector
 from typing import Optional, List
 from uuid import UUID, uuid4
-from datetime import datetime
+from datetime import date, datetime
 
 from app.schemas.schemas import StudentProfile
 
+# Output size of the all-MiniLM-L6-v2 sentence embedding model
+EMBEDDING_DIM = 384
+
 
 # ===================
 # Core Identity
@@ -77,6 +81,9 @@ class StudentProfile(SQLModel, table=True):
     student_id: str = Field(unique=True, nullable=False)
 
     embedding_vector: Optional[list] = Field(default=None, sa_type=JSON)
+    embedding: Optional[list] = Field(default=None, sa_type=Vector(EMBEDDING_DIM))
+    # unit-length little-endian float32 bytes, decoded with np.frombuffer
+    embedding_f32: Optional[bytes] = Field(default=None, sa_type=LargeBinary)
     created_at: Optional[datetime] = Field(default_factory=datetime.now)
     verification: Optional["StudentVerification"] = Relationship(
         back_populates="student", cascade_delete=True
@@ -256,6 +263,9 @@ class PropertyFeature(SQLModel, table=True):
     rating_score: Optional[float] = None
 
     embedding_vector: Optional[list] = Field(default=None, sa_type=JSON)
+    embedding: Optional[list] = Field(default=None, sa_type=Vector(EMBEDDING_DIM))
+    # unit-length little-endian float32 bytes, decoded with np.frombuffer
+    embedding_f32: Optional[bytes] = Field(default=None, sa_type=LargeBinary)
 
     property: Optional["Property"] = Relationship(
         back_populates="features", cascade_delete=True
@@ -327,6 +337,10 @@ class SearchQuery(SQLModel, table=True):
 # ===================
 class Recommendation(SQLModel, table=True):
     __tablename__ = "recommendations"
+    # precomputed top-N per student, read back in rank order
+    __table_args__ = (
+        Index("ix_recommendations_user_rank", "user_id", "rank_position"),
+    )
 
     id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True)
     user_id: UUID = Field(foreign_key="users.id")
@@ -345,18 +359,64 @@ class Recommendation(SQLModel, table=True):
     )
 
 
+# ===================
+# Property popularity (periodic aggregate per time window)
+# ===================
+class PropertyPopularity(SQLModel, table=True):
+    __tablename__ = "property_popularity"
+    __table_args__ = (
+        Index("ix_property_popularity_rank", "time_window", "segment", "score"),
+    )
+
+    time_window: str = Field(primary_key=True)  # "24h" | "7d" | "30d"
+    # "" for everyone, otherwise a lower-cased university name
+    segment: str = Field(default="", primary_key=True)
+    property_id: UUID = Field(foreign_key="properties.id", primary_key=True)
+
+    score: float = Field(default=0.0)  # distinct students who interacted
+    updated_at: Optional[datetime] = Field(default_factory=datetime.now)
+
+
+# ===================
+# Recommender id registry (UUID <-> model row/column index)
+# ===================
+class IdRegistry(SQLModel, table=True):
+    __tablename__ = "id_registry"
+    # append-only: an entity keeps its index for as long as the model lives
+    __table_args__ = (UniqueConstraint("kind", "idx", name="uq_id_registry_kind_idx"),)
+
+    kind: str = Field(primary_key=True)  # "student" | "property"
+    entity_id: UUID = Field(primary_key=True)
+    idx: int = Field(nullable=False)
+
+    created_at: Optional[datetime] = Field(default_factory=datetime.now)
+
+
 # ===================
 # Interaction events (view/click/save/skip)
 # ===================
 class InteractionEvent(SQLModel, table=True):
     __tablename__ = "interaction_events"
+    # Range-partitioned by month on created_at (migration 011), which is why
+    # it is part of the primary key
+    __table_args__ = (
+        Index("ix_interaction_events_user_created", "user_id", "created_at"),
+        Index("ix_interaction_events_property_created", "property_id", "created_at"),
+        # covers the popularity windows (distinct students per listing)
+        Index(
+            "ix_interaction_events_created",
+            "created_at",
+            "property_id",
+            "user_id",
+        ),
+    )
 
     id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True)
     user_id: UUID = Field(foreign_key="users.id")
     property_id: UUID = Field(foreign_key="properties.id")
 
     event_type: Optional[str] = None
-    created_at: Optional[datetime] = Field(default_factory=datetime.now)
+    created_at: datetime = Field(default_factory=datetime.now, primary_key=True)
 
     user: Optional["User"] = Relationship(
         back_populates="interactions", cascade_delete=True
@@ -366,6 +426,22 @@ class InteractionEvent(SQLModel, table=True):
     )
 
 
+# ===================
+# Daily interaction rollup (kept after raw partitions are dropped)
+# ===================
+class InteractionDaily(SQLModel, table=True):
+    __tablename__ = "interaction_daily"
+    __table_args__ = (
+        Index("ix_interaction_daily_property_day", "property_id", "day"),
+    )
+
+    day: date = Field(primary_key=True)
+    user_id: UUID = Field(foreign_key="users.id", primary_key=True)
+    property_id: UUID = Field(foreign_key="properties.id", primary_key=True)
+    event_type: str = Field(default="", primary_key=True)  # "" when unset
+    count: int = Field(default=0)
+
+
 # ===================
 # Saved properties
 # ===================
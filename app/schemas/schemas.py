@@ -1,5 +1,5 @@
 # app/schemas.py
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List, Any
 from uuid import UUID
 
@@ -45,6 +45,31 @@ class PropertyCreate(BaseModel):
     is_available: Optional[bool] = True
 
 
+class PropertyImportRow(BaseModel):
+    """One listing in a bulk import file (JSONL object or CSV row)."""
+
+    title: str
+    landlord_id: Optional[UUID] = None
+    description: Optional[str] = None
+    location_text: Optional[str] = None
+    price: float
+    type: Optional[str] = "hostel"
+    is_available: Optional[bool] = True
+
+
+class BulkImportError(BaseModel):
+    row: int
+    title: Optional[str] = None
+    error: str
+
+
+class BulkImportResponse(BaseModel):
+    created: int
+    failed: int
+    ids: List[UUID] = []
+    errors: List[BulkImportError] = []
+
+
 class ChatMessageIn(BaseModel):
     session_id: Optional[int]
     text: str
@@ -71,6 +96,8 @@ class StudentProfile(BaseModel):
 class SearchRequest(BaseModel):
     query: str
     max_price: Optional[float] = None
+    limit: int = Field(default=20, ge=1, le=100)
+    offset: int = Field(default=0, ge=0)
 
 
 class SearchResult(BaseModel):
@@ -110,6 +137,19 @@ class InteractionResponse(BaseModel):
     interaction: InteractionData
 
 
+class InteractionBatchItem(BaseModel):
+    index: int
+    property_id: UUID
+    status: str  # 'logged'|'rejected'
+    error: Optional[str] = None
+
+
+class InteractionBatchResponse(BaseModel):
+    logged: int
+    rejected: int
+    results: List[InteractionBatchItem] = []
+
+
 # -----------------
 # Recommendation schemas
 # -----------------
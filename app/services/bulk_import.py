@@ -0,0 +1,230 @@
+# Bulk listing import → onboard many properties at once from JSONL/CSV with one
+# uniqueness query, batched embeddings and chunked multi-row inserts.
+#
+# CLI: python -m app.services.bulk_import listings.csv --landlord-id <uuid>
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import Awaitable, Callable, Iterable, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import LandlordProfile, Property, PropertyFeature
+from app.schemas.schemas import PropertyImportRow
+from app.services.embedding_store import embedding_columns
+
+# Rows written (and committed) per transaction
+BULK_IMPORT_CHUNK_SIZE = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", "500"))
+BULK_IMPORT_MAX_ROWS = int(os.getenv("BULK_IMPORT_MAX_ROWS", "10000"))
+
+EmbedMany = Callable[[List[str]], Awaitable[List[list]]]
+
+
+def parse_listings(data: str, fmt: str) -> Iterable[Tuple[int, Optional[dict], str]]:
+    """Yield (row number, record, parse error) for each listing in `data`."""
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(data))
+        for row_no, row in enumerate(reader, start=1):
+            # blank cells fall back to the schema defaults
+            record = {k: v for k, v in row.items() if k and v not in ("", None)}
+            yield row_no, record, ""
+        return
+
+    row_no = 0
+    for line in data.splitlines():
+        if not line.strip():
+            continue
+        row_no += 1
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_no, None, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(record, dict):
+            yield row_no, None, "Each line must be a JSON object"
+            continue
+        yield row_no, record, ""
+
+
+def _validate(records, default_landlord_id: Optional[UUID], force_landlord: bool):
+    rows, errors = [], []
+    for row_no, record, parse_error in records:
+        if parse_error:
+            errors.append({"row": row_no, "error": parse_error})
+            continue
+        try:
+            item = PropertyImportRow(**record)
+        except ValidationError as e:
+            errors.append(
+                {"row": row_no, "title": record.get("title"), "error": str(e)}
+            )
+            continue
+        if force_landlord or item.landlord_id is None:
+            item.landlord_id = default_landlord_id
+        if item.landlord_id is None:
+            errors.append(
+                {"row": row_no, "title": item.title, "error": "landlord_id is required"}
+            )
+            continue
+        rows.append((row_no, item))
+    return rows, errors
+
+
+async def _insert_one_by_one(session, chunk, property_rows, feature_rows, errors):
+    """Retry a failed chunk row by row, so one bad row only fails itself."""
+    written = []
+    for (row_no, item), prop, feature in zip(chunk, property_rows, feature_rows):
+        try:
+            async with session.begin_nested():
+                await session.execute(insert(Property), [prop])
+                await session.execute(insert(PropertyFeature), [feature])
+        except DBAPIError as err:
+            reason = f"Could not add property: {err.orig}"
+            errors.append({"row": row_no, "title": item.title, "error": reason})
+            continue
+        written.append((prop, feature))
+    await session.commit()
+    return written
+
+
+async def import_listings(
+    session: AsyncSession,
+    records,
+    embed_many: EmbedMany,
+    landlord_id: Optional[UUID] = None,
+    force_landlord: bool = False,
+    chunk_size: int = BULK_IMPORT_CHUNK_SIZE,
+) -> dict:
+    """Validate, embed and insert listings, reporting failures per row.
+
+    `landlord_id` fills rows that don't name one; with `force_landlord` it
+    overrides every row (a landlord importing their own listings).
+    """
+    rows, errors = _validate(records, landlord_id, force_landlord)
+
+    # Title uniqueness: within the file, then against the table in one query
+    seen, unique_rows = set(), []
+    for row_no, item in rows:
+        if item.title in seen:
+            errors.append(
+                {"row": row_no, "title": item.title, "error": "Duplicate title in file"}
+            )
+            continue
+        seen.add(item.title)
+        unique_rows.append((row_no, item))
+
+    existing = set()
+    if seen:
+        res = await session.execute(
+            select(Property.title).where(Property.title.in_(seen))
+        )
+        existing = set(res.scalars().all())
+    # Landlords must exist: one query instead of a foreign-key failure later
+    landlord_ids = {item.landlord_id for _, item in unique_rows}
+    landlords = set()
+    if landlord_ids:
+        res = await session.execute(
+            select(LandlordProfile.id).where(LandlordProfile.id.in_(landlord_ids))
+        )
+        landlords = set(res.scalars().all())
+    rows = []
+    for row_no, item in unique_rows:
+        if item.title in existing:
+            error = "Property with this name already exists"
+        elif item.landlord_id not in landlords:
+            error = "Landlord not found"
+        else:
+            rows.append((row_no, item))
+            continue
+        errors.append({"row": row_no, "title": item.title, "error": error})
+
+    created: List[Tuple[UUID, list]] = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start : start + chunk_size]
+        texts = [item.description or item.title for _, item in chunk]
+        embeddings = await embed_many(texts)
+
+        now = datetime.now()
+        property_rows, feature_rows = [], []
+        for (_, item), emb in zip(chunk, embeddings):
+            pid = uuid4()
+            property_rows.append(
+                {
+                    "id": pid,
+                    "landlord_id": item.landlord_id,
+                    "title": item.title,
+                    "description": item.description,
+                    "location_text": item.location_text,
+                    "price": item.price,
+                    "type": item.type,
+                    "is_available": item.is_available is not False,
+                    "created_at": now,
+                }
+            )
+            feature_rows.append(
+                {"id": uuid4(), "property_id": pid, **embedding_columns(emb)}
+            )
+
+        try:
+            await session.execute(insert(Property), property_rows)
+            await session.execute(insert(PropertyFeature), feature_rows)
+            await session.commit()
+            written = list(zip(property_rows, feature_rows))
+        except DBAPIError:
+            await session.rollback()
+            written = await _insert_one_by_one(
+                session, chunk, property_rows, feature_rows, errors
+            )
+        created.extend((r["id"], f["embedding"]) for r, f in written)
+
+    errors.sort(key=lambda e: e["row"])
+    return {
+        "created": len(created),
+        "failed": len(errors),
+        "ids": [pid for pid, _ in created],
+        "errors": errors,
+        "embeddings": created,
+    }
+
+
+async def _main(path: str, landlord_id: Optional[str], chunk_size: int):
+    from starlette.concurrency import run_in_threadpool
+
+    from app.db.session import async_session_maker
+    from app.services.embeddings import embedding_service
+
+    fmt = "csv" if path.lower().endswith(".csv") else "jsonl"
+    with open(path, encoding="utf-8") as fh:
+        records = parse_listings(fh.read(), fmt)
+
+    async def embed_many(texts):
+        return await run_in_threadpool(embedding_service.embed_many, texts)
+
+    async with async_session_maker() as session:
+        report = await import_listings(
+            session,
+            records,
+            embed_many,
+            landlord_id=UUID(landlord_id) if landlord_id else None,
+            chunk_size=chunk_size,
+        )
+    print(f"Created {report['created']} properties, {report['failed']} failed")
+    for err in report["errors"]:
+        print(f"  row {err['row']}: {err['error']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import property listings")
+    parser.add_argument("path", help="JSONL or CSV file (one listing per row)")
+    parser.add_argument("--landlord-id", help="Landlord profile for rows without one")
+    parser.add_argument("--chunk-size", type=int, default=BULK_IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+    asyncio.run(_main(args.path, args.landlord_id, args.chunk_size))
@@ -0,0 +1,199 @@
+# Candidate filter → which listings a student can actually take (available,
+# gender restriction, price within budget) as NumPy arrays aligned with an
+# item index, so every recommender strategy drops non-viable listings before
+# top-k instead of after the response is built.
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import Property
+
+# How long an API worker trusts its copy before re-reading the listings
+CANDIDATE_FILTER_REFRESH_SECONDS = float(
+    os.getenv("CANDIDATE_FILTER_REFRESH_SECONDS", "60")
+)
+
+# 0 means "no restriction" for listings and "unknown" for students
+GENDER_CODES = {"male": 1, "female": 2}
+
+
+def gender_code(value: Optional[str]) -> int:
+    return GENDER_CODES.get((value or "").strip().lower(), 0)
+
+
+def _number(value) -> float:
+    return np.nan if value is None else float(value)
+
+
+def student_constraints(student) -> Tuple[int, float, float]:
+    """(gender code, budget_min, budget_max) for a StudentProfile (or None)."""
+    if student is None:
+        return 0, np.nan, np.nan
+    return (
+        gender_code(student.gender),
+        _number(student.budget_min),
+        _number(student.budget_max),
+    )
+
+
+def viable_matrix(
+    user_gender: np.ndarray,
+    user_min: np.ndarray,
+    user_max: np.ndarray,
+    item_gender: np.ndarray,
+    item_price: np.ndarray,
+) -> np.ndarray:
+    """(users, items) boolean matrix of gender- and budget-compatible pairs.
+
+    Unknown values never exclude: a listing without a price or a student
+    without a budget matches everything on that axis.
+    """
+    ug, umin, umax = (np.asarray(a)[:, None] for a in (user_gender, user_min, user_max))
+    gender_ok = (item_gender == 0) | (ug == 0) | (item_gender == ug)
+    no_price = np.isnan(item_price)
+    with np.errstate(invalid="ignore"):
+        above_min = np.isnan(umin) | (item_price >= umin)
+        below_max = np.isnan(umax) | (item_price <= umax)
+    return gender_ok & (no_price | (above_min & below_max))
+
+
+def viable_clauses(student) -> list:
+    """`viable_matrix` plus availability as WHERE clauses over `Property`,
+    for queries that rank listings inside the database."""
+    g, lo, hi = student_constraints(student)
+    clauses = [Property.is_available == True]
+    if g:
+        restriction = func.lower(func.trim(Property.gender_restriction))
+        gender = next(name for name, code in GENDER_CODES.items() if code == g)
+        clauses.append(
+            or_(
+                Property.gender_restriction.is_(None),
+                restriction.not_in(list(GENDER_CODES)),
+                restriction == gender,
+            )
+        )
+    if not np.isnan(lo):
+        clauses.append(or_(Property.price.is_(None), Property.price >= lo))
+    if not np.isnan(hi):
+        clauses.append(or_(Property.price.is_(None), Property.price <= hi))
+    return clauses
+
+
+class CandidateFilter:
+    """Per-listing availability, gender restriction and price arrays."""
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.available = np.zeros(0, dtype=bool)
+        self.gender = np.zeros(0, dtype=np.int8)
+        self.price = np.zeros(0, dtype=np.float64)
+        self.generation = 0
+        self.loaded_at = float("-inf")
+        self._aligned: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.generation > 0
+
+    async def load(self, session: AsyncSession) -> int:
+        stmt = select(
+            Property.id,
+            Property.is_available,
+            Property.gender_restriction,
+            Property.price,
+        )
+        rows = (await session.execute(stmt)).all()
+        ids = [str(pid) for pid, _, _, _ in rows]
+        with self._lock:
+            self.ids = ids
+            self.positions = {pid: i for i, pid in enumerate(ids)}
+            self.available = np.fromiter((bool(r[1]) for r in rows), bool, len(rows))
+            self.gender = np.fromiter(
+                (gender_code(r[2]) for r in rows), np.int8, len(rows)
+            )
+            self.price = np.fromiter(
+                (_number(r[3]) for r in rows), np.float64, len(rows)
+            )
+            self._changed()
+        self.loaded_at = time.monotonic()
+        return len(ids)
+
+    async def ensure_fresh(self, session: AsyncSession) -> "CandidateFilter":
+        if time.monotonic() - self.loaded_at >= CANDIDATE_FILTER_REFRESH_SECONDS:
+            await self.load(session)
+        return self
+
+    def invalidate(self):
+        """Force a reload on the next `ensure_fresh` (e.g. after a bulk import)."""
+        self.loaded_at = float("-inf")
+
+    def update(self, pid, is_available=True, gender_restriction=None, price=None):
+        """Apply a listing change made by this process without a reload."""
+        pid = str(pid)
+        with self._lock:
+            pos = self.positions.get(pid)
+            if pos is None:
+                pos = self.positions[pid] = len(self.ids)
+                self.ids.append(pid)
+                self.available = np.append(self.available, False)
+                self.gender = np.append(self.gender, np.int8(0))
+                self.price = np.append(self.price, np.nan)
+            self.available[pos] = bool(is_available)
+            self.gender[pos] = gender_code(gender_restriction)
+            self.price[pos] = _number(price)
+            self._changed()
+
+    def _changed(self):
+        self.generation += 1
+        self._aligned = {}
+
+    def align(self, ids: Sequence[str], key: Optional[str] = None) -> np.ndarray:
+        """Filter positions of `ids` (-1 if unknown), cached under `key`."""
+        cache_key = f"{key}:{self.generation}" if key else None
+        if cache_key and cache_key in self._aligned:
+            return self._aligned[cache_key]
+        get = self.positions.get
+        pos = np.fromiter((get(str(i), -1) for i in ids), np.int64, len(ids))
+        if cache_key:
+            self._aligned[cache_key] = pos
+        return pos
+
+    def item_arrays(self, positions: np.ndarray):
+        """(available, gender, price) for `positions`; unknown ids unavailable."""
+        known = positions >= 0
+        safe = np.where(known, positions, 0)
+        if not len(self.ids):
+            n = len(positions)
+            return np.zeros(n, bool), np.zeros(n, np.int8), np.full(n, np.nan)
+        return (
+            known & self.available[safe],
+            self.gender[safe],
+            self.price[safe],
+        )
+
+    def mask(self, positions: np.ndarray, student=None) -> np.ndarray:
+        """Viable listings among `positions` for one student."""
+        available, gender, price = self.item_arrays(positions)
+        g, lo, hi = student_constraints(student)
+        return available & viable_matrix([g], [lo], [hi], gender, price)[0]
+
+    def viable(self, ids: Sequence[str], student=None, key: Optional[str] = None):
+        """Boolean mask over `ids`, for lists that aren't a model index."""
+        return self.mask(self.align(ids, key), student)
+
+    def filter_ids(self, ids: Iterable[str], student=None) -> List[str]:
+        ids = list(ids)
+        if not ids:
+            return ids
+        keep = self.viable(ids, student)
+        return [pid for pid, ok in zip(ids, keep.tolist()) if ok]
+
+
+candidate_filter = CandidateFilter()
@@ -0,0 +1,160 @@
+# Embedding micro-batcher → coalesces concurrent single-text embed calls into one
+# batched encode so the model runs at batch throughput under load.
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Optional
+
+
+class EmbeddingBatcher:
+    """Queue embed requests and encode them together.
+
+    The first request of a batch waits at most `max_wait_ms` for company;
+    a batch is dispatched early once it reaches `max_batch_size`. Up to
+    `max_concurrency` batches are encoded at once (one per encode worker);
+    requests arriving meanwhile queue up for the next batch. Each caller
+    awaits its own future and gets back its own vector.
+    """
+
+    def __init__(
+        self,
+        encode_many: Callable[[List[str]], Awaitable[List[list]]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_concurrency: int = 1,
+    ):
+        self.encode_many = encode_many
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_concurrency = max_concurrency
+        self.pending = 0  # queued + encoding, used for back-pressure
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight = set()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop = None
+
+        self.batches = 0
+        self.items = 0
+        self.max_batch_seen = 0
+        self.total_queue_delay = 0.0
+        self.max_queue_delay = 0.0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._worker = loop.create_task(self._run())
+
+    async def embed(self, text: str) -> list:
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((text, future, time.monotonic()))
+        self.pending += 1
+        try:
+            return await future
+        finally:
+            self.pending -= 1
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            # wait for a free encode slot before forming the batch, so the
+            # queue keeps filling while every worker is busy
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            task = self._loop.create_task(self._encode(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _encode(self, batch):
+        try:
+            started = time.monotonic()
+            # callers that gave up (e.g. client disconnect) don't need encoding
+            batch = [item for item in batch if not item[1].cancelled()]
+            if not batch:
+                return
+
+            for _, _, enqueued in batch:
+                delay = started - enqueued
+                self.total_queue_delay += delay
+                self.max_queue_delay = max(self.max_queue_delay, delay)
+            self.batches += 1
+            self.items += len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+
+            try:
+                vectors = await self.encode_many([text for text, _, _ in batch])
+            except asyncio.CancelledError:
+                self._fail(batch, RuntimeError("Embedding batcher stopped"))
+                raise
+            except Exception as e:
+                self._fail(batch, e)
+                return
+
+            for (_, future, _), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def _fail(batch, error: Exception):
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._worker = None
+        for task in list(self._in_flight):
+            task.cancel()
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        if self._queue is not None:
+            pending = []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            self._fail(pending, RuntimeError("Embedding batcher stopped"))
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "pending": self.pending,
+            "batches_in_flight": len(self._in_flight),
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "avg_queue_delay_ms": (
+                1000.0 * self.total_queue_delay / self.items if self.items else 0.0
+            ),
+            "max_queue_delay_ms": 1000.0 * self.max_queue_delay,
+        }
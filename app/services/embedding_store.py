@@ -0,0 +1,88 @@
+# Embedding storage → unit-length float32 vectors kept as raw bytes (bytea), so
+# reads decode with np.frombuffer instead of parsing JSON lists of floats.
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import EMBEDDING_DIM, PropertyFeature, StudentProfile
+
+# Little-endian float32, independent of the host byte order
+EMBEDDING_DTYPE = np.dtype("<f4")
+
+
+def normalize(vector) -> np.ndarray:
+    """L2-normalised float32 copy of `vector` (zero vectors stay zero)."""
+    vec = np.asarray(vector, dtype=EMBEDDING_DTYPE).reshape(-1)
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm > 0 else vec
+
+
+def encode_embedding(vector) -> bytes:
+    """Normalise and serialise an embedding for the `embedding_f32` columns."""
+    return normalize(vector).tobytes()
+
+
+def decode_embedding(blob: bytes) -> np.ndarray:
+    """Zero-copy, read-only view of a stored embedding."""
+    return np.frombuffer(blob, dtype=EMBEDDING_DTYPE)
+
+
+def decode_many(blobs: Sequence[bytes], dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Decode many stored embeddings into one contiguous (n, dim) matrix."""
+    if not blobs:
+        return np.empty((0, dim), dtype=EMBEDDING_DTYPE)
+    return np.frombuffer(b"".join(blobs), dtype=EMBEDDING_DTYPE).reshape(-1, dim)
+
+
+def embedding_columns(vector) -> dict:
+    """Column values for a freshly computed embedding.
+
+    The pgvector column gets the same normalised vector so inner product
+    and cosine rankings agree across backends.
+    """
+    vec = normalize(vector)
+    return {"embedding": vec, "embedding_f32": vec.tobytes()}
+
+
+async def _backfill_table(session: AsyncSession, model, batch_size: int) -> int:
+    done = 0
+    last_id = None
+    while True:
+        stmt = (
+            select(model.id, model.embedding_vector)
+            .where(
+                model.embedding_f32.is_(None),
+                model.embedding_vector.is_not(None),
+            )
+            .order_by(model.id)
+            .limit(batch_size)
+        )
+        if last_id is not None:
+            stmt = stmt.where(model.id > last_id)
+        rows = (await session.execute(stmt)).all()
+        if not rows:
+            return done
+
+        # ORM bulk UPDATE by primary key: one executemany per batch
+        params = [
+            {"id": row_id, **embedding_columns(vector)}
+            for row_id, vector in rows
+            if vector and len(vector) == EMBEDDING_DIM
+        ]
+        if params:
+            await session.execute(update(model), params)
+        await session.commit()
+        done += len(params)
+        last_id = rows[-1][0]
+
+
+async def backfill_embeddings(
+    session: AsyncSession, batch_size: int = 1000, models: Optional[Iterable] = None
+) -> dict:
+    """Fill `embedding_f32`/`embedding` from legacy JSON lists, in batches."""
+    counts = {}
+    for model in models or (PropertyFeature, StudentProfile):
+        counts[model.__tablename__] = await _backfill_table(session, model, batch_size)
+    return counts
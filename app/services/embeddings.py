@@ -1,9 +1,326 @@
-from sentence_transformers import SentenceTransformer
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from app.services.embedding_batcher import EmbeddingBatcher
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# "torch": sentence-transformers; "onnx": exported model under EMBEDDING_ONNX_PATH
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_ONNX_PATH = os.getenv("EMBEDDING_ONNX_PATH", "models/minilm-onnx")
+EMBEDDING_ONNX_QUANTIZED = os.getenv("EMBEDDING_ONNX_QUANTIZED", "1") == "1"
+# Load the model in the background at startup instead of on first use
+EMBEDDING_PRELOAD = os.getenv("EMBEDDING_PRELOAD", "1") == "1"
+# Coalesce concurrent embed calls into one encode (EMBEDDING_BATCH_SIZE=1 disables)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+# "thread": encode in the API process; "process": dedicated encode processes
+EMBEDDING_EXECUTOR = os.getenv("EMBEDDING_EXECUTOR", "thread")
+EMBEDDING_POOL_SIZE = int(os.getenv("EMBEDDING_POOL_SIZE", "2"))
+EMBEDDING_WORKER_THREADS = int(os.getenv("EMBEDDING_WORKER_THREADS", "1"))
+# Reject new embed calls (EmbeddingBusy) once this many are queued or encoding
+EMBEDDING_MAX_PENDING = int(os.getenv("EMBEDDING_MAX_PENDING", "256"))
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "4096"))
+QUERY_CACHE_TTL = int(os.getenv("QUERY_CACHE_TTL", "3600"))  # seconds
+# Share query embeddings across Uvicorn workers through Redis
+QUERY_CACHE_REDIS = os.getenv("QUERY_CACHE_REDIS", "0") == "1"
+REDIS = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Connect/read timeout (seconds) so an unreachable Redis can't stall imports or
+# searches; the cache just misses instead
+QUERY_CACHE_REDIS_TIMEOUT = float(os.getenv("QUERY_CACHE_REDIS_TIMEOUT", "0.25"))
+
+
+class EmbeddingBusy(RuntimeError):
+    """Too many embed calls are already waiting; the caller should retry.
+
+    The API maps it to 503 (see `app.main`).
+    """
+
+
+def normalize_query(text: str) -> str:
+    """Case- and whitespace-insensitive cache key for a search string."""
+    return " ".join(text.lower().split())
+
+
+class QueryEmbeddingCache:
+    """LRU + TTL cache of query embeddings, optionally backed by Redis."""
+
+    def __init__(self, maxsize: int, ttl: int, redis_client=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.redis = redis_client
+        self._entries = OrderedDict()  # key -> (expires_at, embedding)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _redis_key(key: str) -> str:
+        return "qemb:" + hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def _put_local(self, key: str, embedding: list):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get(self, text: str) -> Optional[list]:
+        key = normalize_query(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+        if self.redis is not None:
+            try:
+                raw = self.redis.get(self._redis_key(key))
+            except Exception:
+                raw = None
+            if raw:
+                embedding = np.frombuffer(raw, dtype=np.float32).tolist()
+                self._put_local(key, embedding)
+                with self._lock:
+                    self.redis_hits += 1
+                return embedding
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, text: str, embedding: list) -> None:
+        key = normalize_query(text)
+        self._put_local(key, embedding)
+        if self.redis is not None:
+            try:
+                blob = np.asarray(embedding, dtype=np.float32).tobytes()
+                self.redis.setex(self._redis_key(key), self.ttl, blob)
+            except Exception:
+                # Redis is an optimisation only; the local cache still works
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.redis_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.redis_hits) / lookups if lookups else 0.0,
+            }
+
+
+def _redis_client():
+    if not QUERY_CACHE_REDIS:
+        return None
+    try:
+        import redis
+
+        client = redis.from_url(
+            REDIS,
+            socket_connect_timeout=QUERY_CACHE_REDIS_TIMEOUT,
+            socket_timeout=QUERY_CACHE_REDIS_TIMEOUT,
+        )
+        client.ping()
+        return client
+    except Exception:
+        return None
+
+
+query_cache = QueryEmbeddingCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL, _redis_client())
+
+
+# Model owned by an encode worker process (EMBEDDING_EXECUTOR=process)
+_worker_model = None
+
+
+def _load_model(model_name: str, backend: str = EMBEDDING_BACKEND):
+    if backend == "onnx":
+        from app.services.onnx_embedder import OnnxEmbedder
+
+        return OnnxEmbedder(EMBEDDING_ONNX_PATH, quantized=EMBEDDING_ONNX_QUANTIZED)
+
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name)
+
+
+def _worker_init(model_name: str, num_threads: int):
+    global _worker_model
+    try:
+        import torch
+
+        # each worker is one core's worth of encode capacity
+        torch.set_num_threads(num_threads)
+    except Exception:
+        pass
+    _worker_model = _load_model(model_name)
+
+
+def _worker_encode(texts: List[str]) -> np.ndarray:
+    return _worker_model.encode(texts, batch_size=len(texts))
 
 
 class EmbeddingService:
-    def __init__(self):
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")
+    """Process-wide sentence embedding model, loaded on first use.
+
+    `state` moves from "not_loaded" to "loading" to "ready" (or "failed"),
+    so the API can boot and serve non-embedding traffic while the model is
+    still being read from disk. With `executor="process"` the model lives
+    only in a pool of encode worker processes, so encode bursts use their
+    own cores instead of the API worker's.
+    """
+
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL,
+        executor: str = EMBEDDING_EXECUTOR,
+        pool_size: int = EMBEDDING_POOL_SIZE,
+    ):
+        self.model_name = model_name
+        self.executor = executor
+        self.pool_size = pool_size
+        self.state = "not_loaded"
+        self.error: Optional[str] = None
+        # aembed calls queued or encoding, in every mode (back-pressure)
+        self.pending = 0
+        self.rejected = 0
+        self._model = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.batcher = EmbeddingBatcher(
+            self._encode_batch,
+            EMBEDDING_BATCH_SIZE,
+            EMBEDDING_BATCH_WAIT_MS,
+            max_concurrency=pool_size if executor == "process" else 1,
+        )
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    @property
+    def model(self):
+        if self._model is None:
+            self.load()
+        return self._model
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self.load()
+        return self._pool
+
+    def load(self):
+        """Load the model once; concurrent callers wait for the same load."""
+        with self._lock:
+            if self._model is not None or self._pool is not None:
+                return self._model
+            self.state = "loading"
+            try:
+                if self.executor == "process":
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.pool_size,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_worker_init,
+                        initargs=(self.model_name, EMBEDDING_WORKER_THREADS),
+                    )
+                    # block until a worker has the model resident
+                    self._pool.submit(_worker_encode, [""]).result()
+                else:
+                    self._model = _load_model(self.model_name)
+            except Exception as e:
+                self.state = "failed"
+                self.error = str(e)
+                raise
+            self.state = "ready"
+            self.error = None
+            return self._model
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self.state = "not_loaded"
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "pending": self.pending,
+            "max_pending": EMBEDDING_MAX_PENDING,
+            "rejected": self.rejected,
+        }
 
     def embed(self, text: str):
-        return self.model.encode(text).tolist()
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: List[str]) -> List[list]:
+        if self.executor == "process":
+            return self.pool.submit(_worker_encode, texts).result().tolist()
+        return self.model.encode(texts, batch_size=len(texts)).tolist()
+
+    async def _encode_batch(self, texts: List[str]) -> List[list]:
+        if self.executor == "process":
+            pool = self._pool or await run_in_threadpool(lambda: self.pool)
+            loop = asyncio.get_running_loop()
+            vectors = await loop.run_in_executor(pool, _worker_encode, texts)
+            return vectors.tolist()
+        return await run_in_threadpool(self.embed_many, texts)
+
+    async def aembed(self, text: str):
+        """Embed from async code without blocking the event loop.
+
+        Concurrent calls are micro-batched into a single encode. Raises
+        EmbeddingBusy when EMBEDDING_MAX_PENDING calls are already waiting.
+        """
+        if self.pending >= EMBEDDING_MAX_PENDING:
+            self.rejected += 1
+            raise EmbeddingBusy("Embedding service busy, please retry")
+        self.pending += 1
+        try:
+            if self.batcher.max_batch_size <= 1 and self.executor != "process":
+                return await run_in_threadpool(self.embed, text)
+            return await self.batcher.embed(text)
+        finally:
+            self.pending -= 1
+
+    def embed_query(self, text: str):
+        """Embed a search string, reusing the embedding of repeated queries."""
+        embedding = query_cache.get(text)
+        if embedding is None:
+            embedding = self.embed(normalize_query(text))
+            query_cache.set(text, embedding)
+        return embedding
+
+    async def aembed_query(self, text: str):
+        """Async `embed_query`; cache misses go through the micro-batcher."""
+        if query_cache.redis is None:
+            embedding = query_cache.get(text)
+        else:
+            embedding = await run_in_threadpool(query_cache.get, text)
+        if embedding is None:
+            embedding = await self.aembed(normalize_query(text))
+            if query_cache.redis is None:
+                query_cache.set(text, embedding)
+            else:
+                await run_in_threadpool(query_cache.set, text, embedding)
+        return embedding
+
+
+# Shared by every router and task in the process
+embedding_service = EmbeddingService()
@@ -0,0 +1,188 @@
+# Feature matrices → sparse user/item features for the hybrid LightFM model.
+#
+# Columns are a fixed block of hashed attribute buckets followed by one
+# identity column per registered entity:
+#   [ attribute buckets (RECOMMENDER_FEATURE_BUCKETS) | identity (n entities) ]
+# Putting the fixed-size block first means newly registered students and
+# listings only append rows to the model's feature embeddings, which keeps
+# incremental training (see `grow_model`) a pure resize.
+import os
+import re
+import zlib
+from itertools import chain
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import IdRegistry, Property, PropertyFeature, StudentProfile
+from app.services.id_registry import PROPERTY, STUDENT
+
+RECOMMENDER_FEATURE_BUCKETS = int(os.getenv("RECOMMENDER_FEATURE_BUCKETS", "512"))
+# Upper edges of the price/budget buckets
+RECOMMENDER_PRICE_EDGES = np.array(
+    [
+        float(edge)
+        for edge in os.getenv(
+            "RECOMMENDER_PRICE_EDGES",
+            "50000,100000,150000,200000,300000,500000,1000000",
+        ).split(",")
+    ]
+)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _words(text: Optional[str]) -> List[str]:
+    return _WORD.findall(text.lower()) if text else []
+
+
+def _keys(value) -> List[str]:
+    """Enabled amenity names from a JSON dict ({"wifi": true}) or list."""
+    if isinstance(value, dict):
+        return [str(k) for k, v in value.items() if v]
+    if isinstance(value, (list, tuple)):
+        return [str(v) for v in value]
+    return []
+
+
+class FeatureBuilder:
+    """Collects (row, hashed column) pairs, then emits a normalised CSR matrix."""
+
+    def __init__(self, n: int, buckets: int = RECOMMENDER_FEATURE_BUCKETS):
+        self.n = n
+        self.buckets = buckets
+        self._rows: List[np.ndarray] = []
+        self._cols: List[np.ndarray] = []
+
+    def add(self, rows: Sequence[int], values: Sequence, prefix: str):
+        """One `prefix=value` feature per (row, value); empty values skipped."""
+        values = np.asarray(values, dtype=object)
+        keep = np.fromiter((v not in (None, "") for v in values), bool, len(values))
+        if not keep.any():
+            return
+        names = np.char.lower(values[keep].astype(str))
+        # hash each distinct value once, then scatter with the inverse index
+        uniq, inverse = np.unique(names, return_inverse=True)
+        hashed = np.fromiter(
+            (zlib.crc32(f"{prefix}={u}".encode()) % self.buckets for u in uniq),
+            np.int32,
+            len(uniq),
+        )
+        self._rows.append(np.asarray(rows, dtype=np.int32)[keep])
+        self._cols.append(hashed[inverse.reshape(-1)])
+
+    def add_lists(self, rows: Sequence[int], lists: Iterable[List], prefix: str):
+        """Like `add`, for a list of values per row (tokens, amenities)."""
+        lists = list(lists)
+        lengths = np.fromiter((len(x) for x in lists), np.int64, len(lists))
+        flat = list(chain.from_iterable(lists))
+        self.add(np.repeat(np.asarray(rows, dtype=np.int32), lengths), flat, prefix)
+
+    def add_buckets(
+        self, rows: Sequence[int], numbers: Sequence, prefix: str, edges=None
+    ):
+        """Bucket numeric values (price, budget) by `edges`."""
+        edges = RECOMMENDER_PRICE_EDGES if edges is None else edges
+        values = np.array(
+            [np.nan if v is None else v for v in numbers], dtype=np.float64
+        )
+        keep = ~np.isnan(values)
+        bins = np.digitize(values[keep], edges)
+        self.add(np.asarray(rows, dtype=np.int32)[keep], bins, prefix)
+
+    def build(self) -> csr_matrix:
+        identity = np.arange(self.n, dtype=np.int32)
+        rows = np.concatenate(self._rows + [identity])
+        cols = np.concatenate(self._cols + [identity + self.buckets])
+        mat = coo_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(self.n, self.buckets + self.n),
+        ).tocsr()
+        mat.sum_duplicates()
+        # row-normalise, as lightfm.data.Dataset does by default
+        sums = np.asarray(mat.sum(axis=1)).ravel()
+        mat.data /= np.repeat(sums, np.diff(mat.indptr)).astype(np.float32)
+        return mat
+
+
+def _columns(rows: Sequence[Tuple], width: int) -> List[Tuple]:
+    return list(zip(*rows)) if rows else [()] * width
+
+
+async def item_features(
+    session: AsyncSession, n_items: int, buckets: int = RECOMMENDER_FEATURE_BUCKETS
+) -> csr_matrix:
+    """Listing features, one row per registry index."""
+    stmt = (
+        select(
+            IdRegistry.idx,
+            Property.price,
+            Property.type,
+            Property.gender_restriction,
+            Property.location_text,
+            Property.rent_duration,
+            PropertyFeature.furnishing_level,
+            PropertyFeature.amenities,
+        )
+        .select_from(IdRegistry)
+        .join(
+            Property,
+            (IdRegistry.kind == PROPERTY) & (IdRegistry.entity_id == Property.id),
+        )
+        .outerjoin(PropertyFeature, PropertyFeature.property_id == Property.id)
+    )
+    rows = (await session.execute(stmt)).all()
+    idx, price, kind, gender, location, duration, furnishing, amenities = _columns(
+        rows, 8
+    )
+
+    builder = FeatureBuilder(n_items, buckets)
+    builder.add_buckets(idx, price, "price")
+    builder.add(idx, kind, "type")
+    builder.add(idx, gender, "gender")
+    builder.add(idx, duration, "duration")
+    builder.add(idx, furnishing, "furnishing")
+    builder.add_lists(idx, map(_words, location), "location")
+    builder.add_lists(idx, map(_keys, amenities), "amenity")
+    return builder.build()
+
+
+async def user_features(
+    session: AsyncSession, n_users: int, buckets: int = RECOMMENDER_FEATURE_BUCKETS
+) -> csr_matrix:
+    """Student features, one row per registry index."""
+    stmt = (
+        select(
+            IdRegistry.idx,
+            StudentProfile.budget_min,
+            StudentProfile.budget_max,
+            StudentProfile.gender,
+            StudentProfile.university,
+            StudentProfile.preferred_room_type,
+            StudentProfile.preferred_location,
+            StudentProfile.preferred_amenities,
+        )
+        .select_from(IdRegistry)
+        .join(
+            StudentProfile,
+            (IdRegistry.kind == STUDENT)
+            & (IdRegistry.entity_id == StudentProfile.user_id),
+        )
+    )
+    rows = (await session.execute(stmt)).all()
+    idx, budget_min, budget_max, gender, university, room, location, amenities = (
+        _columns(rows, 8)
+    )
+
+    builder = FeatureBuilder(n_users, buckets)
+    builder.add_buckets(idx, budget_min, "budget_min")
+    builder.add_buckets(idx, budget_max, "budget_max")
+    builder.add(idx, gender, "gender")
+    builder.add(idx, university, "university")
+    builder.add(idx, room, "type")
+    builder.add_lists(idx, map(_words, location), "location")
+    builder.add_lists(idx, map(_keys, amenities), "amenity")
+    return builder.build()
@@ -0,0 +1,63 @@
+# Id registry → stable, append-only UUID <-> index mapping shared by the
+# recommender trainer and the published model artifacts.
+#
+# Indices are dense per kind (0..n-1) and never reused, so a trained model
+# stays valid as students and listings are added; new entities simply get
+# the next free rows/columns.
+from typing import List
+
+from sqlalchemy import exists, func, insert, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import IdRegistry, Property, StudentProfile
+
+STUDENT = "student"
+PROPERTY = "property"
+
+# kind -> (entity id column, ordering column for newly registered ids)
+SOURCES = {
+    STUDENT: (StudentProfile.user_id, StudentProfile.created_at),
+    PROPERTY: (Property.id, Property.created_at),
+}
+
+
+async def sync_registry(session: AsyncSession) -> dict:
+    """Give every unregistered student/property the next free index.
+
+    One INSERT ... SELECT per kind; nothing is loaded into Python. The
+    table lock serialises concurrent syncs so index assignment can't race.
+    """
+    await session.execute(text("LOCK TABLE id_registry IN SHARE ROW EXCLUSIVE MODE"))
+    added = {}
+    for kind, (id_col, order_col) in SOURCES.items():
+        next_idx = (
+            select(func.coalesce(func.max(IdRegistry.idx), -1))
+            .where(IdRegistry.kind == kind)
+            .scalar_subquery()
+        )
+        new_rows = select(
+            literal(kind),
+            id_col,
+            next_idx + func.row_number().over(order_by=(order_col, id_col)),
+            func.now(),
+        ).where(
+            ~exists().where(IdRegistry.kind == kind, IdRegistry.entity_id == id_col)
+        )
+        result = await session.execute(
+            insert(IdRegistry).from_select(
+                ["kind", "entity_id", "idx", "created_at"], new_rows
+            )
+        )
+        added[kind] = result.rowcount
+    await session.commit()
+    return added
+
+
+async def registry_ids(session: AsyncSession, kind: str) -> List[str]:
+    """Registered ids of `kind`; list position == model index."""
+    result = await session.execute(
+        select(IdRegistry.entity_id)
+        .where(IdRegistry.kind == kind)
+        .order_by(IdRegistry.idx)
+    )
+    return [str(eid) for eid in result.scalars().all()]
@@ -0,0 +1,227 @@
+# Interaction buffer → acknowledges interaction events immediately and writes
+# them in multi-row INSERTs, flushed when a batch fills up or ages out.
+#
+# Delivery is at-least-once: a failed flush is retried, and the lifespan hook
+# drains the queue on graceful shutdown. Event ids are generated up front and
+# conflicting ids are skipped, so a retried batch never double-counts.
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+
+from app.db.session import async_session_maker
+from app.models.models import InteractionEvent
+
+# Flush once this many events are waiting...
+INTERACTION_FLUSH_SIZE = int(os.getenv("INTERACTION_FLUSH_SIZE", "500"))
+# ...or once the oldest waiting event is this old
+INTERACTION_FLUSH_MS = float(os.getenv("INTERACTION_FLUSH_MS", "1000"))
+# Events held in memory before callers wait for a flush (back-pressure)
+INTERACTION_BUFFER_MAX = int(os.getenv("INTERACTION_BUFFER_MAX", "100000"))
+# Longest pause between retries while the database is unreachable
+INTERACTION_RETRY_MAX_SECONDS = float(os.getenv("INTERACTION_RETRY_MAX_SECONDS", "30"))
+
+
+def _uuid(value) -> UUID:
+    return value if isinstance(value, UUID) else UUID(str(value))
+
+
+def interaction_row(user_id, property_id, event_type: Optional[str]) -> dict:
+    return {
+        "id": uuid4(),
+        "user_id": _uuid(user_id),
+        "property_id": _uuid(property_id),
+        "event_type": event_type,
+        # stamped at request time, not flush time
+        "created_at": datetime.now(),
+    }
+
+
+def interaction_insert():
+    """INSERT for interaction rows that skips ids already written."""
+    # the partitioned table's key includes created_at, which a retried
+    # row keeps from when it was logged
+    return insert(InteractionEvent.__table__).on_conflict_do_nothing(
+        index_elements=["id", "created_at"]
+    )
+
+
+async def write_interactions(rows: List[dict]) -> int:
+    """Insert `rows` in one statement; returns how many were accepted.
+
+    If the batch violates a foreign key (e.g. a listing deleted meanwhile),
+    rows are retried one by one so only the offending ones are dropped.
+    """
+    stmt = interaction_insert()
+    async with async_session_maker() as session:
+        try:
+            await session.execute(stmt, rows)
+            await session.commit()
+            return len(rows)
+        except IntegrityError:
+            await session.rollback()
+
+        written = 0
+        for row in rows:
+            try:
+                async with session.begin_nested():
+                    await session.execute(stmt, [row])
+                written += 1
+            except IntegrityError as err:
+                print(f"Dropped interaction {row['id']}: {err.orig}")
+        await session.commit()
+        return written
+
+
+class InteractionBuffer:
+    """Queue interaction rows and write them to the database in batches.
+
+    A batch is flushed once it has `flush_size` events or its first event
+    has waited `flush_ms`. Flushes run one at a time; events arriving
+    meanwhile queue up for the next batch. When the queue holds `max_size`
+    events, `log` waits for room instead of growing without bound.
+    """
+
+    def __init__(
+        self,
+        write_many: Callable[[List[dict]], Awaitable[int]] = write_interactions,
+        flush_size: int = INTERACTION_FLUSH_SIZE,
+        flush_ms: float = INTERACTION_FLUSH_MS,
+        max_size: int = INTERACTION_BUFFER_MAX,
+        retry_max_seconds: float = INTERACTION_RETRY_MAX_SECONDS,
+    ):
+        self.write_many = write_many
+        self.flush_size = flush_size
+        self.max_wait = flush_ms / 1000.0
+        self.max_size = max_size
+        self.retry_max_seconds = retry_max_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop = None
+        # batch taken off the queue but not yet written
+        self._batch: List[dict] = []
+
+        self.events = 0
+        self.written = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.max_batch_seen = 0
+        self.total_flush_time = 0.0
+        self.max_flush_time = 0.0
+        self.last_flush_at: Optional[float] = None
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue(self.max_size)
+            self._batch = []
+            self._worker = loop.create_task(self._run())
+
+    async def log(self, user_id, property_id, event_type: Optional[str]) -> dict:
+        """Queue one event and return its row without waiting for the write."""
+        self.start()
+        row = interaction_row(user_id, property_id, event_type)
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            await self._queue.put(row)
+        self.events += 1
+        return row
+
+    async def _collect(self) -> List[dict]:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.flush_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        delay = 0.5
+        while True:
+            if not self._batch:
+                self._batch = await self._collect()
+            if await self._flush(self._batch):
+                self._batch = []
+                delay = 0.5
+            else:
+                # keep the batch and try again; the queue absorbs new events
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.retry_max_seconds)
+
+    async def _flush(self, batch: List[dict]) -> bool:
+        started = time.monotonic()
+        try:
+            written = await self.write_many(batch)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.flush_errors += 1
+            print(f"Interaction flush of {len(batch)} events failed: {e}")
+            return False
+        elapsed = time.monotonic() - started
+        self.flushes += 1
+        self.written += written
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        self.total_flush_time += elapsed
+        self.max_flush_time = max(self.max_flush_time, elapsed)
+        self.last_flush_at = time.time()
+        return True
+
+    async def stop(self):
+        """Stop the worker and write out everything still buffered."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._worker = None
+        if self._queue is None:
+            return
+        pending = self._batch
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        self._batch = []
+        for start in range(0, len(pending), self.flush_size):
+            batch = pending[start : start + self.flush_size]
+            if not await self._flush(batch):
+                lost = len(pending) - start
+                print(f"Interaction buffer stopped with {lost} events unwritten")
+                break
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "flushing": len(self._batch),
+            "events": self.events,
+            "written": self.written,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+            "avg_batch_size": self.written / self.flushes if self.flushes else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "avg_flush_ms": (
+                1000.0 * self.total_flush_time / self.flushes if self.flushes else 0.0
+            ),
+            "max_flush_ms": 1000.0 * self.max_flush_time,
+            "last_flush_at": self.last_flush_at,
+        }
+
+
+interaction_buffer = InteractionBuffer()
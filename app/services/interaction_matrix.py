@@ -0,0 +1,394 @@
+# Interaction matrix builder → streams interaction rows with a server-side
+# cursor into preallocated NumPy arrays, so training memory is bounded by the
+# arrays themselves rather than by millions of ORM objects.
+#
+# Benchmark on synthetic data:
+#   python -m app.services.interaction_matrix --bench 5000000
+import argparse
+import json
+import os
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID, uuid4
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from sqlalchemy import Float, all_, cast, func, literal, literal_column, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.models import IdRegistry, InteractionEvent
+from app.services.id_registry import PROPERTY, STUDENT
+
+# Rows fetched per round trip from the server-side cursor
+INTERACTION_CHUNK_SIZE = int(os.getenv("INTERACTION_CHUNK_SIZE", "50000"))
+
+ROW_DTYPE = np.dtype(
+    [
+        ("row", np.int32),
+        ("col", np.int32),
+        ("event", object),
+        ("ts", np.float64),
+        ("id", object),
+    ]
+)
+
+# Weighting pipeline (see `weighted_matrix`):
+# weight per event type, e.g. '{"apply": 3, "save": 2, "click": 1, "view": 0.5}'
+INTERACTION_WEIGHTS = json.loads(
+    os.getenv("INTERACTION_WEIGHTS", '{"save": 1.0, "apply": 1.0}')
+)
+# weight for event types not listed above; 0 drops them
+INTERACTION_DEFAULT_WEIGHT = float(os.getenv("INTERACTION_DEFAULT_WEIGHT", "0.5"))
+# an event loses half its weight every N days (0 disables decay)
+INTERACTION_HALF_LIFE_DAYS = float(os.getenv("INTERACTION_HALF_LIFE_DAYS", "30"))
+# upper bound on the summed weight of one (student, listing) pair
+INTERACTION_MAX_WEIGHT = float(os.getenv("INTERACTION_MAX_WEIGHT", "3.0"))
+# Incremental reads start this far behind the watermark: events are stamped
+# when logged but committed up to a buffer flush later (longer while flushes
+# retry), so a watermark read past them would otherwise skip them for good.
+# Events in that window a model was already trained on are excluded by id
+# (see `InteractionArrays.recent_events`), so none is trained twice
+INTERACTION_WATERMARK_LAG_SECONDS = float(
+    os.getenv("INTERACTION_WATERMARK_LAG_SECONDS", "600")
+)
+
+
+class InteractionArrays:
+    """Growable column arrays for (row, col, event, timestamp, id) tuples.
+
+    Event types are stored as small integer codes; `event_types[code]` is
+    the original string. Event ids are only kept for the newest `lag`
+    seconds, the window the next incremental read looks at again.
+    """
+
+    def __init__(
+        self, capacity: int = 0, lag: float = INTERACTION_WATERMARK_LAG_SECONDS
+    ):
+        capacity = max(capacity, 1024)
+        self.lag = lag
+        self.recent: Dict[str, float] = {}  # event id -> epoch seconds
+        self._newest = -np.inf
+        self._pruned_size = 1024
+        self.size = 0
+        self.rows = np.empty(capacity, dtype=np.int32)
+        self.cols = np.empty(capacity, dtype=np.int32)
+        self.events = np.empty(capacity, dtype=np.int16)
+        self.timestamps = np.empty(capacity, dtype=np.float64)  # epoch seconds
+        self.event_types: List[str] = []
+        self._codes: Dict[Optional[str], int] = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _reserve(self, extra: int):
+        needed = self.size + extra
+        capacity = len(self.rows)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("rows", "cols", "events", "timestamps"):
+            arr = getattr(self, name)
+            grown = np.empty(capacity, dtype=arr.dtype)
+            grown[: self.size] = arr[: self.size]
+            setattr(self, name, grown)
+
+    def _code(self, event_type: Optional[str]) -> int:
+        code = self._codes.get(event_type)
+        if code is None:
+            code = self._codes[event_type] = len(self.event_types)
+            self.event_types.append(event_type or "")
+        return code
+
+    def extend(self, chunk: Sequence[Tuple[int, int, Optional[str], float, Any]]):
+        """Append one fetched chunk of (row, col, event_type, epoch seconds, id)."""
+        n = len(chunk)
+        if not n:
+            return
+        self._reserve(n)
+        # SQLAlchemy Rows aren't tuples, and NumPy only reads a structured
+        # record from a real tuple
+        if not isinstance(chunk[0], tuple):
+            chunk = [tuple(r) for r in chunk]
+        # one C-level pass turns the row tuples into typed columns
+        block = np.array(chunk, dtype=ROW_DTYPE)
+        end = self.size + n
+        self.rows[self.size : end] = block["row"]
+        self.cols[self.size : end] = block["col"]
+        self.timestamps[self.size : end] = block["ts"]
+        # a handful of distinct event types per chunk: look each up once
+        events = block["event"].tolist()
+        lookup = {e: self._code(e) for e in set(events)}
+        self.events[self.size : end] = np.fromiter(map(lookup.get, events), np.int16, n)
+        self.size = end
+        self._track_recent(block["id"], block["ts"])
+
+    def _track_recent(self, ids: np.ndarray, ts: np.ndarray):
+        if not np.isnan(ts).all():
+            self._newest = max(self._newest, float(np.nanmax(ts)))
+        floor = self._newest - self.lag
+        with np.errstate(invalid="ignore"):
+            keep = ts > floor
+        for eid, t in zip(ids[keep].tolist(), ts[keep].tolist()):
+            self.recent[str(eid)] = t
+        if len(self.recent) > 2 * self._pruned_size:
+            self.recent = {k: t for k, t in self.recent.items() if t > floor}
+            self._pruned_size = max(len(self.recent), 1024)
+
+    def recent_events(self, since: Optional[float] = None) -> Dict[str, float]:
+        """Ids (and times) of the events the next read from `watermark` will
+        see again; pass them to `stream_interactions` as `exclude`."""
+        newest = self.watermark(default=since)
+        if newest is None:
+            return {}
+        floor = newest - self.lag
+        return {k: t for k, t in self.recent.items() if t > floor}
+
+    def watermark(self, default: Optional[float] = None) -> Optional[float]:
+        """Newest event time seen (epoch seconds), for the next `since`."""
+        ts = self.view("timestamps")
+        if not len(ts) or np.isnan(ts).all():
+            return default
+        newest = float(np.nanmax(ts))
+        return newest if default is None else max(newest, default)
+
+    def view(self, name: str) -> np.ndarray:
+        return getattr(self, name)[: self.size]
+
+    def event_mask(self, names: Sequence[str]) -> np.ndarray:
+        """Boolean mask of rows whose event type is one of `names`."""
+        codes = [self._codes[n] for n in names if n in self._codes]
+        return np.isin(self.view("events"), codes)
+
+    def to_coo(self, shape: Tuple[int, int], weights: np.ndarray) -> coo_matrix:
+        return coo_matrix(
+            (
+                weights.astype(np.float32, copy=False),
+                (self.view("rows"), self.view("cols")),
+            ),
+            shape=shape,
+        )
+
+
+def event_weights(
+    arrays: InteractionArrays,
+    weights: Optional[Dict[str, float]] = None,
+    default: Optional[float] = None,
+) -> np.ndarray:
+    """Base weight of every row, looked up by event type code."""
+    weights = INTERACTION_WEIGHTS if weights is None else weights
+    default = INTERACTION_DEFAULT_WEIGHT if default is None else default
+    table = np.array(
+        [weights.get(name, default) for name in arrays.event_types], dtype=np.float32
+    )
+    return table[arrays.view("events")]
+
+
+def weighted_matrix(
+    arrays: InteractionArrays,
+    shape: Tuple[int, int],
+    weights: Optional[Dict[str, float]] = None,
+    default: Optional[float] = None,
+    half_life_days: float = INTERACTION_HALF_LIFE_DAYS,
+    max_weight: float = INTERACTION_MAX_WEIGHT,
+    as_of: Optional[float] = None,
+) -> coo_matrix:
+    """One entry per (student, listing) pair, all steps vectorised.
+
+    1. base weight by event type (non-positive weights are dropped);
+    2. exponential decay by age, `0.5 ** (age / half_life)`;
+    3. dedup: repeats of one event type on a pair count once, at the
+       weight of the most recent one, so view spam adds nothing;
+    4. the distinct event types of a pair are summed and capped.
+    """
+    w = event_weights(arrays, weights, default)
+    ts = arrays.view("timestamps")
+    if half_life_days > 0:
+        if as_of is None:
+            # created_at is naive and EXTRACT(epoch) reads it as UTC
+            as_of = datetime.now().replace(tzinfo=timezone.utc).timestamp()
+        age_days = np.clip((as_of - ts) / 86400.0, 0, None)
+        decay = np.exp2(-age_days / half_life_days)
+        w = w * np.where(np.isnan(decay), 1.0, decay).astype(np.float32)
+
+    keep = w > 0
+    n_events = max(len(arrays.event_types), 1)
+    rows = arrays.view("rows")[keep].astype(np.int64)
+    pair = rows * shape[1] + arrays.view("cols")[keep]
+    key = pair * n_events + arrays.view("events")[keep]
+    w = w[keep]
+    if not len(key):
+        return coo_matrix(shape, dtype=np.float32)
+
+    order = np.argsort(key, kind="stable")
+    key, w = key[order], w[order]
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    w = np.maximum.reduceat(w, starts)  # most recent repeat wins
+    pair = key[starts] // n_events
+
+    # keys are sorted pair-major, so each pair's events are adjacent
+    starts = np.flatnonzero(np.r_[True, pair[1:] != pair[:-1]])
+    w = np.minimum(np.add.reduceat(w, starts), max_weight)
+    pair = pair[starts]
+    rows, cols = np.divmod(pair, shape[1])
+    return coo_matrix(
+        (w.astype(np.float32), (rows.astype(np.int32), cols.astype(np.int32))),
+        shape=shape,
+    )
+
+
+def interaction_rows_stmt():
+    """(row index, col index, event_type, epoch seconds, id) for registered pairs.
+
+    `created_at` is converted in SQL (NaN when missing) so no datetime
+    objects are built per row.
+    """
+    students = aliased(IdRegistry)
+    hostels = aliased(IdRegistry)
+    return (
+        select(
+            students.idx,
+            hostels.idx,
+            InteractionEvent.event_type,
+            func.coalesce(
+                cast(func.extract("epoch", InteractionEvent.created_at), Float),
+                literal_column("'NaN'::float8"),
+            ),
+            InteractionEvent.id,
+        )
+        .join(
+            students,
+            (students.kind == STUDENT)
+            & (students.entity_id == InteractionEvent.user_id),
+        )
+        .join(
+            hostels,
+            (hostels.kind == PROPERTY)
+            & (hostels.entity_id == InteractionEvent.property_id),
+        )
+    )
+
+
+def since_cutoff(since: float, lag: float = INTERACTION_WATERMARK_LAG_SECONDS):
+    """`created_at` bound for an incremental read from watermark `since`."""
+    return datetime.fromtimestamp(since - lag, tz=timezone.utc).replace(tzinfo=None)
+
+
+def incremental_clauses(
+    since: float,
+    lag: float = INTERACTION_WATERMARK_LAG_SECONDS,
+    exclude: Optional[Dict[str, float]] = None,
+) -> list:
+    """WHERE clauses for an incremental read from watermark `since`."""
+    where = [InteractionEvent.created_at > since_cutoff(since, lag)]
+    if exclude:
+        # one array parameter, however many ids the lag window holds
+        seen = literal([UUID(k) for k in exclude], ARRAY(PG_UUID(as_uuid=True)))
+        where.append(InteractionEvent.id != all_(seen))
+    return where
+
+
+async def stream_interactions(
+    session: AsyncSession,
+    chunk_size: int = INTERACTION_CHUNK_SIZE,
+    since: Optional[float] = None,
+    lag: float = INTERACTION_WATERMARK_LAG_SECONDS,
+    exclude: Optional[Dict[str, float]] = None,
+) -> InteractionArrays:
+    """Stream registered interactions into preallocated arrays.
+
+    `since` (epoch seconds, see `InteractionArrays.watermark`) keeps only
+    events created after `since - lag`. `exclude` holds the
+    `recent_events` of the run that set `since`: those events were already
+    trained on and are skipped, but still tracked for the run after this.
+    """
+    count_stmt = select(func.count()).select_from(InteractionEvent)
+    stmt = interaction_rows_stmt()
+    if since is not None:
+        where = incremental_clauses(since, lag, exclude)
+        count_stmt = count_stmt.where(*where)
+        stmt = stmt.where(*where)
+
+    # The count is only a sizing hint; arrays still grow if rows arrive meanwhile
+    count = await session.scalar(count_stmt)
+    arrays = InteractionArrays(capacity=count or 0, lag=lag)
+    arrays.recent.update(exclude or {})
+
+    result = await session.stream(stmt.execution_options(yield_per=chunk_size))
+    async for chunk in result.partitions(chunk_size):
+        arrays.extend(chunk)
+    return arrays
+
+
+def _bench(n: int, n_users: int, n_items: int, chunk_size: int):
+    rng = np.random.default_rng(0)
+    events = np.array(["view", "click", "save", "apply", "skip"], dtype=object)
+    now = time.time()
+    rows = rng.integers(0, n_users, n)
+    cols = rng.integers(0, n_items, n)
+    kinds = events[rng.integers(0, len(events), n)]
+    # spread over 90 days, so only the newest few are kept as recent events
+    stamps = now - rng.random(n) * 90 * 86400
+    ids = [uuid4() for _ in range(n)]
+
+    def chunks():
+        # Simulates what the cursor yields: tuples of Python scalars
+        for start in range(0, n, chunk_size):
+            stop = min(start + chunk_size, n)
+            yield list(
+                zip(
+                    rows[start:stop].tolist(),
+                    cols[start:stop].tolist(),
+                    kinds[start:stop].tolist(),
+                    stamps[start:stop].tolist(),
+                    ids[start:stop],
+                )
+            )
+
+    def list_builder():
+        r, c, d = [], [], []
+        for chunk in chunks():
+            for row, col, event_type, _, _ in chunk:
+                r.append(row)
+                c.append(col)
+                d.append(1.0 if event_type in ("save", "apply") else 0.5)
+        return coo_matrix((d, (r, c)), shape=(n_users, n_items))
+
+    def array_builder():
+        arrays = InteractionArrays(capacity=n)
+        for chunk in chunks():
+            arrays.extend(chunk)
+        return weighted_matrix(arrays, (n_users, n_items))
+
+    for name, build in (
+        ("python lists", list_builder),
+        ("numpy arrays", array_builder),
+    ):
+        t0 = time.perf_counter()
+        mat = build()
+        elapsed = time.perf_counter() - t0
+        del mat
+        # second run under tracemalloc, which would skew the timing
+        tracemalloc.start()
+        mat = build()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"{name:>13}: {elapsed:6.2f}s  peak {peak / 2**20:8.1f} MiB  "
+            f"({n / elapsed:,.0f} rows/s, nnz={mat.nnz:,})"
+        )
+        del mat
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Interaction matrix builder")
+    parser.add_argument("--bench", type=int, metavar="ROWS", required=True)
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--chunk-size", type=int, default=INTERACTION_CHUNK_SIZE)
+    args = parser.parse_args()
+    _bench(args.bench, args.users, args.items, args.chunk_size)
@@ -0,0 +1,157 @@
+# Interaction retention → keeps the monthly partitions of `interaction_events`
+# (migration 011) ahead of time, rolls raw events up into `interaction_daily`
+# and drops raw partitions older than the retention window once rolled up.
+import os
+import re
+from datetime import date
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Date, cast, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import InteractionDaily, InteractionEvent
+
+# Whole months of raw events kept before the current one
+INTERACTION_RETENTION_MONTHS = int(os.getenv("INTERACTION_RETENTION_MONTHS", "6"))
+# Future monthly partitions created in advance, so inserts never land in the
+# default partition (which would block creating that month's partition)
+INTERACTION_PARTITIONS_AHEAD = int(os.getenv("INTERACTION_PARTITIONS_AHEAD", "3"))
+# Days recomputed by each rollup run, to pick up late (buffered) events
+INTERACTION_ROLLUP_DAYS = int(os.getenv("INTERACTION_ROLLUP_DAYS", "2"))
+
+PARENT = "interaction_events"
+_PARTITION = re.compile(rf"^{PARENT}_(\d{{4}})(\d{{2}})$")
+
+
+def add_months(day: date, months: int) -> date:
+    """First day of the month `months` after `day`'s month."""
+    years, month = divmod(day.month - 1 + months, 12)
+    return date(day.year + years, month + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_{month:%Y%m}"
+
+
+async def is_partitioned(session: AsyncSession) -> bool:
+    kind = await session.scalar(
+        text("SELECT relkind FROM pg_class WHERE relname = :name"),
+        {"name": PARENT},
+    )
+    return kind == "p"
+
+
+async def partitions(session: AsyncSession) -> List[Tuple[str, date]]:
+    """(name, first day) of each monthly partition, oldest first."""
+    result = await session.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits"
+            " JOIN pg_class child ON child.oid = pg_inherits.inhrelid"
+            " JOIN pg_class parent ON parent.oid = pg_inherits.inhparent"
+            " WHERE parent.relname = :name"
+        ),
+        {"name": PARENT},
+    )
+    months = []
+    for name in result.scalars().all():
+        match = _PARTITION.match(name)
+        if match:  # skips the default partition
+            months.append((name, date(int(match[1]), int(match[2]), 1)))
+    return sorted(months, key=lambda p: p[1])
+
+
+async def ensure_partitions(
+    session: AsyncSession,
+    ahead: int = INTERACTION_PARTITIONS_AHEAD,
+    today: Optional[date] = None,
+) -> List[str]:
+    """Create this month's partition and the next `ahead` ones if missing."""
+    if not await is_partitioned(session):
+        return []
+    existing = {name for name, _ in await partitions(session)}
+    first = add_months(today or date.today(), 0)
+    created = []
+    for i in range(ahead + 1):
+        month = add_months(first, i)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        await session.execute(
+            text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {PARENT} '
+                f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+            )
+        )
+        created.append(name)
+    await session.commit()
+    return created
+
+
+async def rollup(session: AsyncSession, start: date, end: date) -> int:
+    """Recompute `interaction_daily` for days `start` (inclusive) to `end`.
+
+    Counts are replaced, not added, so a range can be rolled up again.
+    Days whose raw events are already dropped keep their rollup rows.
+    """
+    day = cast(InteractionEvent.created_at, Date)
+    event_type = func.coalesce(InteractionEvent.event_type, "")
+    stmt = insert(InteractionDaily).from_select(
+        ["day", "user_id", "property_id", "event_type", "count"],
+        select(
+            day,
+            InteractionEvent.user_id,
+            InteractionEvent.property_id,
+            event_type,
+            func.count(),
+        )
+        .where(InteractionEvent.created_at >= start, InteractionEvent.created_at < end)
+        .group_by(
+            day, InteractionEvent.user_id, InteractionEvent.property_id, event_type
+        ),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["day", "user_id", "property_id", "event_type"],
+        set_={"count": stmt.excluded["count"]},
+    )
+    result = await session.execute(stmt)
+    return result.rowcount
+
+
+async def roll_up_recent(
+    session: AsyncSession,
+    days: int = INTERACTION_ROLLUP_DAYS,
+    today: Optional[date] = None,
+) -> int:
+    """Roll up the last `days` complete days."""
+    today = today or date.today()
+    start = date.fromordinal(today.toordinal() - days)
+    rows = await rollup(session, start, today)
+    await session.commit()
+    return rows
+
+
+async def drop_expired_partitions(
+    session: AsyncSession,
+    retention_months: int = INTERACTION_RETENTION_MONTHS,
+    today: Optional[date] = None,
+) -> List[str]:
+    """Roll up, detach and drop partitions older than the retention window.
+
+    Each partition is handled in its own transaction, so a failure leaves
+    every partition either fully kept or rolled up and dropped.
+    """
+    if not await is_partitioned(session):
+        return []
+    cutoff = add_months(today or date.today(), -retention_months)
+    dropped = []
+    for name, month in await partitions(session):
+        end = add_months(month, 1)
+        if end > cutoff:
+            break
+        await rollup(session, month, end)
+        await session.execute(text(f'ALTER TABLE {PARENT} DETACH PARTITION "{name}"'))
+        await session.execute(text(f'DROP TABLE "{name}"'))
+        await session.commit()
+        dropped.append(name)
+    return dropped
@@ -0,0 +1,203 @@
+# Recommender model store → versioned on-disk artifacts written by the Celery
+# trainer and hot-reloaded by API workers.
+#
+# Layout (one directory per version, plus a LATEST pointer file):
+#   <RECOMMENDER_MODEL_DIR>/<version>/manifest.json
+#   <RECOMMENDER_MODEL_DIR>/<version>/{student,hostel}_ids.npy
+#   <RECOMMENDER_MODEL_DIR>/<version>/{user,item}_{embeddings,biases}.npy
+#   <RECOMMENDER_MODEL_DIR>/<version>/model.pkl   (trainer only, for warm starts)
+#   <RECOMMENDER_MODEL_DIR>/<version>/recent_{ids,ts}.npy   (trainer only, see
+#       `InteractionArrays.recent_events`)
+# The .npy arrays are opened with mmap, so every worker on a host shares the
+# same page-cache copy and loading a version costs almost nothing.
+import json
+import os
+import pickle
+import shutil
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from app.services.candidate_filter import viable_matrix
+from app.services.scoring import top_k_rows
+
+RECOMMENDER_MODEL_DIR = os.getenv("RECOMMENDER_MODEL_DIR", "models/recommender")
+# Number of versions kept on disk after each save
+RECOMMENDER_KEEP_VERSIONS = int(os.getenv("RECOMMENDER_KEEP_VERSIONS", "3"))
+LATEST_FILE = "LATEST"
+ARRAYS = ("user_embeddings", "user_biases", "item_embeddings", "item_biases")
+
+
+@dataclass
+class ModelArtifact:
+    version: str
+    student_ids: np.ndarray  # position = model user index
+    hostel_ids: np.ndarray  # position = model item index
+    user_embeddings: np.ndarray
+    user_biases: np.ndarray
+    item_embeddings: np.ndarray
+    item_biases: np.ndarray
+    meta: Dict[str, Any] = field(default_factory=dict)
+    path: str = ""
+
+    def __post_init__(self):
+        self.student_map = {sid: i for i, sid in enumerate(self.student_ids.tolist())}
+
+    def load_model(self):
+        """Unpickle the full model (only needed to continue training)."""
+        with open(os.path.join(self.path, "model.pkl"), "rb") as fh:
+            return pickle.load(fh)
+
+    def recent_events(self) -> Dict[str, float]:
+        """Events near the watermark this version was trained on (id -> time)."""
+        try:
+            ids = np.load(os.path.join(self.path, "recent_ids.npy"))
+            ts = np.load(os.path.join(self.path, "recent_ts.npy"))
+        except FileNotFoundError:
+            return {}
+        return dict(zip(ids.tolist(), ts.tolist()))
+
+    def scores_for(self, user_index: int) -> np.ndarray:
+        """Score every item for one user with a single dense mat-vec."""
+        return (
+            self.item_embeddings @ self.user_embeddings[user_index] + self.item_biases
+        )
+
+    def top_items(
+        self,
+        start: int,
+        stop: int,
+        items: np.ndarray,
+        top_n: int,
+        viable: Optional[np.ndarray] = None,
+    ):
+        """Best `top_n` of `items` for users `start`..`stop`, as item positions
+        (best first) and their scores, both shaped (users, top_n).
+
+        Pairs where the (users, items) `viable` mask is False score -inf.
+        """
+        scores = (
+            self.user_embeddings[start:stop] @ self.item_embeddings[items].T
+            + self.item_biases[items]
+            + self.user_biases[start:stop, None]
+        )
+        if viable is not None:
+            scores = np.where(viable, scores, -np.inf)
+        top = top_k_rows(scores, top_n)
+        return items[top], np.take_along_axis(scores, top, axis=1)
+
+
+def _new_version() -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    return f"{stamp}-{uuid.uuid4().hex[:6]}"
+
+
+def save_artifact(
+    model,
+    student_ids: Sequence[str],
+    hostel_ids: Sequence[str],
+    representations: Dict[str, np.ndarray],
+    meta: Optional[Dict[str, Any]] = None,
+    root: str = RECOMMENDER_MODEL_DIR,
+    recent_events: Optional[Dict[str, float]] = None,
+) -> str:
+    """Write a new version and atomically point LATEST at it."""
+    os.makedirs(root, exist_ok=True)
+    version = _new_version()
+    tmp = os.path.join(root, f".{version}.tmp")
+    os.makedirs(tmp)
+
+    np.save(os.path.join(tmp, "student_ids.npy"), np.asarray(student_ids, dtype="U36"))
+    np.save(os.path.join(tmp, "hostel_ids.npy"), np.asarray(hostel_ids, dtype="U36"))
+    for name in ARRAYS:
+        arr = np.ascontiguousarray(representations[name], dtype=np.float32)
+        np.save(os.path.join(tmp, f"{name}.npy"), arr)
+    if recent_events is not None:
+        ids = np.asarray(list(recent_events), dtype="U36")
+        ts = np.fromiter(recent_events.values(), np.float64, len(recent_events))
+        np.save(os.path.join(tmp, "recent_ids.npy"), ids)
+        np.save(os.path.join(tmp, "recent_ts.npy"), ts)
+    if model is not None:
+        with open(os.path.join(tmp, "model.pkl"), "wb") as fh:
+            pickle.dump(model, fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+    manifest = {
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "n_students": len(student_ids),
+        "n_hostels": len(hostel_ids),
+        **(meta or {}),
+    }
+    with open(os.path.join(tmp, "manifest.json"), "w") as fh:
+        json.dump(manifest, fh, default=str)
+
+    os.rename(tmp, os.path.join(root, version))
+    pointer = os.path.join(root, f".{LATEST_FILE}.tmp")
+    with open(pointer, "w") as fh:
+        fh.write(version)
+    os.replace(pointer, os.path.join(root, LATEST_FILE))
+
+    _prune(root, keep=RECOMMENDER_KEEP_VERSIONS, current=version)
+    return version
+
+
+def latest_version(root: str = RECOMMENDER_MODEL_DIR) -> Optional[str]:
+    try:
+        with open(os.path.join(root, LATEST_FILE)) as fh:
+            return fh.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_artifact(
+    version: Optional[str] = None, root: str = RECOMMENDER_MODEL_DIR
+) -> Optional[ModelArtifact]:
+    """Open `version` (default: latest) with memory-mapped arrays."""
+    version = version or latest_version(root)
+    if not version:
+        return None
+    path = os.path.join(root, version)
+    with open(os.path.join(path, "manifest.json")) as fh:
+        meta = json.load(fh)
+
+    def arr(name):
+        return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+    return ModelArtifact(
+        version=version,
+        student_ids=arr("student_ids"),
+        hostel_ids=arr("hostel_ids"),
+        meta=meta,
+        path=path,
+        **{name: arr(name) for name in ARRAYS},
+    )
+
+
+def score_shard(
+    artifact: ModelArtifact,
+    start: int,
+    stop: int,
+    items: np.ndarray,
+    top_n: int,
+    constraints: Optional[tuple] = None,
+):
+    """Top items for one slice of users, as (start, positions, scores).
+
+    `constraints` are the `viable_matrix` arguments for this slice.
+    """
+    viable = viable_matrix(*constraints) if constraints is not None else None
+    top, scores = artifact.top_items(start, stop, items, top_n, viable)
+    return start, top, scores
+
+
+def _prune(root: str, keep: int, current: str):
+    versions = sorted(
+        d for d in os.listdir(root) if not d.startswith(".") and d != LATEST_FILE
+    )
+    for old in versions[: max(len(versions) - keep, 0)]:
+        if old != current:
+            # workers with the old arrays mmapped keep reading them until reload
+            shutil.rmtree(os.path.join(root, old), ignore_errors=True)
@@ -0,0 +1,133 @@
+# ONNX embedding backend → runs an exported (optionally int8-quantized)
+# all-MiniLM-L6-v2 with onnxruntime on CPU, without loading torch at serve time.
+#
+# Export once, then point EMBEDDING_ONNX_PATH at the output directory:
+#   python -m app.services.onnx_embedder --out models/minilm-onnx
+import argparse
+import os
+from typing import List, Union
+
+import numpy as np
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_QUANTIZED_FILE = "model_quantized.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+# all-MiniLM-L6-v2 truncates inputs to 256 word pieces
+MAX_SEQ_LENGTH = 256
+
+
+class OnnxEmbedder:
+    """SentenceTransformer-compatible `encode` backed by onnxruntime.
+
+    Reproduces the all-MiniLM-L6-v2 pipeline: BERT token embeddings, mean
+    pooling over the attention mask, then L2 normalisation.
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = True, num_threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        filename = ONNX_QUANTIZED_FILE if quantized else ONNX_MODEL_FILE
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, filename),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+    def encode(
+        self, sentences: Union[str, List[str]], batch_size: int = 32
+    ) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        chunks = []
+        for start in range(0, len(texts), max(batch_size, 1)):
+            chunks.append(self._encode_batch(texts[start : start + batch_size]))
+        out = (
+            np.concatenate(chunks)
+            if chunks
+            else np.empty((0, self.dim), dtype=np.float32)
+        )
+        return out[0] if single else out
+
+    @property
+    def dim(self) -> int:
+        return self.session.get_outputs()[0].shape[-1]
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array(
+                [e.type_ids for e in encodings], dtype=np.int64
+            )
+
+        token_embeddings = self.session.run(None, feeds)[0]
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(
+            mask.sum(axis=1), 1e-9, None
+        )
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+def export_onnx(model_name: str, out_dir: str, quantize: bool = True) -> str:
+    """Export `model_name` to ONNX (plus an int8 copy) with its tokenizer.
+
+    Needs torch and transformers; only the serving side is torch-free.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(out_dir, exist_ok=True)
+    if "/" not in model_name:
+        model_name = f"sentence-transformers/{model_name}"
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    tokenizer.backend_tokenizer.save(os.path.join(out_dir, TOKENIZER_FILE))
+
+    sample = tokenizer(["self contain near unilag"], return_tensors="pt")
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic = {n: {0: "batch", 1: "seq"} for n in names + ["last_hidden_state"]}
+    model_path = os.path.join(out_dir, ONNX_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[n] for n in names),
+            model_path,
+            input_names=names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic,
+            opset_version=14,
+            dynamo=False,
+        )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(
+            model_path,
+            os.path.join(out_dir, ONNX_QUANTIZED_FILE),
+            weight_type=QuantType.QInt8,
+        )
+    return out_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+    print(export_onnx(args.model, args.out, quantize=not args.no_quantize))
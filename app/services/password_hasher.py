@@ -0,0 +1,96 @@
+# Password hasher → runs bcrypt in a small dedicated thread pool so a burst of
+# logins can't block the event loop (bcrypt releases the GIL while hashing).
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+# bcrypt cost factor; raising it rehashes each user's password at next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# Reject new hash/verify calls with 503 once this many are queued or running
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Too many hash/verify calls queued; the API answers 503 (see `app.main`)."""
+
+
+class PasswordHasher:
+    """bcrypt hash/verify on a bounded executor with a queue-depth guard."""
+
+    def __init__(
+        self,
+        rounds: int = BCRYPT_ROUNDS,
+        workers: int = PASSWORD_HASH_WORKERS,
+        max_pending: int = PASSWORD_HASH_MAX_PENDING,
+    ):
+        # hashes with another cost count as deprecated -> needs_update
+        self.context = CryptContext(
+            schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds
+        )
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="bcrypt"
+                    )
+        return self._pool
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy("Authentication busy, please retry")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.pool, fn, *args
+            )
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(self.context.verify, password, hashed)
+
+    async def verify_and_update(
+        self, password: str, hashed: str
+    ) -> Tuple[bool, Optional[str]]:
+        """(valid, new hash or None); a new hash means the cost changed."""
+        valid, new_hash = await self._run(
+            self.context.verify_and_update, password, hashed
+        )
+        if new_hash:
+            self.rehashed += 1
+        return valid, new_hash
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "workers": self.workers,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+        }
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,147 @@
+# Popularity ranking → per-window (24h/7d/30d) counts of distinct students per
+# listing, overall and per university. Rebuilt periodically by a Celery task
+# and cached in process, so the recommender's cold-start fallback is O(k).
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, distinct, func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import (
+    InteractionEvent,
+    Property,
+    PropertyPopularity,
+    StudentProfile,
+)
+
+POPULARITY_WINDOWS = {
+    "24h": timedelta(hours=24),
+    "7d": timedelta(days=7),
+    "30d": timedelta(days=30),
+}
+# Window served by the recommender fallback
+POPULARITY_WINDOW = os.getenv("POPULARITY_WINDOW", "7d")
+# Ranked ids kept per (window, segment) in the in-process cache
+POPULARITY_CACHE_SIZE = int(os.getenv("POPULARITY_CACHE_SIZE", "100"))
+POPULARITY_CACHE_TTL = int(os.getenv("POPULARITY_CACHE_TTL", "300"))
+
+
+def segment_for(university: Optional[str]) -> str:
+    return university.strip().lower() if university else ""
+
+
+async def refresh_popularity(session: AsyncSession) -> Dict[str, int]:
+    """Recompute the whole `property_popularity` table in one transaction.
+
+    Scores are distinct students per listing, so repeated views by one
+    student count once. Only available listings are ranked.
+    """
+    now = datetime.now()
+    await session.execute(delete(PropertyPopularity))
+    columns = ["time_window", "segment", "property_id", "score", "updated_at"]
+    counts = {}
+    for window, span in POPULARITY_WINDOWS.items():
+        recent = (InteractionEvent.created_at >= now - span) & (
+            Property.is_available == True
+        )
+        students = func.count(distinct(InteractionEvent.user_id))
+
+        overall = (
+            select(
+                literal(window),
+                literal(""),
+                InteractionEvent.property_id,
+                students,
+                literal(now),
+            )
+            .join(Property, Property.id == InteractionEvent.property_id)
+            .where(recent)
+            .group_by(InteractionEvent.property_id)
+        )
+        university = func.lower(func.trim(StudentProfile.university))
+        by_university = (
+            select(
+                literal(window),
+                university,
+                InteractionEvent.property_id,
+                students,
+                literal(now),
+            )
+            .join(Property, Property.id == InteractionEvent.property_id)
+            .join(StudentProfile, StudentProfile.user_id == InteractionEvent.user_id)
+            .where(recent, StudentProfile.university.is_not(None), university != "")
+            .group_by(university, InteractionEvent.property_id)
+        )
+        for segment, stmt in (("all", overall), ("university", by_university)):
+            result = await session.execute(
+                insert(PropertyPopularity).from_select(columns, stmt)
+            )
+            counts[f"{window}/{segment}"] = result.rowcount
+    await session.commit()
+    # API workers pick the new ranking up when their cache entries expire
+    return counts
+
+
+class PopularityCache:
+    """TTL cache of ranked property ids per (window, segment)."""
+
+    def __init__(self, size: int, ttl: int):
+        self.size = size
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, str], Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    async def ranked(
+        self, session: AsyncSession, window: str, segment: str
+    ) -> List[str]:
+        key = (window, segment)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        stmt = (
+            select(PropertyPopularity.property_id)
+            .where(
+                PropertyPopularity.time_window == window,
+                PropertyPopularity.segment == segment,
+            )
+            .order_by(PropertyPopularity.score.desc(), PropertyPopularity.property_id)
+            .limit(self.size)
+        )
+        result = await session.execute(stmt)
+        ids = [str(pid) for pid in result.scalars().all()]
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, ids)
+        return ids
+
+    async def top(
+        self,
+        session: AsyncSession,
+        top_n: int,
+        university: Optional[str] = None,
+        window: str = POPULARITY_WINDOW,
+        keep: Optional[Callable[[List[str]], List[str]]] = None,
+    ) -> List[str]:
+        """Most popular listings among `university` students, topped up from
+        the overall ranking. `keep` filters each ranked list first."""
+        result: List[str] = []
+        segments = [segment_for(university), ""] if university else [""]
+        for segment in segments:
+            ranked = await self.ranked(session, window, segment)
+            for pid in keep(ranked) if keep else ranked:
+                if pid not in result:
+                    result.append(pid)
+                    if len(result) >= top_n:
+                        return result
+        return result
+
+
+popularity_cache = PopularityCache(POPULARITY_CACHE_SIZE, POPULARITY_CACHE_TTL)
@@ -1,4 +1,9 @@
 # Recommender Service (LightFM stub) → Train a hybrid (content + collaborative filtering) model.(Training is manually triggered for now)
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from uuid import UUID, uuid4
 from fastapi import Depends
 import numpy as np
 
@@ -10,141 +15,513 @@ except Exception:
     HAS_LIGHTFM = False
 
 from sqlmodel import select
+from sqlalchemy import delete, insert, text
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
-from app.models import StudentProfile, Property, InteractionEvent
+from app.models import StudentProfile, Property, PropertyFeature
+from app.models.models import Recommendation
+from app.services.id_registry import PROPERTY, STUDENT, registry_ids, sync_registry
+from app.services.embedding_store import decode_embedding
+from app.services.feature_matrix import (
+    RECOMMENDER_FEATURE_BUCKETS,
+    item_features,
+    user_features,
+)
+from app.services.interaction_matrix import stream_interactions, weighted_matrix
+from app.services.candidate_filter import (
+    CandidateFilter,
+    candidate_filter,
+    student_constraints,
+    viable_clauses,
+)
+from app.services.popularity import popularity_cache
+from app.services.model_store import (
+    ModelArtifact,
+    latest_version,
+    load_artifact,
+    save_artifact,
+    score_shard,
+)
+from app.services.scoring import CandidateMatrix, top_k_indices
+from app.services.vector_index import PGVECTOR_EF_SEARCH, VECTOR_BACKEND
 
 from app.db.session import get_db
-from scipy.sparse import coo_matrix
-from typing import Tuple, Dict, Any, List
+from typing import Tuple, Dict, Any, List, Optional
 import numpy as np
 
+# LightFM hyper-parameters and training parallelism
+RECOMMENDER_LOSS = os.getenv("RECOMMENDER_LOSS", "warp")
+RECOMMENDER_COMPONENTS = int(os.getenv("RECOMMENDER_COMPONENTS", "10"))
+RECOMMENDER_LEARNING_RATE = float(os.getenv("RECOMMENDER_LEARNING_RATE", "0.05"))
+RECOMMENDER_EPOCHS = int(os.getenv("RECOMMENDER_EPOCHS", "10"))
+RECOMMENDER_THREADS = int(os.getenv("RECOMMENDER_THREADS", str(os.cpu_count() or 1)))
+# Threads scoring student shards when refreshing `recommendations` (1 = inline)
+RECOMMENDER_PREDICT_WORKERS = int(
+    os.getenv("RECOMMENDER_PREDICT_WORKERS", str(os.cpu_count() or 1))
+)
+# How often API workers look for a newer trained model on disk
+RECOMMENDER_RELOAD_SECONDS = float(os.getenv("RECOMMENDER_RELOAD_SECONDS", "30"))
+# Rows kept per student in the precomputed `recommendations` table
+RECOMMENDATIONS_TOP_N = int(os.getenv("RECOMMENDATIONS_TOP_N", "20"))
+# Students scored per matrix multiply when refreshing that table
+RECOMMENDATIONS_BATCH_SIZE = int(os.getenv("RECOMMENDATIONS_BATCH_SIZE", "1024"))
+# Passes over the new interactions in an incremental (fit_partial) run
+RECOMMENDER_INCREMENTAL_EPOCHS = int(os.getenv("RECOMMENDER_INCREMENTAL_EPOCHS", "3"))
+
+
+def grow_model(model, n_users: int, n_items: int):
+    """Append freshly initialised rows for new user/item features.
+
+    `n_users`/`n_items` are feature counts (columns of the feature
+    matrices); new entities only add identity columns at the end. Mirrors
+    `LightFM._initialize` for the new rows, so the existing embeddings and
+    optimiser state carry over untouched.
+    """
+    grad_init = 1.0 if model.learning_schedule == "adagrad" else 0.0
+    for prefix, n in (("user", n_users), ("item", n_items)):
+        embeddings = getattr(model, f"{prefix}_embeddings")
+        extra = n - embeddings.shape[0]
+        if extra <= 0:
+            continue
+        new = (model.random_state.rand(extra, model.no_components) - 0.5) / (
+            model.no_components
+        )
+        blocks = {
+            "embeddings": new.astype(np.float32),
+            "embedding_gradients": np.full_like(new, grad_init, dtype=np.float32),
+            "embedding_momentum": np.zeros_like(new, dtype=np.float32),
+            "biases": np.zeros(extra, dtype=np.float32),
+            "bias_gradients": np.full(extra, grad_init, dtype=np.float32),
+            "bias_momentum": np.zeros(extra, dtype=np.float32),
+        }
+        for name, block in blocks.items():
+            attr = f"{prefix}_{name}"
+            setattr(model, attr, np.concatenate([getattr(model, attr), block]))
+
 
 class RecommenderService:
     def __init__(self):
         # If LightFM is available use it, otherwise operate in "stub" mode
         if HAS_LIGHTFM:
-            self.model = LightFM(loss="warp")
+            self.model = LightFM(
+                no_components=RECOMMENDER_COMPONENTS,
+                loss=RECOMMENDER_LOSS,
+                learning_rate=RECOMMENDER_LEARNING_RATE,
+            )
         else:
             self.model = None  # stub mode
+        # Latest trained model as published by the trainer (see model_store)
+        self.artifact: Optional[ModelArtifact] = None
+        self._checked_at = float("-inf")
+
+    def maybe_reload(self, force: bool = False) -> Optional[ModelArtifact]:
+        """Swap in the newest saved model version, checking at most every
+        RECOMMENDER_RELOAD_SECONDS."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < RECOMMENDER_RELOAD_SECONDS:
+            return self.artifact
+        self._checked_at = now
+
+        version = latest_version()
+        if version and (self.artifact is None or self.artifact.version != version):
+            try:
+                self.artifact = load_artifact(version)
+            except Exception as e:
+                # keep serving the previous version
+                print(f"Failed to load recommender model {version}: {e}")
+        return self.artifact
 
     async def build_matrices(
-        self, session: AsyncSession = Depends(get_db)
-    ) -> Tuple[Any, Dict[str, int], Dict[str, int]]:
-        s_stmt = select(StudentProfile)
-        h_stmt = select(Property)
-        i_stmt = select(InteractionEvent)
-
-        s_res = await session.execute(s_stmt)
-        h_res = await session.execute(h_stmt)
-        i_res = await session.execute(i_stmt)
-
-        students = s_res.scalars().all()
-        hostels = h_res.scalars().all()
-        interactions = i_res.scalars().all()
-
-        # map by user_id (StudentProfile.user_id) and property id
-        student_map = {str(s.user_id): i for i, s in enumerate(students)}
-        hostel_map = {str(h.id): j for j, h in enumerate(hostels)}
-
-        rows, cols, data = [], [], []
-        for inter in interactions:
-            uid = str(inter.user_id)
-            pid = str(inter.property_id)
-            if uid in student_map and pid in hostel_map:
-                rows.append(student_map[uid])
-                cols.append(hostel_map[pid])
-                data.append(1.0 if inter.event_type in ["save", "apply"] else 0.5)
-
-        mat = coo_matrix((data, (rows, cols)), shape=(len(students), len(hostels)))
-        return mat, student_map, hostel_map
+        self,
+        session: AsyncSession = Depends(get_db),
+        since: Optional[float] = None,
+        exclude: Optional[Dict[str, float]] = None,
+    ) -> Tuple[Any, List[str], List[str], Optional[float], Dict[str, float]]:
+        """Weighted interactions plus the watermark and `recent_events` to
+        publish with the model; `since`/`exclude` come from the model being
+        continued (see `stream_interactions`)."""
+        # Stable indices from the registry; new students/listings are appended
+        await sync_registry(session)
+        student_ids = await registry_ids(session, STUDENT)
+        hostel_ids = await registry_ids(session, PROPERTY)
+
+        # Streamed with a server-side cursor into preallocated arrays, then
+        # weighted, time-decayed and deduplicated to one entry per pair
+        arrays = await stream_interactions(session, since=since, exclude=exclude)
+        shape = (len(student_ids), len(hostel_ids))
+        mat = weighted_matrix(arrays, shape)
+        watermark = arrays.watermark(default=since)
+        return mat, student_ids, hostel_ids, watermark, arrays.recent_events(since)
+
+    async def build_features(self, session: AsyncSession, shape: Tuple[int, int]):
+        """Hashed attribute + identity features for every student and listing."""
+        users = await user_features(session, shape[0])
+        items = await item_features(session, shape[1])
+        return users, items
+
+    def _fit(self, weights, features, epochs: int, partial: bool = False) -> dict:
+        """Fit (or continue) the model; returns timing stats for the manifest."""
+        # LightFM wants binary interactions; the weights go in separately
+        interactions = weights.copy()
+        interactions.data[:] = 1.0
+        users, items = features
+        fit = self.model.fit_partial if partial else self.model.fit
+
+        # LightFM releases the GIL and runs its epochs on RECOMMENDER_THREADS
+        started = time.perf_counter()
+        fit(
+            interactions,
+            user_features=users,
+            item_features=items,
+            sample_weight=weights,
+            epochs=epochs,
+            num_threads=RECOMMENDER_THREADS,
+        )
+        seconds = time.perf_counter() - started
+        stats = {
+            "epochs": epochs,
+            "threads": RECOMMENDER_THREADS,
+            "interactions": int(weights.nnz),
+            "train_seconds": round(seconds, 3),
+            "interactions_per_second": round(weights.nnz * epochs / seconds, 1),
+        }
+        print(
+            f"Recommender {'fit_partial' if partial else 'fit'}: "
+            f"{weights.nnz} interactions x {epochs} epochs in {seconds:.2f}s "
+            f"({stats['interactions_per_second']:.0f}/s, {RECOMMENDER_THREADS} threads)"
+        )
+        return stats
 
     async def train(self, session: AsyncSession = Depends(get_db)) -> bool:
-        interaction_matrix, student_map, hostel_map = await self.build_matrices(session)
+        interaction_matrix, student_ids, hostel_ids, watermark, recent = (
+            await self.build_matrices(session)
+        )
         if interaction_matrix.nnz > 0:
             if HAS_LIGHTFM and self.model is not None:
-                self.model.fit(interaction_matrix, epochs=10, num_threads=2)
+                features = await self.build_features(session, interaction_matrix.shape)
+                stats = self._fit(
+                    interaction_matrix, features, epochs=RECOMMENDER_EPOCHS
+                )
+                self.publish(
+                    student_ids,
+                    hostel_ids,
+                    features,
+                    {
+                        **stats,
+                        "mode": "full",
+                        "watermark": watermark,
+                        "feature_buckets": RECOMMENDER_FEATURE_BUCKETS,
+                    },
+                    recent,
+                )
                 return True
             # stub: pretend we trained
             return True
         return False
 
+    async def train_incremental(self, session: AsyncSession = Depends(get_db)) -> bool:
+        """Continue the latest model on interactions newer than its watermark.
+
+        Falls back to a full `train` when there is no compatible model to
+        continue (none yet, or a different feature layout).
+        """
+        artifact = self.maybe_reload(force=True)
+        meta = artifact.meta if artifact is not None else {}
+        since = meta.get("watermark")
+        same_layout = meta.get("feature_buckets") == RECOMMENDER_FEATURE_BUCKETS
+        if not HAS_LIGHTFM or since is None or not same_layout:
+            return await self.train(session)
+
+        # events near the watermark the base model already saw are skipped,
+        # so consecutive runs don't fit the same events again
+        interaction_matrix, student_ids, hostel_ids, watermark, recent = (
+            await self.build_matrices(
+                session, since=since, exclude=artifact.recent_events()
+            )
+        )
+        if interaction_matrix.nnz == 0:
+            return False
+
+        features = await self.build_features(session, interaction_matrix.shape)
+        self.model = artifact.load_model()
+        grow_model(self.model, features[0].shape[1], features[1].shape[1])
+        stats = self._fit(
+            interaction_matrix,
+            features,
+            epochs=RECOMMENDER_INCREMENTAL_EPOCHS,
+            partial=True,
+        )
+        self.publish(
+            student_ids,
+            hostel_ids,
+            features,
+            {
+                **stats,
+                "mode": "incremental",
+                "watermark": watermark,
+                "feature_buckets": RECOMMENDER_FEATURE_BUCKETS,
+                "base": artifact.version,
+            },
+            recent,
+        )
+        return True
+
+    def publish(
+        self,
+        student_ids: List[str],
+        hostel_ids: List[str],
+        features,
+        meta: Optional[Dict[str, Any]] = None,
+        recent_events: Optional[Dict[str, float]] = None,
+    ) -> str:
+        """Save the fitted model as a new version for API workers to load.
+
+        `student_ids`/`hostel_ids` are the registry ids, position == index.
+        Representations are computed through the feature matrices once here,
+        so serving a user stays a single dense dot product.
+        """
+        users, items = features
+        user_biases, user_embeddings = self.model.get_user_representations(users)
+        item_biases, item_embeddings = self.model.get_item_representations(items)
+        version = save_artifact(
+            self.model,
+            student_ids,
+            hostel_ids,
+            {
+                "user_embeddings": user_embeddings,
+                "user_biases": user_biases,
+                "item_embeddings": item_embeddings,
+                "item_biases": item_biases,
+            },
+            meta,
+            recent_events=recent_events,
+        )
+        self.maybe_reload(force=True)
+        return version
+
+    def _score_shards(
+        self,
+        artifact: ModelArtifact,
+        items: np.ndarray,
+        top_n: int,
+        constraints: Optional[tuple] = None,
+        workers: int = RECOMMENDER_PREDICT_WORKERS,
+        batch_size: int = RECOMMENDATIONS_BATCH_SIZE,
+    ):
+        """Yield (first user, top item positions, scores) per block of users,
+        sharded over `workers` threads.
+
+        Threads rather than processes: the BLAS matmul and argpartition
+        release the GIL, and Celery's prefork children are daemonic, so
+        they can't start child processes of their own.
+        """
+        n = len(artifact.student_ids)
+        shards = []
+        for start in range(0, n, batch_size):
+            stop = min(start + batch_size, n)
+            shard_constraints = None
+            if constraints is not None:
+                user_gender, user_min, user_max, item_gender, item_price = constraints
+                shard_constraints = (
+                    user_gender[start:stop],
+                    user_min[start:stop],
+                    user_max[start:stop],
+                    item_gender,
+                    item_price,
+                )
+            shards.append((artifact, start, stop, items, top_n, shard_constraints))
+        if workers <= 1 or len(shards) <= 1:
+            for shard in shards:
+                yield score_shard(*shard)
+            return
+        with ThreadPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+            # map keeps shard order; rows are written as each shard arrives
+            yield from pool.map(lambda shard: score_shard(*shard), shards)
+
+    async def refresh_recommendations(
+        self, session: AsyncSession, top_n: int = RECOMMENDATIONS_TOP_N
+    ) -> dict:
+        """Rewrite the `recommendations` table from the latest trained model.
+
+        Every student is scored against every available listing, one block
+        of students per matrix multiply, with blocks spread over a thread
+        pool. The old rows are replaced in the same transaction, so readers
+        never see a half-written table.
+        """
+        artifact = self.maybe_reload(force=True)
+        if artifact is None:
+            return {"students": 0, "rows": 0}
+
+        # Fresh listing arrays aligned with the model's item index
+        listings = CandidateFilter()
+        await listings.load(session)
+        hostel_ids = artifact.hostel_ids.tolist()
+        available, item_gender, item_price = listings.item_arrays(
+            listings.align(hostel_ids)
+        )
+        items = np.flatnonzero(available)
+        item_ids = {j: UUID(hostel_ids[j]) for j in items.tolist()}
+
+        # Per-student gender/budget constraints aligned with the user index
+        # (only the filter columns: full rows would drag every embedding along)
+        s_res = await session.execute(
+            select(
+                StudentProfile.user_id,
+                StudentProfile.gender,
+                StudentProfile.budget_min,
+                StudentProfile.budget_max,
+            )
+        )
+        profiles = {str(p.user_id): p for p in s_res.all()}
+        student_ids = artifact.student_ids.tolist()
+        columns = [student_constraints(profiles.get(sid)) for sid in student_ids]
+        user_gender = np.array([c[0] for c in columns], dtype=np.int8)
+        user_min = np.array([c[1] for c in columns], dtype=np.float64)
+        user_max = np.array([c[2] for c in columns], dtype=np.float64)
+        constraints = (
+            user_gender,
+            user_min,
+            user_max,
+            item_gender[items],
+            item_price[items],
+        )
+
+        started = time.perf_counter()
+        await session.execute(delete(Recommendation))
+        written = 0
+        now = datetime.now()
+        shards = self._score_shards(artifact, items, top_n, constraints)
+        for start, top, scores in shards:
+            rows = [
+                {
+                    "id": uuid4(),
+                    "user_id": UUID(sid),
+                    "property_id": item_ids[j],
+                    "ai_score": score,
+                    "rank_position": rank,
+                    "created_at": now,
+                }
+                for sid, item_row, score_row in zip(
+                    student_ids[start:], top.tolist(), scores.tolist()
+                )
+                if sid in profiles
+                for rank, (j, score) in enumerate(zip(item_row, score_row), start=1)
+                # -inf marks a slot with no viable listing left
+                if score != float("-inf")
+            ]
+            if rows:
+                await session.execute(insert(Recommendation), rows)
+                written += len(rows)
+        await session.commit()
+
+        seconds = time.perf_counter() - started
+        stats = {
+            "version": artifact.version,
+            "students": len(student_ids),
+            "rows": written,
+            "seconds": round(seconds, 3),
+            "students_per_second": round(len(student_ids) / max(seconds, 1e-9), 1),
+        }
+        print(
+            f"Refreshed recommendations from {artifact.version}: "
+            f"{len(student_ids)} students, {written} rows in {seconds:.2f}s"
+        )
+        return stats
+
+    async def stored_recommendations(
+        self, student_id, session: AsyncSession, top_n: int = 5
+    ) -> List[Property]:
+        """Precomputed recommendations for `student_id`, best first."""
+        stmt = (
+            select(Property)
+            .join(Recommendation, Recommendation.property_id == Property.id)
+            .where(
+                Recommendation.user_id == student_id,
+                Property.is_available == True,
+            )
+            .order_by(Recommendation.rank_position)
+            .limit(top_n)
+        )
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
+
     async def recommend(
         self, student_id: str, session: AsyncSession = Depends(get_db), top_n: int = 5
     ) -> List[str]:
-        # 1. Try LightFM (Interaction-based) first
-        s_stmt = select(StudentProfile)
-        h_stmt = select(Property)
-
-        s_res = await session.execute(s_stmt)
-        h_res = await session.execute(h_stmt)
-
-        students = s_res.scalars().all()
-        hostels = h_res.scalars().all()
-        student_map = {str(s.user_id): i for i, s in enumerate(students)}
-        hostel_map = {str(h.id): j for j, h in enumerate(hostels)}
-        rev_hostel_map = {v: k for k, v in hostel_map.items()}
-
-        if student_id not in student_map:
-            # User not found in current DB snapshot, might be very new
-            pass
-        else:
-            if HAS_LIGHTFM and self.model is not None:
-                try:
-                    scores = self.model.predict(
-                        student_map[student_id], np.arange(len(hostels))
-                    )
-                    top_items = np.argsort(-scores)[:top_n]
-                    # return property ids (strings)
-                    return [rev_hostel_map[i] for i in top_items]
-                except Exception:
-                    # Model not fitted or prediction failed; fall back to embedding/popularity
-                    pass
-
-        # 2. Fallback to Embedding-based recommendation (Content-based)
-        # Fetch student profile with embedding
         stmt = select(StudentProfile).where(StudentProfile.user_id == student_id)
         result = await session.execute(stmt)
         student = result.scalars().first()
+        # Only listings this student can take (available, gender, budget)
+        # are ranked, so every returned slot is usable
+        candidates = await candidate_filter.ensure_fresh(session)
+
+        # 1. Try the trained model (Interaction-based) first
+        artifact = self.maybe_reload()
+        if artifact is not None and student_id in artifact.student_map:
+            positions = candidates.align(artifact.hostel_ids, key=artifact.version)
+            mask = candidates.mask(positions, student)
+            scores = artifact.scores_for(artifact.student_map[student_id])
+            scores = np.where(mask, scores, -np.inf)
+            top_items = [
+                i for i in top_k_indices(scores, top_n) if np.isfinite(scores[i])
+            ]
+            if top_items:
+                # return property ids (strings)
+                return [str(artifact.hostel_ids[i]) for i in top_items]
+
+        # 2. Fallback to Embedding-based recommendation (Content-based)
+        if VECTOR_BACKEND == "pgvector" and student and student.embedding is not None:
+            # Let the HNSW index rank listings, with availability, gender and
+            # budget filtered in the same query
+            distance = PropertyFeature.embedding.max_inner_product(student.embedding)
+            f_stmt = (
+                select(PropertyFeature.property_id)
+                .join(Property, Property.id == PropertyFeature.property_id)
+                .where(PropertyFeature.embedding.is_not(None), *viable_clauses(student))
+                .order_by(distance)
+                .limit(top_n)
+            )
+            await session.execute(
+                text(f"SET LOCAL hnsw.ef_search = {PGVECTOR_EF_SEARCH}")
+            )
+            f_res = await session.execute(f_stmt)
+            nearest = [str(pid) for pid in f_res.scalars().all()]
+            if nearest:
+                return nearest
+
+        elif student and student.embedding_f32:
+            # Score every listing embedding against the student in one mat-vec
+            f_stmt = select(
+                PropertyFeature.property_id, PropertyFeature.embedding_f32
+            ).where(PropertyFeature.embedding_f32.is_not(None))
+            f_res = await session.execute(f_stmt)
+            matrix = CandidateMatrix.from_blobs(f_res.all())
 
-        if student and student.embedding_vector:
-            # Fetch all properties with their feature embeddings
-            h_stmt = select(Property).options(selectinload(Property.features))
-            h_res = await session.execute(h_stmt)
-            hostels_with_features = h_res.scalars().all()
-
-            scores = []
-            for h in hostels_with_features:
-                if h.features and h.features.embedding_vector:
-                    # Calculate cosine similarity (dot product of normalized vectors)
-                    v1 = np.array(student.embedding_vector)
-                    v2 = np.array(h.features.embedding_vector)
-                    score = float(np.dot(v1, v2))
-                    scores.append((str(h.id), score))
-
-            if scores:
-                # Sort by score descending
-                scores.sort(key=lambda x: x[1], reverse=True)
-                return [pid for pid, _ in scores[:top_n]]
+            if len(matrix):
+                query = decode_embedding(student.embedding_f32)
+                mask = candidates.viable(matrix.ids, student)
+                top = matrix.top_k(query, top_n, mask=mask)
+                if top:
+                    return [str(pid) for pid, _ in top]
 
         # 3. Fallback to Popularity
-        # Stub fallback: use simple popularity of properties from recent interactions
-        i_stmt = select(InteractionEvent)
-        i_res = await session.execute(i_stmt)
-        interactions = i_res.scalars().all()
-        counts: Dict[str, int] = {}
-        for inter in interactions:
-            pid = str(inter.property_id)
-            counts[pid] = counts.get(pid, 0) + 1
-
-        # sort property ids by popularity
-        popular = sorted(counts.items(), key=lambda x: x[1], reverse=True)
-        popular_ids = [pid for pid, _ in popular]
-        # if not enough popular items, pad with available hostels
-        result = popular_ids[:top_n]
+        # Precomputed per-window ranking (see services.popularity), cached in
+        # process; the student's university first, then everyone
+        university = student.university if student else None
+        result = await popularity_cache.top(
+            session,
+            top_n,
+            university,
+            keep=lambda ids: candidates.filter_ids(ids, student),
+        )
+        # if not enough popular items, pad with hostels this student can take
         if len(result) < top_n:
-            for h in hostels:
-                hid = str(h.id)
+            pad_stmt = (
+                select(Property.id)
+                .where(*viable_clauses(student))
+                .limit(top_n + len(result))
+            )
+            pad_res = await session.execute(pad_stmt)
+            for hid in (str(pid) for pid in pad_res.scalars().all()):
                 if hid not in result:
                     result.append(hid)
                     if len(result) >= top_n:
@@ -0,0 +1,111 @@
+# Scoring engine → batch inner-product scoring and top-k selection shared by
+# search, the in-memory vector index and the content-based recommender.
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models.models import EMBEDDING_DIM
+from app.services.embedding_store import EMBEDDING_DTYPE, decode_many
+
+
+def to_matrix(vectors, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Stack embeddings into one contiguous (n, dim) float32 matrix."""
+    if len(vectors) == 0:
+        return np.empty((0, dim), dtype=np.float32)
+    mat = np.ascontiguousarray(vectors, dtype=np.float32)
+    if mat.ndim == 1:
+        mat = mat.reshape(1, -1)
+    if mat.shape[1] != dim:
+        raise ValueError(f"Embedding has dimension {mat.shape[1]}, expected {dim}")
+    return mat
+
+
+def top_k_indices(scores: np.ndarray, k: int, offset: int = 0) -> np.ndarray:
+    """Positions of the best scores ranked `offset`..`offset + k`, best first.
+
+    Only the first `offset + k` entries are fully sorted; the rest is cut
+    with `argpartition`, so this is O(n + (offset + k) log(offset + k)).
+    """
+    n = len(scores)
+    end = min(n, offset + k)
+    if end <= offset:
+        return np.empty(0, dtype=np.intp)
+    if end < n:
+        idx = np.argpartition(-scores, end - 1)[:end]
+    else:
+        idx = np.arange(n)
+    idx = idx[np.argsort(-scores[idx], kind="stable")]
+    return idx[offset:end]
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column positions of the `k` best scores in every row, best first."""
+    n, m = scores.shape
+    k = min(k, m)
+    if k <= 0:
+        return np.empty((n, 0), dtype=np.intp)
+    if k < m:
+        idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        idx = np.broadcast_to(np.arange(m), (n, m))
+    part = np.take_along_axis(scores, idx, axis=1)
+    order = np.argsort(-part, axis=1, kind="stable")
+    return np.take_along_axis(idx, order, axis=1)
+
+
+class CandidateMatrix:
+    """Candidate ids plus their embeddings as one float32 matrix."""
+
+    def __init__(self, ids: Sequence[Any], vectors, dim: int = EMBEDDING_DIM):
+        self.ids = list(ids)
+        self.matrix = to_matrix(vectors, dim)
+        self.dim = dim
+
+    @classmethod
+    def from_pairs(cls, pairs, dim: int = EMBEDDING_DIM) -> "CandidateMatrix":
+        """Build from (id, embedding) pairs, skipping empty or mis-sized rows."""
+        ids, vectors = [], []
+        for cid, vec in pairs:
+            if vec is None or len(vec) != dim:
+                continue
+            ids.append(cid)
+            vectors.append(vec)
+        return cls(ids, vectors, dim)
+
+    @classmethod
+    def from_blobs(cls, pairs, dim: int = EMBEDDING_DIM) -> "CandidateMatrix":
+        """Build from (id, `embedding_f32` bytes) pairs without parsing floats."""
+        size = dim * EMBEDDING_DTYPE.itemsize
+        ids, blobs = [], []
+        for cid, blob in pairs:
+            if blob is None or len(blob) != size:
+                continue
+            ids.append(cid)
+            blobs.append(blob)
+        # decode_many is already contiguous float32, so to_matrix won't copy
+        return cls(ids, decode_many(blobs, dim), dim)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def scores(self, query) -> np.ndarray:
+        q = np.asarray(query, dtype=np.float32).reshape(-1)
+        return self.matrix @ q
+
+    def top_k(
+        self, query, k: int, offset: int = 0, mask: Optional[np.ndarray] = None
+    ) -> List[Tuple[Any, float]]:
+        """(id, score) pairs ranked `offset`..`offset + k`, best first.
+
+        Rows where `mask` is False are excluded before selection.
+        """
+        if not self.ids:
+            return []
+        scores = self.scores(query)
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+        return [
+            (self.ids[i], float(scores[i]))
+            for i in top_k_indices(scores, k, offset)
+            if np.isfinite(scores[i])
+        ]
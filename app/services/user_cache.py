@@ -0,0 +1,166 @@
+# User cache → short-lived in-process copies of `User` rows for the auth
+# dependencies, plus per-user token revocation times.
+#
+# Entries are dropped when this process updates or deletes the user (ORM
+# events below) or revokes their tokens; changes made by other workers are
+# picked up within USER_CACHE_TTL seconds. Revocation times are also written
+# to Redis, so a logout is enforced by every worker straight away.
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import event
+
+from app.models.models import User
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+# Access token lifetime (same setting as app.auth): a revocation older than
+# this can't match any token still valid, so it is forgotten
+REVOCATION_TTL = 60 * int(os.getenv("ACCESS_EXPIRE_MINUTES", "15"))
+# Share revocations between workers through Redis ("0" keeps them per process)
+USER_REVOCATION_REDIS = os.getenv("USER_REVOCATION_REDIS", "1") == "1"
+REDIS = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+USER_REVOCATION_REDIS_TIMEOUT = float(
+    os.getenv("USER_REVOCATION_REDIS_TIMEOUT", "0.25")
+)
+# After a Redis error, check revocations locally only for this long
+USER_REVOCATION_REDIS_RETRY_SECONDS = 30.0
+
+
+def _now() -> float:
+    # the clock `iat` is stamped with (see app.auth.create_access_token)
+    return datetime.utcnow().timestamp()
+
+
+def _redis_client():
+    if not USER_REVOCATION_REDIS:
+        return None
+    try:
+        import redis.asyncio
+
+        return redis.asyncio.from_url(
+            REDIS,
+            socket_connect_timeout=USER_REVOCATION_REDIS_TIMEOUT,
+            socket_timeout=USER_REVOCATION_REDIS_TIMEOUT,
+        )
+    except Exception:
+        return None
+
+
+class UserCache:
+    """TTL cache of User objects keyed by id. Cached users are read-only."""
+
+    def __init__(
+        self,
+        size: int,
+        ttl: float,
+        redis_client=None,
+        revocation_ttl: float = REVOCATION_TTL,
+    ):
+        self.size = size
+        self.ttl = ttl
+        self.redis = redis_client
+        self.revocation_ttl = revocation_ttl
+        self._entries: Dict[UUID, Tuple[float, User]] = {}
+        # tokens issued before these times (epoch seconds) are rejected
+        self._revoked: Dict[UUID, float] = {}
+        self._redis_down_until = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: UUID) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            self._entries.pop(user_id, None)
+            self.misses += 1
+            return None
+
+    def put(self, user: User):
+        with self._lock:
+            if len(self._entries) >= self.size:
+                # evict the entry closest to expiry
+                oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                del self._entries[oldest]
+            self._entries[user.id] = (time.monotonic() + self.ttl, user)
+
+    def invalidate(self, user_id: UUID):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def _redis_key(user_id: UUID) -> str:
+        return f"revoked:{user_id}"
+
+    def _use_redis(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, err: Exception):
+        print(f"Token revocation store unavailable: {err}")
+        self._redis_down_until = time.monotonic() + USER_REVOCATION_REDIS_RETRY_SECONDS
+
+    def _remember(self, user_id: UUID, before: float):
+        with self._lock:
+            self._revoked[user_id] = max(before, self._revoked.get(user_id, 0.0))
+            # drop revocations that no unexpired token can predate
+            horizon = _now() - self.revocation_ttl
+            self._revoked = {u: b for u, b in self._revoked.items() if b > horizon}
+
+    async def revoke(self, user_id: UUID, before: float):
+        """Reject this user's tokens issued before `before` (epoch seconds)."""
+        self._remember(user_id, before)
+        self.invalidate(user_id)
+        if self._use_redis():
+            try:
+                await self.redis.set(
+                    self._redis_key(user_id),
+                    before,
+                    ex=max(int(before + self.revocation_ttl - _now()), 1),
+                )
+            except Exception as err:
+                self._redis_failed(err)
+
+    async def is_revoked(self, user_id: UUID, issued_at) -> bool:
+        issued_at = float(issued_at or 0.0)
+        before = self._revoked.get(user_id)
+        if before is not None and issued_at < before:
+            return True
+        if self._use_redis():
+            # one GET per request; revocations by other workers apply at once
+            try:
+                raw = await self.redis.get(self._redis_key(user_id))
+            except Exception as err:
+                self._redis_failed(err)
+                return False
+            if raw is not None:
+                self._remember(user_id, float(raw))
+                return issued_at < float(raw)
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revoked_users": len(self._revoked),
+        }
+
+
+user_cache = UserCache(USER_CACHE_SIZE, USER_CACHE_TTL, _redis_client())
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _drop_cached_user(mapper, connection, target):
+    user_cache.invalidate(target.id)
@@ -0,0 +1,244 @@
+# In-memory ANN index → keeps property embeddings resident in the API process so
+# search does not rescan the whole properties table on every request.
+import os
+import threading
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import EMBEDDING_DIM, Property, PropertyFeature
+from app.services.embedding_store import (
+    EMBEDDING_DTYPE,
+    decode_embedding,
+    decode_many,
+)
+from app.services.scoring import to_matrix, top_k_indices
+
+try:
+    import faiss
+
+    HAS_FAISS = True
+except Exception:
+    HAS_FAISS = False
+
+# "memory": this module's in-process index; "pgvector": ORDER BY embedding <#> :q
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "memory")
+VECTOR_INDEX_HNSW_M = int(os.getenv("VECTOR_INDEX_HNSW_M", "32"))
+VECTOR_INDEX_EF_SEARCH = int(os.getenv("VECTOR_INDEX_EF_SEARCH", "128"))
+VECTOR_INDEX_USE_FAISS = os.getenv("VECTOR_INDEX_USE_FAISS", "1") == "1"
+# Rebuild once superseded/removed rows exceed this fraction of all rows
+VECTOR_INDEX_MAX_STALE = float(os.getenv("VECTOR_INDEX_MAX_STALE", "0.2"))
+# pgvector HNSW candidate list size; raise it when filters discard many neighbours
+PGVECTOR_EF_SEARCH = int(os.getenv("PGVECTOR_EF_SEARCH", "100"))
+
+
+class VectorIndex:
+    """Inner-product top-k index over property embeddings.
+
+    Uses a FAISS HNSW graph when FAISS is installed, otherwise an exact
+    NumPy scan over a contiguous float32 matrix. Row positions are mapped
+    back to property ids (strings) on the way out.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM, use_faiss: Optional[bool] = None):
+        self.dim = dim
+        self.use_faiss = (
+            HAS_FAISS and VECTOR_INDEX_USE_FAISS if use_faiss is None else use_faiss
+        )
+        self.ready = False
+        self.watermark: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._ids: List[str] = []
+        self._positions = {}  # property id -> live row position
+        self._stale = set()  # row positions superseded by a later upsert
+        if self.use_faiss:
+            self._faiss = faiss.IndexHNSWFlat(
+                self.dim, VECTOR_INDEX_HNSW_M, faiss.METRIC_INNER_PRODUCT
+            )
+            self._faiss.hnsw.efSearch = VECTOR_INDEX_EF_SEARCH
+        else:
+            self._matrix = np.empty((0, self.dim), dtype=np.float32)
+            self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def _as_matrix(self, vectors) -> np.ndarray:
+        return to_matrix(vectors, self.dim)
+
+    def _vectors(self, positions: Sequence[int]) -> np.ndarray:
+        if self.use_faiss:
+            out = np.empty((len(positions), self.dim), dtype=np.float32)
+            for i, pos in enumerate(positions):
+                out[i] = self._faiss.reconstruct(int(pos))
+            return out
+        return self._matrix[np.asarray(positions, dtype=np.intp)]
+
+    def _maybe_compact(self):
+        """Rebuild from the live rows once stale rows make up too much of the
+        index, so `search` doesn't over-fetch past an ever-growing `_stale`."""
+        if len(self._stale) <= VECTOR_INDEX_MAX_STALE * len(self._ids):
+            return
+        live = sorted(self._positions.items(), key=lambda item: item[1])
+        mat = self._vectors([pos for _, pos in live])
+        self._reset()
+        if live:
+            self._append([pid for pid, _ in live], mat)
+
+    def _append(self, ids: Sequence[str], mat: np.ndarray):
+        start = len(self._ids)
+        for offset, pid in enumerate(ids):
+            old = self._positions.get(pid)
+            if old is not None:
+                self._stale.add(old)
+            self._positions[pid] = start + offset
+        self._ids.extend(ids)
+
+        if self.use_faiss:
+            self._faiss.add(mat)
+            return
+
+        needed = self._size + len(mat)
+        if needed > len(self._matrix):
+            # grow geometrically so incremental adds stay amortised O(1)
+            grown = np.empty(
+                (max(needed, 2 * len(self._matrix), 64), self.dim), np.float32
+            )
+            grown[: self._size] = self._matrix[: self._size]
+            self._matrix = grown
+        self._matrix[self._size : needed] = mat
+        self._size = needed
+
+    def build(self, ids: Sequence[str], vectors) -> None:
+        """Replace the index contents with `ids`/`vectors`."""
+        ids = [str(i) for i in ids]
+        mat = self._as_matrix(vectors)
+        with self._lock:
+            self._reset()
+            if ids:
+                self._append(ids, mat)
+            self.ready = True
+
+    def add(self, property_id, vector) -> bool:
+        """Insert or replace a single property embedding.
+
+        Returns False (and changes nothing) when `property_id` is already
+        indexed with this vector, e.g. a listing this worker added itself
+        coming back through `refresh_vector_index`.
+        """
+        pid = str(property_id)
+        mat = self._as_matrix(vector)
+        with self._lock:
+            pos = self._positions.get(pid)
+            if pos is not None and np.array_equal(self._vectors([pos])[0], mat[0]):
+                return False
+            self._append([pid], mat)
+            self._maybe_compact()
+            return True
+
+    def remove(self, property_id) -> None:
+        with self._lock:
+            pos = self._positions.pop(str(property_id), None)
+            if pos is not None:
+                self._stale.add(pos)
+                self._maybe_compact()
+
+    def stats(self) -> dict:
+        return {
+            "live": len(self._positions),
+            "rows": len(self._ids),
+            "stale": len(self._stale),
+            "faiss": self.use_faiss,
+        }
+
+    def search(self, query, k: int) -> List[Tuple[str, float]]:
+        """Return up to `k` (property_id, score) pairs, best first."""
+        q = self._as_matrix(query)
+        with self._lock:
+            total = len(self._ids)
+            if total == 0 or k <= 0:
+                return []
+            # over-fetch so superseded/removed rows don't eat into k
+            fetch = min(total, k + len(self._stale))
+
+            if self.use_faiss:
+                scores, rows = self._faiss.search(q, fetch)
+                scores, rows = scores[0], rows[0]
+            else:
+                all_scores = self._matrix[: self._size] @ q[0]
+                rows = top_k_indices(all_scores, fetch)
+                scores = all_scores[rows]
+
+            hits = []
+            for row, score in zip(rows, scores):
+                if row < 0 or row in self._stale:
+                    continue
+                hits.append((self._ids[row], float(score)))
+                if len(hits) >= k:
+                    break
+            return hits
+
+
+vector_index = VectorIndex()
+
+
+def _feature_stmt(since: Optional[datetime] = None):
+    stmt = (
+        select(
+            PropertyFeature.property_id,
+            PropertyFeature.embedding_f32,
+            Property.created_at,
+        )
+        .join(Property, Property.id == PropertyFeature.property_id)
+        .where(PropertyFeature.embedding_f32.is_not(None))
+    )
+    if since is not None:
+        stmt = stmt.where(Property.created_at > since)
+    return stmt
+
+
+def _valid_rows(rows, dim: int):
+    size = dim * EMBEDDING_DTYPE.itemsize
+    return [r for r in rows if r.embedding_f32 and len(r.embedding_f32) == size]
+
+
+async def load_vector_index(
+    session: AsyncSession, index: VectorIndex = vector_index
+) -> int:
+    """Build `index` from every stored property embedding. Returns its size."""
+    result = await session.execute(_feature_stmt())
+    rows = _valid_rows(result.all(), index.dim)
+
+    index.build(
+        [r.property_id for r in rows],
+        decode_many([r.embedding_f32 for r in rows], index.dim),
+    )
+    index.watermark = max((r.created_at for r in rows if r.created_at), default=None)
+    return len(index)
+
+
+async def refresh_vector_index(
+    session: AsyncSession, index: VectorIndex = vector_index
+) -> int:
+    """Add properties created since the last load (e.g. by another worker).
+
+    Returns how many were new; listings already indexed by this worker are
+    skipped by `VectorIndex.add`.
+    """
+    if not index.ready:
+        return await load_vector_index(session, index)
+
+    result = await session.execute(_feature_stmt(index.watermark))
+    rows = _valid_rows(result.all(), index.dim)
+    added = 0
+    for r in rows:
+        added += index.add(r.property_id, decode_embedding(r.embedding_f32))
+        if r.created_at and (index.watermark is None or r.created_at > index.watermark):
+            index.watermark = r.created_at
+    return added
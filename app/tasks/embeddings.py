@@ -0,0 +1,10 @@
+from app.celery_app import celery
+from app.db.session import run_async
+from app.services.embedding_store import backfill_embeddings as backfill
+
+
+@celery.task(name="app.tasks.embeddings.backfill_embeddings")
+def backfill_embeddings(batch_size: int = 1000):
+    """One-shot: convert legacy JSON embeddings to normalised float32 bytes."""
+    counts = run_async(lambda session: backfill(session, batch_size=batch_size))
+    return {"updated": counts}
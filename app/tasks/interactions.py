@@ -0,0 +1,25 @@
+from app.celery_app import celery
+from app.db.session import run_async
+from app.services.interaction_retention import (
+    drop_expired_partitions,
+    ensure_partitions,
+    roll_up_recent,
+)
+
+
+@celery.task(name="app.tasks.interactions.maintain_partitions")
+def maintain_partitions():
+    """Create the upcoming monthly interaction partitions."""
+    return run_async(ensure_partitions)
+
+
+@celery.task(name="app.tasks.interactions.roll_up_interactions")
+def roll_up_interactions():
+    """Refresh the daily interaction rollup for the last few days."""
+    return run_async(roll_up_recent)
+
+
+@celery.task(name="app.tasks.interactions.prune_interactions")
+def prune_interactions():
+    """Drop raw interaction partitions past the retention window."""
+    return run_async(drop_expired_partitions)
@@ -0,0 +1,10 @@
+from app.celery_app import celery
+from app.db.session import run_async
+from app.services.popularity import refresh_popularity as _refresh_popularity
+
+
+@celery.task(name="app.tasks.popularity.refresh_popularity")
+def refresh_popularity():
+    """Recompute the 24h/7d/30d popularity rankings."""
+    # rows written per "<window>/<all|university>"
+    return run_async(_refresh_popularity)
@@ -1,11 +1,41 @@
 from app.celery_app import celery
-from app.db.session import get_db
+from app.db.session import run_async
 from app.services.recommender import RecommenderService
 
 
+def _published_meta(recommender: RecommenderService) -> dict:
+    return recommender.artifact.meta if recommender.artifact is not None else {}
+
+
 @celery.task(name="app.tasks.recommender.train_recommender")
 def train_recommender():
     recommender = RecommenderService()
-    with next(get_db()) as session:
-        ok = recommender.train(session)
-        return "✅ Training complete" if ok else "⚠️ No data to train yet"
+    # train() publishes a new model version that API workers hot-reload
+    ok = run_async(recommender.train)
+    if not ok:
+        return "⚠️ No data to train yet"
+    refresh_recommendations.delay()
+    # manifest of the published version: timing, throughput, watermark
+    return {"status": "✅ Training complete", **_published_meta(recommender)}
+
+
+@celery.task(name="app.tasks.recommender.train_recommender_incremental")
+def train_recommender_incremental():
+    """Warm-start the latest model on interactions since its watermark."""
+    recommender = RecommenderService()
+    ok = run_async(recommender.train_incremental)
+    if not ok:
+        return "No new interactions"
+    refresh_recommendations.delay()
+    return {
+        "status": "✅ Incremental training complete",
+        **_published_meta(recommender),
+    }
+
+
+@celery.task(name="app.tasks.recommender.refresh_recommendations")
+def refresh_recommendations():
+    """Rewrite the precomputed top-N table from the latest model version."""
+    recommender = RecommenderService()
+    # version, students, rows, seconds and students_per_second
+    return run_async(recommender.refresh_recommendations)
@@ -0,0 +1,122 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from uuid import uuid4
+
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.services.bulk_import import import_listings, parse_listings
+
+LANDLORD = uuid4()
+
+
+class FakeSession:
+    """Answers the title and landlord lookups; fails chosen inserts."""
+
+    def __init__(self, bad_titles=()):
+        self.bad_titles = set(bad_titles)
+        self.lookups = [[], [LANDLORD]]  # existing titles, known landlords
+        self.inserted = []
+        self.commits = 0
+
+    async def execute(self, stmt, rows=None):
+        if rows is None:
+            found = self.lookups.pop(0)
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: found))
+        titles = {r["title"] for r in rows if "title" in r}
+        if len(rows) > 1 and self.bad_titles & titles:
+            raise IntegrityError("INSERT", {}, Exception("fk violation"))
+        if titles & {"Bad price"}:
+            raise DataError("INSERT", {}, Exception("numeric out of range"))
+        if titles & self.bad_titles:
+            raise IntegrityError("INSERT", {}, Exception("fk violation"))
+        self.inserted.extend(r["title"] for r in rows if "title" in r)
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        yield
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        pass
+
+
+async def embed_many(texts):
+    return [[0.0] * 384 for _ in texts]
+
+
+def run_import(lines, session):
+    records = parse_listings("\n".join(lines), "jsonl")
+    return asyncio.run(import_listings(session, records, embed_many, LANDLORD))
+
+
+def test_one_bad_row_does_not_sink_its_chunk():
+    session = FakeSession(bad_titles={"Bad price", "Broken"})
+    report = run_import(
+        [
+            '{"title": "Ok 1", "price": 1000}',
+            '{"title": "Bad price", "price": 1000}',
+            '{"title": "Ok 2", "price": 1000}',
+            '{"title": "Broken", "price": 1000}',
+        ],
+        session,
+    )
+
+    assert session.inserted == ["Ok 1", "Ok 2"]
+    assert report["created"] == 2
+    assert [(e["row"], e["title"]) for e in report["errors"]] == [
+        (2, "Bad price"),
+        (4, "Broken"),
+    ]
+    assert all("Could not add property" in e["error"] for e in report["errors"])
+
+
+def test_unknown_landlord_is_reported_before_insert():
+    session = FakeSession()
+    other = uuid4()
+    report = run_import(
+        [
+            '{"title": "Mine", "price": 1000}',
+            f'{{"title": "Theirs", "price": 1000, "landlord_id": "{other}"}}',
+        ],
+        session,
+    )
+
+    assert session.inserted == ["Mine"]
+    assert report["errors"] == [
+        {"row": 2, "title": "Theirs", "error": "Landlord not found"}
+    ]
+
+
+def test_parse_reports_bad_lines_and_drops_blank_cells():
+    jsonl = list(parse_listings('{"title": "A"}\n\nnot json\n[1, 2]\n', "jsonl"))
+    assert [(row, error[:12]) for row, _, error in jsonl] == [
+        (1, ""),
+        (2, "Invalid JSON"),
+        (3, "Each line mu"),
+    ]
+
+    csv_rows = list(parse_listings("title,price,type\nA,1000,\n", "csv"))
+    assert csv_rows == [(1, {"title": "A", "price": "1000"}, "")]
+
+
+def test_duplicate_and_existing_titles_are_rejected_per_row():
+    session = FakeSession()
+    session.lookups = [["Taken"], [LANDLORD]]
+    report = run_import(
+        [
+            '{"title": "New", "price": 1000}',
+            '{"title": "New", "price": 2000}',
+            '{"title": "Taken", "price": 1000}',
+            '{"price": 1000}',
+        ],
+        session,
+    )
+
+    assert session.inserted == ["New"]
+    errors = {e["row"]: e["error"] for e in report["errors"]}
+    assert errors[2] == "Duplicate title in file"
+    assert "already exists" in errors[3]
+    assert 4 in errors
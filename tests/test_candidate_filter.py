@@ -0,0 +1,101 @@
+import asyncio
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+from sqlalchemy import and_
+from sqlalchemy.dialects import postgresql
+
+from app.services.candidate_filter import (
+    CandidateFilter,
+    viable_clauses,
+    viable_matrix,
+)
+
+
+def student(gender=None, budget_min=None, budget_max=None):
+    return SimpleNamespace(gender=gender, budget_min=budget_min, budget_max=budget_max)
+
+
+def sql(clauses) -> str:
+    return str(
+        and_(*clauses).compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+
+
+def test_viable_clauses_without_constraints_only_require_availability():
+    assert sql(viable_clauses(None)) == "properties.is_available = true"
+    assert sql(viable_clauses(student())) == "properties.is_available = true"
+
+
+def test_viable_clauses_filter_gender_and_budget():
+    where = sql(viable_clauses(student(" Female ", 100, 500)))
+
+    assert "lower(trim(properties.gender_restriction)) = 'female'" in where
+    assert "properties.gender_restriction IS NULL" in where
+    assert "properties.price >= 100.0" in where
+    assert "properties.price <= 500.0" in where
+
+
+def test_viable_matrix_ignores_unknown_values():
+    nan = np.nan
+    viable = viable_matrix(
+        user_gender=np.array([0, 1, 2]),
+        user_min=np.array([nan, 200.0, nan]),
+        user_max=np.array([nan, 400.0, 300.0]),
+        item_gender=np.array([0, 1, 2, 0]),
+        item_price=np.array([100.0, 300.0, 250.0, nan]),
+    )
+    assert viable.tolist() == [
+        [True, True, True, True],
+        [False, True, False, True],
+        [True, False, True, True],
+    ]
+
+
+def loaded_filter():
+    cf = CandidateFilter()
+    cf.update("a", True, "Male", 300)
+    cf.update("b", False, None, 100)
+    cf.update("c", True, None, None)
+    cf.update("d", True, "female", 900)
+    return cf
+
+
+def test_filter_ids_keeps_viable_listings_in_order():
+    cf = loaded_filter()
+
+    assert cf.ready
+    assert cf.filter_ids(["d", "c", "b", "a", "zz"]) == ["d", "c", "a"]
+    assert cf.filter_ids(["d", "c", "a"], student("female", None, 500)) == ["c"]
+    assert cf.filter_ids(["d", "c", "a"], student("male", 200, None)) == ["c", "a"]
+
+
+def test_updates_invalidate_cached_alignments():
+    cf = loaded_filter()
+    ids = ["c", "a", "new"]
+    first = cf.align(ids, key="model")
+
+    assert first.tolist() == [2, 0, -1]
+    assert cf.align(ids, key="model") is first
+    cf.update("new", True)
+    assert cf.align(ids, key="model").tolist() == [2, 0, 4]
+    assert cf.viable(ids, key="model").tolist() == [True, True, True]
+
+
+def test_reload_comes_from_the_database_when_stale():
+    rows = [("p1", True, "male", Decimal("250.00")), ("p2", None, None, None)]
+
+    class Session:
+        async def execute(self, stmt):
+            return SimpleNamespace(all=lambda: rows)
+
+    cf = loaded_filter()
+    cf.invalidate()
+    asyncio.run(cf.ensure_fresh(Session()))
+
+    assert cf.ids == ["p1", "p2"]
+    assert cf.price[0] == 250.0 and np.isnan(cf.price[1])
+    assert cf.filter_ids(["p1", "p2", "a"]) == ["p1"]
@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("tokenizers")
+SentenceTransformer = pytest.importorskip("sentence_transformers").SentenceTransformer
+
+from app.services.onnx_embedder import OnnxEmbedder, export_onnx
+
+QUERIES = [
+    "self contain near unilag",
+    "cheap hostel",
+    "Two bedroom flat with 24 hour light and water, close to the main gate",
+    "",
+]
+
+
+@pytest.fixture(scope="module")
+def onnx_dir(tmp_path_factory):
+    path = os.getenv("EMBEDDING_ONNX_PATH")
+    if path and os.path.exists(path):
+        return path
+    return export_onnx("all-MiniLM-L6-v2", str(tmp_path_factory.mktemp("onnx")))
+
+
+@pytest.fixture(scope="module")
+def torch_embeddings():
+    return SentenceTransformer("all-MiniLM-L6-v2").encode(QUERIES)
+
+
+def test_onnx_fp32_matches_torch(onnx_dir, torch_embeddings):
+    onnx = OnnxEmbedder(onnx_dir, quantized=False).encode(QUERIES)
+    assert onnx.shape == torch_embeddings.shape == (len(QUERIES), 384)
+    assert np.allclose(onnx, torch_embeddings, atol=1e-4)
+
+
+def test_onnx_int8_close_to_torch(onnx_dir, torch_embeddings):
+    onnx = OnnxEmbedder(onnx_dir, quantized=True).encode(QUERIES)
+    assert onnx.shape == (len(QUERIES), 384)
+    cosine = (onnx * torch_embeddings).sum(axis=1)
+    assert cosine.min() > 0.98
+
+
+def test_onnx_single_string_is_one_vector(onnx_dir):
+    vec = OnnxEmbedder(onnx_dir).encode("cheap hostel")
+    assert vec.shape == (384,)
+    assert np.isclose(np.linalg.norm(vec), 1.0, atol=1e-5)
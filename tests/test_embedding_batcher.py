@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from app.services.embedding_batcher import EmbeddingBatcher
+
+
+def make_batcher(**kwargs):
+    calls = []
+
+    async def encode_many(texts):
+        calls.append(list(texts))
+        await asyncio.sleep(0)
+        return [[float(len(t))] for t in texts]
+
+    return EmbeddingBatcher(encode_many, **kwargs), calls
+
+
+def test_concurrent_calls_share_one_encode():
+    batcher, calls = make_batcher(max_batch_size=8, max_wait_ms=20)
+
+    async def main():
+        vectors = await asyncio.gather(*(batcher.embed("x" * n) for n in range(1, 6)))
+        await batcher.stop()
+        return vectors
+
+    assert asyncio.run(main()) == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert calls == [["x", "xx", "xxx", "xxxx", "xxxxx"]]
+    assert batcher.pending == 0
+    assert batcher.stats()["avg_batch_size"] == 5.0
+
+
+def test_full_batches_are_dispatched_early():
+    batcher, calls = make_batcher(max_batch_size=2, max_wait_ms=1000)
+
+    async def main():
+        await asyncio.wait_for(
+            asyncio.gather(*(batcher.embed(t) for t in "abcde")), timeout=5
+        )
+        await batcher.stop()
+
+    asyncio.run(main())
+    assert [len(c) for c in calls[:2]] == [2, 2]
+    assert sum(calls, []) == list("abcde")
+
+
+def test_encode_errors_reach_every_caller():
+    async def encode_many(texts):
+        raise ValueError("model exploded")
+
+    batcher = EmbeddingBatcher(encode_many, max_batch_size=4, max_wait_ms=5)
+
+    async def main():
+        results = await asyncio.gather(
+            batcher.embed("a"), batcher.embed("b"), return_exceptions=True
+        )
+        await batcher.stop()
+        return results
+
+    assert all(isinstance(r, ValueError) for r in asyncio.run(main()))
+
+
+def test_stop_fails_callers_still_waiting():
+    async def main():
+        gate = asyncio.Event()  # never set: encodes hang until stop()
+
+        async def encode_many(texts):
+            await gate.wait()
+
+        batcher = EmbeddingBatcher(encode_many, max_batch_size=1, max_wait_ms=0)
+        waiting = [asyncio.ensure_future(batcher.embed(t)) for t in "ab"]
+        await asyncio.sleep(0.01)
+        await batcher.stop()
+        with pytest.raises(RuntimeError, match="stopped"):
+            await asyncio.gather(*waiting)
+
+    asyncio.run(main())
+
+
+def test_batches_encode_in_parallel_up_to_max_concurrency():
+    running, peak = [0], [0]
+
+    async def encode_many(texts):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.02)
+        running[0] -= 1
+        return [[0.0] for _ in texts]
+
+    batcher = EmbeddingBatcher(
+        encode_many, max_batch_size=1, max_wait_ms=0, max_concurrency=2
+    )
+
+    async def main():
+        await asyncio.gather(*(batcher.embed(t) for t in "abcdef"))
+        await batcher.stop()
+
+    asyncio.run(main())
+    assert peak[0] == 2
+    assert batcher.stats()["batches"] == 6
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.main import embedding_busy
+from app.services import embeddings
+from app.services.embeddings import (
+    EMBEDDING_MAX_PENDING,
+    EmbeddingBusy,
+    EmbeddingService,
+)
+
+
+def test_aembed_raises_embedding_busy_when_saturated():
+    service = EmbeddingService()
+    service.pending = EMBEDDING_MAX_PENDING
+    with pytest.raises(EmbeddingBusy):
+        asyncio.run(service.aembed("cheap hostel"))
+    assert service.stats()["rejected"] == 1
+
+
+def test_back_pressure_applies_without_micro_batching(monkeypatch):
+    """EMBEDDING_BATCH_SIZE=1 in thread mode bypasses the batcher."""
+    monkeypatch.setattr(embeddings, "EMBEDDING_MAX_PENDING", 2)
+    service = EmbeddingService()
+    service.batcher.max_batch_size = 1
+    release = threading.Event()
+
+    def embed(text):
+        release.wait(5)
+        return [0.0]
+
+    monkeypatch.setattr(service, "embed", embed)
+
+    async def main():
+        running = [asyncio.ensure_future(service.aembed(t)) for t in "ab"]
+        await asyncio.sleep(0.05)
+        with pytest.raises(EmbeddingBusy):
+            await service.aembed("c")
+        release.set()
+        return await asyncio.gather(*running)
+
+    assert asyncio.run(main()) == [[0.0], [0.0]]
+    assert service.pending == 0
+
+
+def test_embedding_busy_maps_to_503():
+    response = asyncio.run(embedding_busy(None, EmbeddingBusy("busy")))
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+class FakeModel:
+    def encode(self, texts, batch_size):
+        return np.array([[float(len(t))] for t in texts])
+
+
+def test_model_is_loaded_once_across_threads(monkeypatch):
+    loads = []
+
+    def load_model(name):
+        loads.append(name)
+        time.sleep(0.05)
+        return FakeModel()
+
+    monkeypatch.setattr(embeddings, "_load_model", load_model)
+    service = EmbeddingService(model_name="tiny")
+    assert service.state == "not_loaded"
+
+    with ThreadPoolExecutor(4) as pool:
+        vectors = list(pool.map(service.embed, ["a", "bb", "ccc", "dddd"]))
+
+    assert loads == ["tiny"]
+    assert service.ready
+    assert vectors == [[1.0], [2.0], [3.0], [4.0]]
+
+
+def test_failed_load_is_reported(monkeypatch):
+    def load_model(name):
+        raise OSError("no weights")
+
+    monkeypatch.setattr(embeddings, "_load_model", load_model)
+    service = EmbeddingService()
+
+    with pytest.raises(OSError):
+        service.load()
+    assert service.state == "failed" and service.error == "no weights"
@@ -0,0 +1,46 @@
+import numpy as np
+
+from app.services.embedding_store import (
+    decode_embedding,
+    decode_many,
+    embedding_columns,
+    encode_embedding,
+    normalize,
+)
+from app.services.scoring import CandidateMatrix
+
+
+def test_encode_round_trips_as_unit_float32():
+    blob = encode_embedding([3.0, 4.0])
+    vec = decode_embedding(blob)
+
+    assert len(blob) == 8
+    assert vec.dtype == np.dtype("<f4")
+    assert np.allclose(vec, [0.6, 0.8])
+    assert not vec.flags.writeable
+
+
+def test_zero_vector_stays_zero():
+    assert normalize([0.0, 0.0]).tolist() == [0.0, 0.0]
+
+
+def test_decode_many_stacks_blobs():
+    blobs = [encode_embedding([1, 0]), encode_embedding([0, 2])]
+
+    assert decode_many(blobs, dim=2).tolist() == [[1.0, 0.0], [0.0, 1.0]]
+    assert decode_many([], dim=2).shape == (0, 2)
+
+
+def test_embedding_columns_agree():
+    columns = embedding_columns([0.0, 5.0])
+
+    assert columns["embedding"].tolist() == [0.0, 1.0]
+    assert columns["embedding_f32"] == encode_embedding([0.0, 5.0])
+
+
+def test_candidate_matrix_from_blobs_skips_mis_sized_rows():
+    pairs = [("a", encode_embedding([1, 1])), ("b", b"short"), ("c", None)]
+    matrix = CandidateMatrix.from_blobs(pairs, dim=2)
+
+    assert matrix.ids == ["a"]
+    assert np.allclose(matrix.matrix, [[0.70710677, 0.70710677]])
@@ -0,0 +1,57 @@
+import asyncio
+import zlib
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services.feature_matrix import FeatureBuilder, _keys, _words, item_features
+
+BUCKETS = 64
+
+
+def bucket(prefix, value):
+    return zlib.crc32(f"{prefix}={value}".encode()) % BUCKETS
+
+
+def test_rows_are_normalised_with_identity_columns_last():
+    builder = FeatureBuilder(3, BUCKETS)
+    builder.add([0, 1, 2], ["Hostel", None, "hostel"], "type")
+    mat = builder.build()
+
+    assert mat.shape == (3, BUCKETS + 3)
+    assert np.allclose(mat.sum(axis=1), 1.0)
+    assert mat[0, bucket("type", "hostel")] == mat[2, bucket("type", "hostel")] == 0.5
+    assert mat[1, BUCKETS + 1] == 1.0  # no attributes: identity only
+
+
+def test_lists_and_buckets():
+    builder = FeatureBuilder(2, BUCKETS)
+    builder.add_lists([0, 1], [["wifi", "gym"], []], "amenity")
+    builder.add_buckets([0, 1], [None, 120.0], "price", edges=np.array([100.0, 200.0]))
+    mat = builder.build().toarray()
+
+    assert mat[0, bucket("amenity", "wifi")] > 0
+    assert mat[0, bucket("amenity", "gym")] > 0
+    assert mat[1, bucket("price", 1)] == 0.5
+    assert np.count_nonzero(mat[1]) == 2
+
+
+def test_amenities_and_locations_are_tokenised():
+    assert _keys({"wifi": True, "pool": False}) == ["wifi"]
+    assert _keys(["wifi", "gym"]) == ["wifi", "gym"]
+    assert _keys(None) == []
+    assert _words("Akoka, Yaba-Lagos") == ["akoka", "yaba", "lagos"]
+
+
+def test_unregistered_listings_keep_their_identity_rows():
+    rows = [(1, 150000, "hostel", "female", "Yaba", "yearly", "full", {"wifi": 1})]
+
+    class Session:
+        async def execute(self, stmt):
+            return SimpleNamespace(all=lambda: rows)
+
+    mat = asyncio.run(item_features(Session(), n_items=3, buckets=BUCKETS))
+    assert mat.shape == (3, BUCKETS + 3)
+    # seven attributes plus the identity column share the row's weight
+    assert mat[1, BUCKETS + 1] == 1 / 8
+    assert mat[0, BUCKETS] == 1.0 and mat[2, BUCKETS + 2] == 1.0
@@ -0,0 +1,39 @@
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.services.id_registry import PROPERTY, STUDENT, registry_ids, sync_registry
+
+
+class FakeSession:
+    def __init__(self, rowcounts=(), ids=()):
+        self.rowcounts = list(rowcounts)
+        self.ids = list(ids)
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return SimpleNamespace(
+            rowcount=self.rowcounts.pop(0) if self.rowcounts else None,
+            scalars=lambda: SimpleNamespace(all=lambda: self.ids),
+        )
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_sync_locks_then_inserts_each_kind_once():
+    session = FakeSession(rowcounts=[None, 3, 1])
+
+    assert asyncio.run(sync_registry(session)) == {STUDENT: 3, PROPERTY: 1}
+    assert "LOCK TABLE id_registry" in str(session.statements[0])
+    assert len(session.statements) == 3
+    assert session.commits == 1
+
+
+def test_registry_ids_are_strings_in_index_order():
+    ids = [uuid4(), uuid4()]
+    session = FakeSession(ids=ids)
+
+    assert asyncio.run(registry_ids(session, STUDENT)) == [str(i) for i in ids]
@@ -0,0 +1,104 @@
+import asyncio
+from uuid import UUID, uuid4
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.interaction_buffer import (
+    InteractionBuffer,
+    interaction_insert,
+    interaction_row,
+)
+
+USER, LISTING = uuid4(), uuid4()
+
+
+class FakeWriter:
+    """Stands in for `write_interactions`; fails the first `failures` calls."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.batches = []
+
+    async def __call__(self, rows):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database unavailable")
+        self.batches.append([r["event_type"] for r in rows])
+        return len(rows)
+
+
+def test_rows_get_ids_and_parsed_uuids():
+    row = interaction_row(str(USER), LISTING, "view")
+
+    assert isinstance(row["id"], UUID)
+    assert row["user_id"] == USER and row["property_id"] == LISTING
+    assert row["created_at"] is not None
+
+
+def test_retried_rows_are_skipped_on_conflict():
+    sql = str(interaction_insert().compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (id, created_at) DO NOTHING" in sql
+
+
+def test_full_batches_flush_without_waiting():
+    writer = FakeWriter()
+    buffer = InteractionBuffer(writer, flush_size=3, flush_ms=60_000)
+
+    async def main():
+        for i in range(6):
+            await buffer.log(USER, LISTING, f"e{i}")
+        for _ in range(100):
+            if len(writer.batches) == 2:
+                break
+            await asyncio.sleep(0.01)
+        await buffer.stop()
+
+    asyncio.run(main())
+    assert writer.batches == [["e0", "e1", "e2"], ["e3", "e4", "e5"]]
+    assert buffer.stats()["written"] == 6
+
+
+def test_partial_batch_flushes_once_it_ages_out():
+    writer = FakeWriter()
+    buffer = InteractionBuffer(writer, flush_size=100, flush_ms=20)
+
+    async def main():
+        await buffer.log(USER, LISTING, "view")
+        await asyncio.sleep(0.2)
+        flushed = list(writer.batches)
+        await buffer.stop()
+        return flushed
+
+    assert asyncio.run(main()) == [["view"]]
+
+
+def test_failed_flush_is_retried_with_the_same_batch():
+    writer = FakeWriter(failures=1)
+    buffer = InteractionBuffer(writer, flush_size=2, flush_ms=5, retry_max_seconds=1)
+
+    async def main():
+        await buffer.log(USER, LISTING, "save")
+        await buffer.log(USER, LISTING, "apply")
+        for _ in range(200):
+            if writer.batches:
+                break
+            await asyncio.sleep(0.01)
+        await buffer.stop()
+
+    asyncio.run(main())
+    assert writer.batches == [["save", "apply"]]
+    assert buffer.stats()["flush_errors"] == 1
+
+
+def test_stop_drains_everything_still_queued():
+    writer = FakeWriter()
+    buffer = InteractionBuffer(writer, flush_size=2, flush_ms=60_000)
+
+    async def main():
+        for i in range(5):
+            await buffer.log(USER, LISTING, f"e{i}")
+        await buffer.stop()
+
+    asyncio.run(main())
+    assert sum(writer.batches, []) == [f"e{i}" for i in range(5)]
+    assert all(len(batch) <= 2 for batch in writer.batches)
@@ -0,0 +1,142 @@
+from datetime import datetime
+from uuid import uuid4
+
+import numpy as np
+import pytest
+from sqlalchemy import and_, create_engine, text
+from sqlalchemy.dialects import postgresql
+
+from app.services.interaction_matrix import (
+    InteractionArrays,
+    event_weights,
+    since_cutoff,
+    incremental_clauses,
+    weighted_matrix,
+)
+
+
+def fetch_rows(sql):
+    """Real SQLAlchemy Row objects, as `stream_interactions` passes them."""
+    with create_engine("sqlite://").connect() as conn:
+        return conn.execute(text(sql)).fetchall()
+
+
+def test_extend_accepts_sqlalchemy_rows():
+    rows = fetch_rows(
+        "SELECT 1, 2, 'view', 1.5, 'e1' UNION ALL SELECT 3, 4, NULL, 2.5, 'e2'"
+        " UNION ALL SELECT 0, 1, 'view', 3.5, 'e3'"
+    )
+    arrays = InteractionArrays()
+    arrays.extend(rows)
+
+    assert len(arrays) == 3
+    assert arrays.view("rows").tolist() == [1, 3, 0]
+    assert arrays.view("cols").tolist() == [2, 4, 1]
+    assert arrays.view("timestamps").tolist() == [1.5, 2.5, 3.5]
+    events = [arrays.event_types[c] for c in arrays.view("events")]
+    assert events == ["view", "", "view"]
+    assert arrays.watermark() == 3.5
+
+
+def test_extend_grows_past_capacity():
+    arrays = InteractionArrays(capacity=0)
+    chunk = [(i, i + 1, "click", float(i), i) for i in range(1500)]
+    arrays.extend(chunk[:1000])
+    arrays.extend(chunk[1000:])
+
+    assert len(arrays) == 1500
+    assert np.array_equal(arrays.view("rows"), np.arange(1500))
+    assert arrays.event_mask(["click"]).all()
+
+
+def test_incremental_cutoff_rereads_behind_the_watermark():
+    watermark = datetime(2026, 3, 1, 12, 0, 0).timestamp()
+    expected = datetime.utcfromtimestamp(watermark - 600)
+    assert since_cutoff(watermark, lag=600) == expected
+    assert since_cutoff(watermark, lag=0) == datetime.utcfromtimestamp(watermark)
+
+
+DAY = 86400.0
+NOW = 100 * DAY
+
+
+def arrays_of(*events):
+    arrays = InteractionArrays()
+    arrays.extend([event + (uuid4(),) for event in events])
+    return arrays
+
+
+def dense(arrays, **kwargs):
+    kwargs.setdefault("weights", {"apply": 2.0, "view": 0.5, "skip": 0.0})
+    kwargs.setdefault("default", 1.0)
+    kwargs.setdefault("as_of", NOW)
+    return weighted_matrix(arrays, (2, 3), **kwargs).toarray()
+
+
+def test_event_weights_fall_back_to_the_default():
+    arrays = arrays_of((0, 0, "apply", NOW), (0, 1, "click", NOW))
+    weights = event_weights(arrays, {"apply": 2.0}, default=0.25)
+    assert weights.tolist() == [2.0, 0.25]
+
+
+def test_weights_halve_every_half_life():
+    arrays = arrays_of((0, 0, "apply", NOW - 30 * DAY), (1, 2, "view", NOW))
+    mat = dense(arrays, half_life_days=30)
+
+    assert mat[0, 0] == pytest.approx(1.0)
+    assert mat[1, 2] == pytest.approx(0.5)
+    assert dense(arrays, half_life_days=0)[0, 0] == 2.0
+
+
+def test_repeats_count_once_at_the_most_recent_weight():
+    arrays = arrays_of(
+        *[(0, 1, "view", NOW - d * DAY) for d in (60, 30, 0)],
+        (0, 2, "skip", NOW),
+        (1, 0, "view", float("nan")),
+    )
+    mat = dense(arrays, half_life_days=30)
+
+    assert mat[0, 1] == pytest.approx(0.5)
+    assert mat[0, 2] == 0  # zero-weight events are dropped
+    assert mat[1, 0] == pytest.approx(0.5)  # missing timestamps don't decay
+    assert weighted_matrix(arrays, (2, 3), half_life_days=0).nnz == 3
+
+
+def test_distinct_events_on_a_pair_are_summed_and_capped():
+    arrays = arrays_of((1, 1, "apply", NOW), (1, 1, "view", NOW), (1, 1, "click", NOW))
+    assert dense(arrays, half_life_days=0, max_weight=10)[1, 1] == 3.5
+    assert dense(arrays, half_life_days=0, max_weight=3)[1, 1] == 3.0
+
+
+def test_empty_input_gives_an_empty_matrix():
+    assert weighted_matrix(InteractionArrays(), (2, 3), as_of=NOW).nnz == 0
+
+
+def test_only_events_inside_the_lag_window_are_tracked():
+    arrays = InteractionArrays(lag=60)
+    arrays.extend([(0, 0, "view", 1000.0, "old"), (0, 1, "view", 1950.0, "near")])
+    arrays.extend([(1, 0, "view", 2000.0, "new"), (1, 1, "view", np.nan, "nan")])
+
+    assert arrays.recent_events() == {"near": 1950.0, "new": 2000.0}
+    # with nothing newer than `since`, the window hangs off `since`
+    assert InteractionArrays(lag=60).recent_events(since=5.0) == {}
+
+
+def test_incremental_reads_skip_already_trained_events():
+    trained = {str(uuid4()): 1990.0, str(uuid4()): 1900.0}
+    where = and_(*incremental_clauses(2000.0, lag=60, exclude=trained))
+
+    sql = str(where.compile(dialect=postgresql.dialect()))
+    assert "interaction_events.id != ALL (" in sql
+    ids = where.compile(dialect=postgresql.dialect()).params.values()
+    assert [str(u) for u in list(ids)[1]] == list(trained)
+    assert len(incremental_clauses(2000.0, lag=60)) == 1
+
+
+def test_skipped_events_stay_excluded_while_inside_the_window():
+    trained = {"a": 1990.0, "b": 1900.0}
+    arrays = InteractionArrays(lag=60)
+    arrays.recent.update(trained)  # as `stream_interactions` seeds them
+    arrays.extend([(0, 0, "view", 2010.0, "c")])
+
+    assert arrays.recent_events(since=2000.0) == {"a": 1990.0, "c": 2010.0}
@@ -0,0 +1,68 @@
+import asyncio
+from datetime import date
+from types import SimpleNamespace
+
+from sqlalchemy.sql.elements import TextClause
+
+from app.services.interaction_retention import (
+    add_months,
+    drop_expired_partitions,
+    ensure_partitions,
+    partition_name,
+)
+
+
+class FakeSession:
+    """A partitioned `interaction_events` with the given child tables."""
+
+    def __init__(self, children):
+        self.children = list(children)
+        self.sql = []
+        self.rollups = 0
+        self.commits = 0
+
+    async def scalar(self, stmt, params=None):
+        return "p"
+
+    async def execute(self, stmt, params=None):
+        if not isinstance(stmt, TextClause):
+            self.rollups += 1
+            return SimpleNamespace(rowcount=0)
+        self.sql.append(str(stmt))
+        names = self.children
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: names))
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_add_months_rolls_over_years():
+    assert add_months(date(2026, 11, 17), 0) == date(2026, 11, 1)
+    assert add_months(date(2026, 11, 17), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 31), -1) == date(2025, 12, 1)
+    assert add_months(date(2026, 3, 1), -15) == date(2024, 12, 1)
+    assert partition_name(date(2026, 2, 1)) == "interaction_events_202602"
+
+
+def test_missing_partitions_are_created_ahead():
+    session = FakeSession(["interaction_events_202610", "interaction_events_default"])
+    created = asyncio.run(ensure_partitions(session, ahead=2, today=date(2026, 10, 18)))
+
+    assert created == ["interaction_events_202611", "interaction_events_202612"]
+    assert (
+        "PARTITION OF interaction_events FOR VALUES FROM ('2026-12-01') "
+        "TO ('2027-01-01')" in session.sql[-1]
+    )
+
+
+def test_only_partitions_past_retention_are_rolled_up_and_dropped():
+    children = [f"interaction_events_2026{m:02d}" for m in (5, 2, 3, 4, 6)]
+    session = FakeSession(children + ["interaction_events_default"])
+    dropped = asyncio.run(
+        drop_expired_partitions(session, retention_months=6, today=date(2026, 10, 18))
+    )
+
+    # six whole months before October are kept: April onwards
+    assert dropped == ["interaction_events_202602", "interaction_events_202603"]
+    assert session.rollups == 2 and session.commits == 2
+    assert 'DROP TABLE "interaction_events_202603"' in session.sql
@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+from uuid import uuid4
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.routers import interactions
+from app.db.session import get_db
+from app.deps.dependencies import Principal, get_current_principal
+
+KNOWN, UNKNOWN = uuid4(), uuid4()
+STUDENT = Principal(id=uuid4(), role="student")
+
+
+class FakeSession:
+    def __init__(self):
+        self.inserted = []
+        self.commits = 0
+
+    async def execute(self, stmt, rows=None):
+        if rows is None:
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: [KNOWN]))
+        self.inserted.append(rows)
+
+    async def commit(self):
+        self.commits += 1
+
+
+def client(session):
+    app = FastAPI()
+    app.include_router(interactions.router, prefix="/interactions")
+    app.dependency_overrides[get_db] = lambda: session
+    app.dependency_overrides[get_current_principal] = lambda: STUDENT
+    return TestClient(app)
+
+
+def event(pid, kind="view"):
+    return {"property_id": str(pid), "event_type": kind}
+
+
+def test_batch_writes_known_events_in_one_insert():
+    session = FakeSession()
+    payload = [event(KNOWN), event(UNKNOWN), event(KNOWN, "save")]
+    response = client(session).post("/interactions/batch", json=payload)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["logged"], body["rejected"]) == (2, 1)
+    assert [r["status"] for r in body["results"]] == ["logged", "rejected", "logged"]
+    assert body["results"][1]["error"] == "Property not found"
+    assert len(session.inserted) == 1 and session.commits == 1
+    assert [r["event_type"] for r in session.inserted[0]] == ["view", "save"]
+    assert all(r["user_id"] == STUDENT.id for r in session.inserted[0])
+
+
+def test_empty_batch_touches_nothing():
+    session = FakeSession()
+    response = client(session).post("/interactions/batch", json=[])
+
+    assert response.json() == {"logged": 0, "rejected": 0, "results": []}
+    assert session.inserted == []
+
+
+def test_oversized_batch_is_rejected(monkeypatch):
+    monkeypatch.setattr(interactions, "INTERACTION_BATCH_MAX", 2)
+    payload = [event(KNOWN)] * 3
+    response = client(FakeSession()).post("/interactions/batch", json=payload)
+
+    assert response.status_code == 413
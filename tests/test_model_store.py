@@ -0,0 +1,90 @@
+import os
+from functools import partial
+
+import numpy as np
+
+from app.services import model_store, recommender
+from app.services.model_store import latest_version, load_artifact, save_artifact
+from app.services.recommender import RecommenderService
+
+
+def representations(seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "user_embeddings": rng.random((2, 3)),
+        "user_biases": rng.random(2),
+        "item_embeddings": rng.random((4, 3)),
+        "item_biases": rng.random(4),
+    }
+
+
+def save(root, seed=0, model=None):
+    return save_artifact(
+        model,
+        ["s1", "s2"],
+        ["h1", "h2", "h3", "h4"],
+        representations(seed),
+        meta={"epochs": 5},
+        root=str(root),
+    )
+
+
+def test_save_and_load_round_trip(tmp_path):
+    version = save(tmp_path, model={"weights": [1, 2]})
+    artifact = load_artifact(root=str(tmp_path))
+
+    assert latest_version(str(tmp_path)) == version
+    assert artifact.version == version
+    assert artifact.meta["epochs"] == 5 and artifact.meta["n_hostels"] == 4
+    assert artifact.student_map == {"s1": 0, "s2": 1}
+    assert isinstance(artifact.item_embeddings, np.memmap)
+    assert artifact.item_embeddings.dtype == np.float32
+    assert artifact.load_model() == {"weights": [1, 2]}
+    expected = (
+        representations()["item_embeddings"] @ representations()["user_embeddings"][1]
+        + representations()["item_biases"]
+    )
+    assert np.allclose(artifact.scores_for(1), expected)
+
+
+def test_missing_store_loads_nothing(tmp_path):
+    assert latest_version(str(tmp_path)) is None
+    assert load_artifact(root=str(tmp_path)) is None
+
+
+def test_old_versions_are_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_store, "RECOMMENDER_KEEP_VERSIONS", 2)
+    versions = [save(tmp_path, seed) for seed in range(4)]
+
+    on_disk = sorted(d for d in os.listdir(tmp_path) if not d.startswith("."))
+    assert on_disk == sorted(versions[2:] + [model_store.LATEST_FILE])
+    assert latest_version(str(tmp_path)) == versions[-1]
+
+
+def test_service_hot_reloads_the_latest_version(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    monkeypatch.setattr(recommender, "latest_version", partial(latest_version, root))
+    monkeypatch.setattr(recommender, "load_artifact", partial(load_artifact, root=root))
+    service = RecommenderService()
+
+    first = save(tmp_path)
+    assert service.maybe_reload().version == first  # first check is never throttled
+    second = save(tmp_path, seed=1)
+    assert service.maybe_reload().version == first  # within the reload interval
+    assert service.maybe_reload(force=True).version == second
+
+
+def test_recent_events_travel_with_the_version(tmp_path):
+    recent = {"7c9e6679-7425-40de-944b-e07fc1f90ae7": 1990.5}
+    with_events = save_artifact(
+        None,
+        ["s1"],
+        ["h1"],
+        representations(),
+        root=str(tmp_path),
+        recent_events=recent,
+    )
+    assert load_artifact(with_events, str(tmp_path)).recent_events() == recent
+
+    without = save(tmp_path)
+    assert load_artifact(without, str(tmp_path)).recent_events() == {}
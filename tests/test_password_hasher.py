@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+from passlib.context import CryptContext
+
+from app.main import password_hasher_busy
+from app.services.password_hasher import PasswordHasher, PasswordHasherBusy
+
+
+def hasher(rounds=1000, **kwargs):
+    # sha256_crypt stands in for bcrypt: same CryptContext cost handling
+    hasher = PasswordHasher(workers=1, **kwargs)
+    hasher.context = CryptContext(
+        schemes=["sha256_crypt"], deprecated="auto", sha256_crypt__rounds=rounds
+    )
+    return hasher
+
+
+def test_hash_and_verify_on_the_pool():
+    h = hasher()
+    hashed = asyncio.run(h.hash("s3cret"))
+
+    assert asyncio.run(h.verify("s3cret", hashed))
+    assert not asyncio.run(h.verify("wrong", hashed))
+    assert h.pending == 0
+    h.shutdown()
+
+
+def test_cost_change_rehashes_on_verify():
+    old = asyncio.run(hasher(rounds=1000).hash("s3cret"))
+    h = hasher(rounds=2000)
+
+    valid, new_hash = asyncio.run(h.verify_and_update("s3cret", old))
+    assert valid and new_hash and "rounds=2000" in new_hash
+    assert asyncio.run(h.verify_and_update("s3cret", new_hash)) == (True, None)
+    assert h.stats()["rehashed"] == 1
+    h.shutdown()
+
+
+def test_queue_guard_rejects_with_503():
+    h = hasher(max_pending=1)
+    h.pending = 1
+    with pytest.raises(PasswordHasherBusy):
+        asyncio.run(h.hash("s3cret"))
+    assert h.stats()["rejected"] == 1
+
+    response = asyncio.run(password_hasher_busy(None, PasswordHasherBusy("busy")))
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
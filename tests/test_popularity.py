@@ -0,0 +1,64 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services.popularity import PopularityCache, segment_for
+
+
+class FakeSession:
+    """Serves rankings per (window, segment) and counts the queries."""
+
+    def __init__(self, rankings):
+        self.rankings = rankings
+        self.queries = []
+
+    async def execute(self, stmt):
+        params = stmt.whereclause.compile().params
+        key = tuple(params.values())
+        self.queries.append(key)
+        ids = self.rankings.get(key, [])
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: ids))
+
+
+RANKINGS = {
+    ("7d", ""): ["p1", "p2", "p3", "p4"],
+    ("7d", "unilag"): ["p3", "p5"],
+}
+
+
+def test_segment_is_case_and_space_insensitive():
+    assert segment_for("  UNILAG ") == "unilag"
+    assert segment_for(None) == ""
+
+
+def test_university_ranking_is_topped_up_from_overall():
+    cache = PopularityCache(size=10, ttl=60)
+    session = FakeSession(RANKINGS)
+
+    top = asyncio.run(cache.top(session, 4, university="Unilag", window="7d"))
+    assert top == ["p3", "p5", "p1", "p2"]
+    assert asyncio.run(cache.top(session, 2, window="7d")) == ["p1", "p2"]
+
+
+def test_keep_filters_before_counting():
+    cache = PopularityCache(size=10, ttl=60)
+
+    def keep(ids):
+        return [pid for pid in ids if pid != "p1"]
+
+    top = asyncio.run(cache.top(FakeSession(RANKINGS), 2, window="7d", keep=keep))
+    assert top == ["p2", "p3"]
+
+
+def test_rankings_are_cached_until_the_ttl_expires():
+    session = FakeSession(RANKINGS)
+    cache = PopularityCache(size=10, ttl=60)
+    for _ in range(3):
+        asyncio.run(cache.ranked(session, "7d", ""))
+    assert session.queries == [("7d", "")]
+
+    cache.clear()
+    asyncio.run(cache.ranked(session, "7d", ""))
+    expired = PopularityCache(size=10, ttl=-1)
+    for _ in range(2):
+        asyncio.run(expired.ranked(session, "7d", ""))
+    assert len(session.queries) == 4
@@ -0,0 +1,107 @@
+import asyncio
+import sys
+import threading
+from types import SimpleNamespace
+
+from app.services import embeddings
+from app.services.embeddings import QueryEmbeddingCache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+
+def test_lookups_ignore_case_and_whitespace():
+    cache = QueryEmbeddingCache(maxsize=4, ttl=60)
+    cache.set("Cheap  Hostel ", [1.0, 2.0])
+
+    assert cache.get("cheap hostel") == [1.0, 2.0]
+    assert cache.get("expensive hostel") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryEmbeddingCache(maxsize=2, ttl=60)
+    cache.set("a", [1.0])
+    cache.set("b", [2.0])
+    cache.get("a")
+    cache.set("c", [3.0])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0] and cache.get("c") == [3.0]
+
+
+def test_expired_entries_are_dropped():
+    cache = QueryEmbeddingCache(maxsize=2, ttl=-1)
+    cache.set("a", [1.0])
+
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_redis_shares_entries_between_workers():
+    redis = FakeRedis()
+    QueryEmbeddingCache(maxsize=2, ttl=60, redis_client=redis).set("a", [0.5, 1.5])
+    other = QueryEmbeddingCache(maxsize=2, ttl=60, redis_client=redis)
+
+    assert other.get("A") == [0.5, 1.5]
+    assert other.get("a") == [0.5, 1.5]
+    assert other.stats()["redis_hits"] == 1 and other.stats()["hits"] == 1
+
+
+class ThreadRecordingRedis(FakeRedis):
+    def __init__(self):
+        super().__init__()
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(threading.current_thread())
+        return super().get(key)
+
+    def setex(self, key, ttl, value):
+        self.threads.append(threading.current_thread())
+        super().setex(key, ttl, value)
+
+
+def test_redis_calls_stay_off_the_event_loop(monkeypatch):
+    redis = ThreadRecordingRedis()
+    monkeypatch.setattr(
+        embeddings, "query_cache", QueryEmbeddingCache(4, 60, redis_client=redis)
+    )
+    service = embeddings.EmbeddingService()
+
+    async def aembed(text):
+        return [1.0, 2.0]
+
+    monkeypatch.setattr(service, "aembed", aembed)
+
+    assert asyncio.run(service.aembed_query("cheap hostel")) == [1.0, 2.0]
+    assert len(redis.data) == 1
+    assert len(redis.threads) == 2
+    assert threading.main_thread() not in redis.threads
+
+
+def test_redis_client_uses_short_timeouts(monkeypatch):
+    seen = {}
+
+    class Client:
+        def ping(self):
+            return True
+
+    def from_url(url, **kwargs):
+        seen.update(kwargs)
+        return Client()
+
+    monkeypatch.setattr(embeddings, "QUERY_CACHE_REDIS", True)
+    monkeypatch.setitem(sys.modules, "redis", SimpleNamespace(from_url=from_url))
+
+    assert isinstance(embeddings._redis_client(), Client)
+    assert seen["socket_connect_timeout"] == embeddings.QUERY_CACHE_REDIS_TIMEOUT
+    assert seen["socket_timeout"] == embeddings.QUERY_CACHE_REDIS_TIMEOUT
@@ -0,0 +1,175 @@
+import asyncio
+import multiprocessing
+from types import SimpleNamespace
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from app.services.model_store import load_artifact, save_artifact
+from app.services.recommender import RecommenderService
+
+N_USERS, N_ITEMS = 11, 9
+
+
+@pytest.fixture
+def artifact(tmp_path):
+    rng = np.random.default_rng(0)
+    representations = {
+        "user_embeddings": rng.random((N_USERS, 4)),
+        "user_biases": rng.random(N_USERS),
+        "item_embeddings": rng.random((N_ITEMS, 4)),
+        "item_biases": rng.random(N_ITEMS),
+    }
+    version = save_artifact(
+        None,
+        [f"u{i}" for i in range(N_USERS)],
+        [f"h{i}" for i in range(N_ITEMS)],
+        representations,
+        root=str(tmp_path),
+    )
+    return load_artifact(version, str(tmp_path))
+
+
+def expected_top(artifact, items, top_n):
+    scores = (
+        artifact.user_embeddings @ artifact.item_embeddings[items].T
+        + artifact.item_biases[items]
+        + artifact.user_biases[:, None]
+    )
+    return items[np.argsort(-scores, axis=1, kind="stable")[:, :top_n]]
+
+
+def score_all(artifact, items, top_n, **kwargs):
+    shards = list(RecommenderService()._score_shards(artifact, items, top_n, **kwargs))
+    return shards, np.vstack([top for _, top, _ in shards])
+
+
+def test_multi_shard_threads_match_inline(artifact):
+    items = np.array([0, 2, 3, 5, 8])
+    shards, top = score_all(artifact, items, 3, workers=3, batch_size=4)
+
+    assert [start for start, _, _ in shards] == [0, 4, 8]
+    assert np.array_equal(top, expected_top(artifact, items, 3))
+    _, inline = score_all(artifact, items, 3, workers=1, batch_size=4)
+    assert np.array_equal(top, inline)
+
+
+def test_constraints_are_sliced_per_shard(artifact):
+    items = np.arange(N_ITEMS)
+    user_gender = np.zeros(N_USERS, dtype=np.int8)
+    # students 5.. only accept listings priced at most 300
+    user_max = np.where(np.arange(N_USERS) >= 5, 300.0, np.nan)
+    constraints = (
+        user_gender,
+        np.full(N_USERS, np.nan),
+        user_max,
+        np.zeros(N_ITEMS, dtype=np.int8),
+        np.arange(N_ITEMS) * 100.0,
+    )
+    shards, top = score_all(
+        artifact, items, 6, constraints=constraints, workers=2, batch_size=3
+    )
+    scores = np.vstack([s for _, _, s in shards])
+
+    capped = top[5:][np.isfinite(scores[5:])]
+    assert capped.max() <= 3
+    assert np.isinf(scores[5:, 4:]).all()
+    assert np.isfinite(scores[:5]).all()
+
+
+def _score_in_child(artifact, queue):
+    _, top = score_all(artifact, np.arange(N_ITEMS), 2, workers=4, batch_size=2)
+    queue.put(top.shape)
+
+
+def test_sharded_scoring_runs_in_daemonic_worker(artifact):
+    """Celery prefork children are daemonic and can't start processes."""
+    ctx = multiprocessing.get_context("fork")
+    queue = ctx.Queue()
+    child = ctx.Process(target=_score_in_child, args=(artifact, queue), daemon=True)
+    child.start()
+    child.join(30)
+    assert child.exitcode == 0
+    assert queue.get(timeout=1) == (N_USERS, 2)
+
+
+class RefreshSession:
+    """Answers the listing and profile reads of `refresh_recommendations`."""
+
+    def __init__(self, listings, profiles):
+        self.answers = [listings, profiles]
+        self.deletes = 0
+        self.rows = []
+        self.commits = 0
+        self.reads = []
+
+    async def execute(self, stmt, rows=None):
+        if rows is not None:
+            self.rows.extend(rows)
+            return None
+        if not self.answers:
+            self.deletes += 1
+            return None
+        self.reads.append(stmt)
+        found = self.answers.pop(0)
+        return SimpleNamespace(all=lambda: found)
+
+    async def commit(self):
+        self.commits += 1
+
+
+def test_refresh_writes_ranked_viable_rows_per_student(tmp_path, monkeypatch):
+    students = [str(uuid4()) for _ in range(3)]
+    hostels = [str(uuid4()) for _ in range(4)]
+    version = save_artifact(
+        None,
+        students,
+        hostels,
+        {
+            "user_embeddings": np.ones((3, 1)),
+            "user_biases": np.zeros(3),
+            "item_embeddings": np.array([[4.0], [3.0], [2.0], [1.0]]),
+            "item_biases": np.zeros(4),
+        },
+        root=str(tmp_path),
+    )
+    artifact = load_artifact(version, str(tmp_path))
+    listings = [
+        (hostels[0], False, None, 100),  # unavailable
+        (hostels[1], True, "female", 100),
+        (hostels[2], True, None, 900),
+        (hostels[3], True, None, 100),
+    ]
+    profiles = [
+        SimpleNamespace(
+            user_id=students[0], gender="male", budget_min=None, budget_max=500
+        ),
+        SimpleNamespace(
+            user_id=students[1], gender=None, budget_min=None, budget_max=None
+        ),
+    ]
+    session = RefreshSession(listings, profiles)
+    service = RecommenderService()
+    monkeypatch.setattr(service, "maybe_reload", lambda force=False: artifact)
+
+    stats = asyncio.run(service.refresh_recommendations(session, top_n=3))
+
+    ranked = {}
+    for row in session.rows:
+        ranked.setdefault(str(row["user_id"]), []).append(
+            (row["rank_position"], str(row["property_id"]))
+        )
+    assert ranked == {
+        students[0]: [(1, hostels[3])],
+        students[1]: [(1, hostels[1]), (2, hostels[2]), (3, hostels[3])],
+    }
+    assert stats["rows"] == 4 and stats["students"] == 3
+    assert session.deletes == 1 and session.commits == 1
+    # profiles are read without their embedding columns
+    assert [c.name for c in session.reads[1].selected_columns] == [
+        "user_id",
+        "gender",
+        "budget_min",
+        "budget_max",
+    ]
@@ -0,0 +1,58 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services.recommender import RecommenderService, grow_model
+
+PARTS = (
+    "embeddings",
+    "embedding_gradients",
+    "embedding_momentum",
+    "biases",
+    "bias_gradients",
+    "bias_momentum",
+)
+
+
+def fake_model(n_users, n_items, components=4):
+    model = SimpleNamespace(
+        no_components=components,
+        learning_schedule="adagrad",
+        random_state=np.random.RandomState(0),
+    )
+    for prefix, n in (("user", n_users), ("item", n_items)):
+        for part in PARTS:
+            shape = (n, components) if part.startswith("embedding") else (n,)
+            setattr(model, f"{prefix}_{part}", np.full(shape, 7.0, np.float32))
+    return model
+
+
+def test_grow_model_appends_rows_and_keeps_trained_state():
+    model = fake_model(3, 5)
+    grow_model(model, n_users=5, n_items=5)
+
+    assert model.user_embeddings.shape == (5, 4)
+    assert (model.user_embeddings[:3] == 7.0).all()
+    assert np.abs(model.user_embeddings[3:]).max() <= 0.5 / 4
+    assert (model.user_embedding_gradients[3:] == 1.0).all()  # adagrad init
+    assert (model.user_embedding_momentum[3:] == 0).all()
+    assert (model.user_biases[3:] == 0).all()
+    assert model.item_embeddings.shape == (5, 4)  # nothing new
+    for part in PARTS:
+        assert getattr(model, f"user_{part}").dtype == np.float32
+
+
+def test_incremental_without_a_watermark_falls_back_to_full_training(monkeypatch):
+    service = RecommenderService()
+    calls = []
+
+    async def train(session):
+        calls.append(session)
+        return True
+
+    monkeypatch.setattr(service, "maybe_reload", lambda force=False: None)
+    monkeypatch.setattr(service, "train", train)
+
+    assert asyncio.run(service.train_incremental("session")) is True
+    assert calls == ["session"]
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from app.services.scoring import CandidateMatrix, to_matrix, top_k_indices, top_k_rows
+
+
+def test_top_k_indices_matches_full_sort():
+    scores = np.random.default_rng(0).random(50)
+    ranked = np.argsort(-scores, kind="stable")
+
+    assert top_k_indices(scores, 5).tolist() == ranked[:5].tolist()
+    assert top_k_indices(scores, 5, offset=10).tolist() == ranked[10:15].tolist()
+    assert top_k_indices(scores, 100, offset=45).tolist() == ranked[45:].tolist()
+    assert top_k_indices(scores, 5, offset=50).size == 0
+    assert top_k_indices(scores, 0).size == 0
+
+
+def test_top_k_indices_keeps_ties_in_order():
+    assert top_k_indices(np.array([1.0, 2.0, 2.0, 0.5, 2.0]), 2).tolist() == [1, 2]
+
+
+def test_top_k_rows_ranks_every_row():
+    scores = np.random.default_rng(1).random((7, 20))
+    expected = np.argsort(-scores, axis=1, kind="stable")
+
+    assert np.array_equal(top_k_rows(scores, 4), expected[:, :4])
+    assert np.array_equal(top_k_rows(scores, 50), expected)
+    assert top_k_rows(scores, 0).shape == (7, 0)
+
+
+def test_to_matrix_checks_dimension():
+    assert to_matrix([], dim=3).shape == (0, 3)
+    assert to_matrix([1, 2, 3], dim=3).shape == (1, 3)
+    with pytest.raises(ValueError):
+        to_matrix([[1, 2]], dim=3)
+
+
+def test_candidate_matrix_skips_bad_rows_and_masks():
+    pairs = [("a", [1, 0]), ("b", None), ("c", [0, 1]), ("d", [1]), ("e", [1, 1])]
+    matrix = CandidateMatrix.from_pairs(pairs, dim=2)
+    assert matrix.ids == ["a", "c", "e"]
+
+    assert matrix.top_k([1, 0.5], 2) == [("e", 1.5), ("a", 1.0)]
+    assert matrix.top_k([1, 0.5], 1, offset=1) == [("a", 1.0)]
+    mask = np.array([True, True, False])
+    assert matrix.top_k([1, 0.5], 5, mask=mask) == [("a", 1.0), ("c", 0.5)]
+
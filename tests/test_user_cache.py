@@ -0,0 +1,155 @@
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.deps import dependencies
+from app.deps.dependencies import Principal, get_current_principal
+from app.services.user_cache import UserCache, _now, user_cache
+
+
+def user(**fields):
+    return SimpleNamespace(id=uuid4(), role="student", is_verified=True, **fields)
+
+
+def test_users_expire_after_the_ttl():
+    alice = user()
+    cache = UserCache(size=10, ttl=60)
+    cache.put(alice)
+    assert cache.get(alice.id) is alice
+
+    stale = UserCache(size=10, ttl=-1)
+    stale.put(alice)
+    assert stale.get(alice.id) is None
+    assert stale.stats()["size"] == 0
+
+
+def test_full_cache_evicts_the_entry_closest_to_expiry():
+    cache = UserCache(size=2, ttl=60)
+    first, second, third = user(), user(), user()
+    for u in (first, second, third):
+        cache.put(u)
+
+    assert cache.get(first.id) is None
+    assert cache.get(second.id) is second and cache.get(third.id) is third
+
+
+def test_revocation_rejects_older_tokens_and_drops_the_user():
+    cache = UserCache(size=10, ttl=60)
+    alice, now = user(), _now()
+    cache.put(alice)
+    asyncio.run(cache.revoke(alice.id, before=now))
+    asyncio.run(cache.revoke(alice.id, before=now - 10))  # never moves backwards
+
+    assert cache.get(alice.id) is None
+    assert asyncio.run(cache.is_revoked(alice.id, now - 1))
+    assert asyncio.run(cache.is_revoked(alice.id, None))
+    assert not asyncio.run(cache.is_revoked(alice.id, now))
+    assert not asyncio.run(cache.is_revoked(uuid4(), 0))
+
+
+def test_revocations_are_forgotten_once_every_token_has_expired():
+    cache = UserCache(size=10, ttl=60, revocation_ttl=900)
+    old, recent = uuid4(), uuid4()
+    asyncio.run(cache.revoke(old, before=_now() - 901))
+    asyncio.run(cache.revoke(recent, before=_now() - 60))
+
+    assert cache.stats()["revoked_users"] == 1
+    assert asyncio.run(cache.is_revoked(recent, _now() - 120))
+
+
+class FakeRedis:
+    """The shared store every worker's cache talks to."""
+
+    def __init__(self):
+        self.data, self.expiry = {}, {}
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = str(value).encode()
+        self.expiry[key] = ex
+
+    async def get(self, key):
+        return self.data.get(key)
+
+
+def test_logout_on_one_worker_applies_on_every_worker():
+    redis = FakeRedis()
+    worker_a = UserCache(size=10, ttl=60, redis_client=redis, revocation_ttl=900)
+    worker_b = UserCache(size=10, ttl=60, redis_client=redis, revocation_ttl=900)
+    uid, now = uuid4(), _now()
+
+    asyncio.run(worker_a.revoke(uid, before=now))
+
+    assert asyncio.run(worker_b.is_revoked(uid, now - 5))
+    assert not asyncio.run(worker_b.is_revoked(uid, now + 5))
+    assert 890 <= redis.expiry[f"revoked:{uid}"] <= 900
+
+
+def test_unreachable_redis_falls_back_to_local_revocations():
+    class DownRedis:
+        calls = 0
+
+        async def set(self, key, value, ex=None):
+            DownRedis.calls += 1
+            raise ConnectionError("no route to host")
+
+        async def get(self, key):
+            DownRedis.calls += 1
+            raise ConnectionError("no route to host")
+
+    cache = UserCache(size=10, ttl=60, redis_client=DownRedis())
+    uid, now = uuid4(), _now()
+    asyncio.run(cache.revoke(uid, before=now))
+
+    assert asyncio.run(cache.is_revoked(uid, now - 1))
+    assert not asyncio.run(cache.is_revoked(uuid4(), now))
+    assert DownRedis.calls == 1  # not retried on every request
+
+
+class FakeDB:
+    def __init__(self, found=None):
+        self.found = found
+        self.queries = 0
+
+    async def execute(self, stmt):
+        self.queries += 1
+        return SimpleNamespace(
+            scalars=lambda: SimpleNamespace(first=lambda: self.found)
+        )
+
+
+def principal(payload, db, monkeypatch):
+    monkeypatch.setattr(dependencies, "decode_token", lambda token: payload)
+    return asyncio.run(get_current_principal("token", db))
+
+
+def test_principal_comes_from_claims_without_a_query(monkeypatch):
+    uid, db = uuid4(), FakeDB()
+    payload = {"sub": str(uid), "role": "landlord", "verified": True, "iat": 10}
+
+    assert principal(payload, db, monkeypatch) == Principal(uid, "landlord", True)
+    assert db.queries == 0
+
+
+def test_tokens_without_claims_load_and_cache_the_user(monkeypatch):
+    alice = user()
+    db = FakeDB(found=alice)
+    try:
+        for _ in range(2):
+            found = principal({"sub": str(alice.id)}, db, monkeypatch)
+            assert found == Principal(alice.id, "student", True)
+        assert db.queries == 1
+    finally:
+        user_cache.invalidate(alice.id)
+
+
+def test_revoked_tokens_are_refused(monkeypatch):
+    uid = uuid4()
+    asyncio.run(user_cache.revoke(uid, before=_now()))
+    payload = {"sub": str(uid), "role": "student", "iat": _now() - 60}
+
+    with pytest.raises(HTTPException) as err:
+        principal(payload, FakeDB(), monkeypatch)
+    assert err.value.status_code == 401
@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services import vector_index
+from app.services.embedding_store import decode_embedding, encode_embedding
+from app.services.vector_index import (
+    VectorIndex,
+    load_vector_index,
+    refresh_vector_index,
+)
+
+
+def index(**kwargs):
+    return VectorIndex(dim=2, use_faiss=False, **kwargs)
+
+
+def test_search_ranks_by_inner_product():
+    idx = index()
+    idx.build([1, 2, 3], [[1, 0], [0, 1], [0.6, 0.8]])
+
+    assert idx.ready and len(idx) == 3
+    assert [pid for pid, _ in idx.search([0, 1], 2)] == ["2", "3"]
+    assert idx.search([0, 1], 0) == []
+
+
+def test_upsert_and_remove_hide_stale_rows():
+    idx = index()
+    idx.build(["a", "b"], [[1, 0], [0, 1]])
+    idx.add("a", [0, -1])
+    idx.remove("b")
+    for i in range(100):  # grows past the initial capacity
+        idx.add(f"x{i}", [-1, 0])
+
+    hits = idx.search([1, 0], 3)
+    assert "b" not in [pid for pid, _ in hits]
+    assert ("a", 0.0) in idx.search([1, 0], 102)
+    assert len(idx) == 101
+
+
+class FakeSession:
+    def __init__(self, *batches):
+        self.batches = list(batches)
+
+    async def execute(self, stmt):
+        rows = self.batches.pop(0)
+        return SimpleNamespace(all=lambda: rows)
+
+
+def row(pid, vector, day):
+    return SimpleNamespace(
+        property_id=pid,
+        embedding_f32=encode_embedding(vector),
+        created_at=datetime(2026, 1, day),
+    )
+
+
+def test_load_then_refresh_advances_the_watermark():
+    idx = index()
+    bad = SimpleNamespace(property_id="bad", embedding_f32=b"x", created_at=None)
+    session = FakeSession(
+        [row("a", [1, 0], 1), row("b", [0, 1], 2), bad], [row("c", [1, 1], 5)]
+    )
+
+    assert asyncio.run(load_vector_index(session, idx)) == 2
+    assert idx.watermark == datetime(2026, 1, 2)
+    assert asyncio.run(refresh_vector_index(session, idx)) == 1
+    assert idx.watermark == datetime(2026, 1, 5)
+    assert idx.search([1, 1], 1)[0][0] == "c"
+    assert np.isclose(idx.search([1, 1], 1)[0][1], np.sqrt(2))
+
+
+def test_refresh_skips_listings_this_worker_already_added():
+    idx = index()
+    session = FakeSession(
+        [row("a", [1, 0], 1)], [row(f"n{i}", [i, 1], 2 + i % 20) for i in range(50)]
+    )
+    asyncio.run(load_vector_index(session, idx))
+    for i in range(50):  # add_property / bulk import in this worker
+        idx.add(f"n{i}", decode_embedding(encode_embedding([i, 1])))
+
+    assert asyncio.run(refresh_vector_index(session, idx)) == 0
+    assert idx.stats()["live"] == 51
+    assert idx.stats()["rows"] == 51 and idx.stats()["stale"] == 0
+
+
+def test_stale_rows_are_compacted_away(monkeypatch):
+    monkeypatch.setattr(vector_index, "VECTOR_INDEX_MAX_STALE", 0.5)
+    idx = index()
+    idx.build([f"p{i}" for i in range(10)], [[i, 1] for i in range(10)])
+    for i in range(6):
+        idx.add(f"p{i}", [-i, 1])  # new embedding supersedes the old row
+
+    stats = idx.stats()
+    assert stats["live"] == 10
+    assert stats["stale"] <= 0.5 * stats["rows"]
+    assert [pid for pid, _ in idx.search([-1, 0], 2)] == ["p5", "p4"]
+    assert idx.search([1, 0], 1)[0][0] == "p9"